@@ -1,30 +1,216 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Header, Query, UploadFile, HTTPException
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+import asyncio
+import json
+import logging
 import os
-import shutil
+import uuid
+from typing import Dict, Optional, Tuple
 
-from react_agent.generator import generate_fe
+from react_agent.artifacts import ArtifactStore, JobArtifacts, UploadStore, UploadTooLargeError
+from react_agent.generator import GenerationResult, agenerate_fe
+from react_agent.hedging import hedge_metrics
+from react_agent.jobs import JobQueue, JobStatus, QueueFullError, current_job
+from react_agent.llm import warm_up
+from react_agent.rate_limit import rate_limit_metrics
+from react_agent.yaml_extracter import TaskValidationError
+
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(message)s")
 
 app = FastAPI()
 
-# Set upload folder
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Every job gets its own artifact directory for its task file and outputs
+store = ArtifactStore()
+# Uploaded task files, stored once per content hash
+uploads = UploadStore()
+
+# Generations run as tasks on the event loop, JOB_WORKERS at a time; every
+# model call and API probe in them is awaited rather than holding a thread.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "16"))
+
+
+async def _generate(artifacts: JobArtifacts, num_samples: int = 1) -> GenerationResult:
+    job = current_job()
+    return await agenerate_fe(
+        task_path=str(artifacts.path("task.yaml")),
+        artifacts=artifacts,
+        on_event=job.publish if job else None,
+        num_samples=num_samples,
+    )
+
+
+jobs = JobQueue(_generate, max_workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE)
+# Latest job for each (task hash, num_samples), so re-uploading a task joins
+# its running job or returns its result instead of generating it again
+jobs_by_task: Dict[Tuple[str, int], str] = {}
+
+
+def _existing_job(task_key: Tuple[str, int]):
+    job = jobs.get(jobs_by_task.get(task_key, ""))
+    if job is None or job.status == JobStatus.FAILED:
+        return None
+    if job.status == JobStatus.SUCCEEDED and store.job(job.id) is None:
+        return None
+    return job
+
+
+def _upload_response(job, filename: str, task_hash: str, duplicate: bool, status_code: int) -> JSONResponse:
+    content = {
+        "message": "File uploaded successfully",
+        "filename": filename,
+        "task_hash": task_hash,
+        "duplicate": duplicate,
+        "job_id": job.id,
+        "status": job.status.value,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+    if job.status == JobStatus.SUCCEEDED:
+        content["result_url"] = f"/jobs/{job.id}/result"
+    return JSONResponse(content=content, status_code=status_code)
+
+
+# Filled in by the startup warm-up; /ready answers 503 until it finishes.
+warm_up_report: Optional[dict] = None
+
+
+@app.on_event("startup")
+async def _start_warm_up() -> None:
+    # Compile the graph and build model clients off the event loop, so the
+    # first upload doesn't pay for them; /ready reports when this is done.
+    async def run() -> None:
+        global warm_up_report
+        report = await asyncio.to_thread(warm_up)
+        logging.getLogger("react_agent.api").info(json.dumps({"event": "warm_up", **report}))
+        warm_up_report = report
+
+    app.state.warm_up_task = asyncio.create_task(run())
+
+
+@app.on_event("shutdown")
+def _shutdown_jobs() -> None:
+    jobs.shutdown(wait=False)
+
 
-@app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+@app.get("/ready")
+async def ready():
+    if warm_up_report is None:
+        return JSONResponse(content={"ready": False}, status_code=503, headers={"Retry-After": "5"})
+    return {"ready": True, "warm_up": warm_up_report}
+
+
+@app.post("/upload", status_code=202)
+async def upload_file(
+    file: UploadFile = File(...),
+    num_samples: int = Query(1, ge=1, le=20, description="Sample inputs to probe the model API with"),
+):
     if not file:
         raise HTTPException(status_code=400, detail="No file provided")
 
     if file.filename == "":
         raise HTTPException(status_code=400, detail="No selected file")
 
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
+    # The client's filename is only a label; storage is named by content
+    filename = os.path.basename(file.filename.replace("\\", "/"))
+    if file.size is not None and file.size > uploads.max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {uploads.max_bytes} bytes")
+    try:
+        upload = await asyncio.to_thread(uploads.ingest, file.file, filename)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except TaskValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    task_key = (upload.digest, num_samples)
+    job = _existing_job(task_key)
+    if job is not None:
+        return _upload_response(job, filename, upload.digest, True, 200)
+
+    store.cleanup(keep=jobs.active_ids())
+    artifacts = store.create_job(uuid.uuid4().hex)
+    with open(upload.path, "rb") as task_file:
+        artifacts.write_stream("task.yaml", task_file)
+
+    try:
+        job = jobs.submit(artifacts, name=filename, job_id=artifacts.id, num_samples=num_samples)
+    except QueueFullError as e:
+        store.remove(artifacts.id)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    for key in [k for k, job_id in jobs_by_task.items() if jobs.get(job_id) is None]:
+        del jobs_by_task[key]
+    jobs_by_task[task_key] = job.id
+
+    return _upload_response(job, filename, upload.digest, upload.duplicate, 202)
+
+
+def _get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = _get_job(job_id)
+    content = job.to_dict()
+    if job.status == JobStatus.SUCCEEDED:
+        content["result_url"] = f"/jobs/{job.id}/result"
+        content["timings"] = {name: t.duration for name, t in job.result.run.timings.items()}
+        content["usage"] = {"totals": job.result.usage.totals(), "stages": job.result.usage.by_stage()}
+    return JSONResponse(content=content)
+
+
+@app.get("/metrics")
+async def metrics():
+    # Queue depth of the job pool and of each LLM provider's rate limiter,
+    # and how often hedged stages sent a second request
+    return JSONResponse(content={
+        "jobs": {"active": jobs.active},
+        "llm_rate_limits": rate_limit_metrics(),
+        "llm_hedging": hedge_metrics(),
+    })
+
+
+def _sse(event_id: int, event: dict) -> str:
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """Stream a job's stage and token events as Server-Sent Events.
+
+    Reconnecting clients resume after the ``Last-Event-ID`` they last saw. The
+    stream ends with a ``done`` event carrying the job's final status.
+    """
+    job = _get_job(job_id)
+    cursor = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def stream():
+        nonlocal cursor
+        while True:
+            events, complete = job.events_after(cursor)
+            for seq, event in events:
+                yield _sse(seq, event)
+                cursor = seq + 1
+            if complete:
+                yield _sse(cursor, {"type": "done", **job.to_dict()})
+                return
+            await job.await_events(cursor, timeout=15)
 
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    print(generate_fe(task_path=file_path))
 
-    return JSONResponse(content={"message": "File uploaded successfully", "filename": file.filename}, status_code=200)
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+    return FileResponse(job.result.fixed_ui, media_type="text/html", filename=f"{job.id}.html")
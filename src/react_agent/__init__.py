@@ -2,8 +2,32 @@
 
 This module defines a custom reasoning and action agent graph.
 It invokes tools in a simple loop.
+
+Building the graph imports LangGraph and LangChain, so it is deferred until
+``react_agent.graph`` is first used; importing lighter modules such as
+`react_agent.jobs` or `react_agent.yaml_extracter` does not pay for it.
 """
 
-from react_agent.graph import graph
+import sys
+import types
+from typing import Any
 
 __all__ = ["graph"]
+
+
+class _Package(types.ModuleType):
+    @property
+    def graph(self) -> Any:
+        """The compiled agent graph."""
+        from react_agent.graph import graph
+
+        return graph
+
+    @graph.setter
+    def graph(self, value: Any) -> None:
+        # The import system binds the ``react_agent.graph`` submodule here;
+        # the package attribute keeps naming the compiled graph instead.
+        pass
+
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,233 @@
+"""Job-scoped storage for generation inputs and outputs.
+
+Each generation gets its own directory under the store root, named by job id,
+so concurrent generations never overwrite each other's task files or HTML.
+Files are written atomically (temporary file + rename), and old job
+directories are removed by `ArtifactStore.cleanup` according to the
+retention policy.
+
+Uploaded task files are kept apart from the jobs in an `UploadStore`, named by
+the SHA-256 of their contents, so an identical task file is stored once and
+recognized without parsing it again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Collection, List, Optional
+
+from react_agent.yaml_extracter import TaskValidationError, parse_task
+
+DEFAULT_ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR", ".artifacts")
+DEFAULT_MAX_AGE = float(os.environ.get("ARTIFACTS_MAX_AGE", str(7 * 24 * 3600)))
+DEFAULT_MAX_JOBS = int(os.environ.get("ARTIFACTS_MAX_JOBS", "500"))
+DEFAULT_UPLOADS_DIR = os.environ.get("UPLOADS_DIR", ".uploads")
+DEFAULT_UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(1024 * 1024)))
+UPLOAD_EXTENSIONS = (".yaml", ".yml")
+_CHUNK_SIZE = 1 << 16
+
+
+def content_hash(path: str | os.PathLike[str]) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class JobArtifacts:
+    """Handle to the artifact directory of a single job."""
+
+    def __init__(self, root: Path, job_id: str):
+        """Wrap the directory ``root / job_id``, creating it if needed."""
+        self.id = job_id
+        self.root = root / job_id
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._resolved_root = self.root.resolve()
+
+    def __repr__(self) -> str:
+        """Show the job id and directory."""
+        return f"JobArtifacts({self.id!r}, root={str(self.root)!r})"
+
+    def path(self, name: str) -> Path:
+        """Return the path of artifact ``name`` inside this job's directory."""
+        path = (self.root / name).resolve()
+        if self._resolved_root not in path.parents:
+            raise ValueError(f"Artifact name escapes the job directory: {name!r}")
+        return path
+
+    def exists(self, name: str) -> bool:
+        """Whether artifact ``name`` has been written."""
+        return self.path(name).exists()
+
+    def write_text(self, name: str, content: str) -> Path:
+        """Atomically write ``content`` to artifact ``name``."""
+        path = self.path(name)
+        _atomic_write(path, content.encode("utf-8"))
+        return path
+
+    def write_stream(self, name: str, stream: BinaryIO) -> Path:
+        """Atomically copy a binary stream into artifact ``name``."""
+        path = self.path(name)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(stream, f)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path
+
+    def read_text(self, name: str) -> str:
+        """Read artifact ``name``."""
+        return self.path(name).read_text(encoding="utf-8")
+
+
+class ArtifactStore:
+    """Root directory holding one `JobArtifacts` directory per job."""
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str] = DEFAULT_ARTIFACTS_DIR,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+    ):
+        """Create a store under ``root``.
+
+        Job directories older than ``max_age`` seconds are removed by
+        `cleanup`, as are the oldest ones beyond ``max_jobs``.
+        """
+        self.root = Path(root)
+        self.max_age = max_age
+        self.max_jobs = max_jobs
+
+    def create_job(self, job_id: Optional[str] = None) -> JobArtifacts:
+        """Create (or reopen) the artifact directory for ``job_id``."""
+        return JobArtifacts(self.root, job_id or uuid.uuid4().hex)
+
+    def job(self, job_id: str) -> Optional[JobArtifacts]:
+        """Return the artifacts of an existing job, or None."""
+        if Path(job_id).name != job_id or job_id in ("", ".", ".."):
+            return None
+        if not (self.root / job_id).is_dir():
+            return None
+        return JobArtifacts(self.root, job_id)
+
+    def remove(self, job_id: str) -> None:
+        """Delete a job's artifact directory."""
+        job = self.job(job_id)
+        if job is not None:
+            shutil.rmtree(job.root, ignore_errors=True)
+
+    def cleanup(self, now: Optional[float] = None, keep: Collection[str] = ()) -> List[str]:
+        """Apply the retention policy and return the removed job ids.
+
+        Directories of the job ids in ``keep``, e.g. jobs still running, are
+        never removed.
+        """
+        if not self.root.is_dir():
+            return []
+        now = time.time() if now is None else now
+        jobs = sorted(
+            (p for p in self.root.iterdir() if p.is_dir()),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        removed = []
+        for i, job_dir in enumerate(jobs):
+            if job_dir.name in keep:
+                continue
+            if i >= self.max_jobs or now - job_dir.stat().st_mtime > self.max_age:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed.append(job_dir.name)
+        return removed
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the store's size limit."""
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    """A validated task file in the `UploadStore`."""
+
+    digest: str
+    path: Path
+    size: int
+    duplicate: bool
+
+
+class UploadStore:
+    """Content-addressed store for uploaded task files."""
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str] = DEFAULT_UPLOADS_DIR,
+        max_bytes: int = DEFAULT_UPLOAD_MAX_BYTES,
+    ):
+        """Store uploads of at most ``max_bytes`` under ``root``."""
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def path(self, digest: str) -> Path:
+        """Return where the upload with SHA-256 ``digest`` is stored."""
+        return self.root / f"{digest}.yaml"
+
+    def ingest(self, stream: BinaryIO, filename: str) -> StoredUpload:
+        """Copy a task file from ``stream``, hashing it as it is written.
+
+        The copy stops as soon as it exceeds ``max_bytes``. A new file is
+        parsed as a task before it is kept; a file whose contents are already
+        stored was validated when it was first uploaded and is only reported
+        as a duplicate.
+
+        Raises:
+            UploadTooLargeError: If the upload is larger than ``max_bytes``.
+            TaskValidationError: If it is not a valid task YAML file.
+        """
+        if not filename.lower().endswith(UPLOAD_EXTENSIONS):
+            raise TaskValidationError(f"Task file must be YAML ({', '.join(UPLOAD_EXTENSIONS)}): {filename!r}")
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".upload.", suffix=".tmp")
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLargeError(f"Upload exceeds {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            path = self.path(digest.hexdigest())
+            if path.exists():
+                Path(tmp).unlink()
+                os.utime(path)
+                return StoredUpload(digest.hexdigest(), path, size, duplicate=True)
+            parse_task(Path(tmp).read_bytes(), source=filename)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return StoredUpload(digest.hexdigest(), path, size, duplicate=False)
@@ -0,0 +1,226 @@
+"""Generate UIs for a batch of task files from the command line.
+
+Usage::
+
+    react-agent-batch tasks/ extra/task.yaml --out batch-out --workers 4 --rpm openai=500
+
+Each task runs through `generate_fe` on a bounded thread pool, with one
+artifact directory per task under ``--out``. Progress is recorded in
+``manifest.json`` after every task, so an interrupted batch can be rerun
+with the same arguments: tasks that already succeeded (and whose file has
+not changed since) are skipped. A ``summary.json`` with per-task timings,
+token usage and failures is written at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from react_agent.artifacts import ArtifactStore
+from react_agent.generator import generate_fe
+from react_agent.rate_limit import configure_rate_limit
+from react_agent.yaml_extracter import TaskValidationError, load_task
+
+logger = logging.getLogger(__name__)
+
+TASK_SUFFIXES = (".yaml", ".yml")
+
+
+def collect_tasks(paths: Iterable[str | os.PathLike[str]]) -> List[Path]:
+    """Expand files and directories (searched recursively) into task files."""
+    found: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            found.extend(sorted(f for f in p.rglob("*") if f.suffix in TASK_SUFFIXES and f.is_file()))
+        elif p.is_file():
+            found.append(p)
+        else:
+            raise FileNotFoundError(f"No such task file or directory: {p}")
+    unique: Dict[Path, Path] = {}
+    for f in found:
+        unique.setdefault(f.resolve(), f)
+    return list(unique.values())
+
+
+def job_id_for(path: Path, content_hash: str) -> str:
+    """Derive a stable, filesystem-safe artifact directory name for a task."""
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "-", path.stem).strip("-") or "task"
+    return f"{stem}-{content_hash[:12]}"
+
+
+class Manifest:
+    """Per-task status of a batch, persisted to JSON after every update."""
+
+    def __init__(self, path: str | os.PathLike[str]):
+        """Load the manifest at ``path``, or start an empty one."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.tasks: Dict[str, Dict[str, Any]] = json.loads(self.path.read_text(encoding="utf-8"))["tasks"]
+        except (OSError, ValueError, KeyError):
+            self.tasks = {}
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Return a copy of the entry for ``key`` (empty if unknown)."""
+        with self._lock:
+            return dict(self.tasks.get(key, {}))
+
+    def update(self, key: str, **fields: Any) -> None:
+        """Merge ``fields`` into the entry for ``key`` and save."""
+        with self._lock:
+            self.tasks.setdefault(key, {}).update(fields)
+            data = json.dumps({"tasks": self.tasks}, indent=2, ensure_ascii=False)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+
+
+def _run_one(key: str, path: Path, manifest: Manifest, store: ArtifactStore, **options: Any) -> None:
+    try:
+        task = load_task(path)
+    except (OSError, TaskValidationError) as e:
+        manifest.update(key, status="failed", error=str(e))
+        return
+
+    job_id = job_id_for(path, task.content_hash)
+    manifest.update(key, status="running", content_hash=task.content_hash, job_id=job_id, error=None)
+    started = time.perf_counter()
+    try:
+        result = generate_fe(task, artifacts=store.create_job(job_id), **options)
+    except Exception as e:
+        manifest.update(key, status="failed", error=f"{type(e).__name__}: {e}",
+                        duration=time.perf_counter() - started)
+        return
+    manifest.update(
+        key,
+        status="succeeded",
+        duration=time.perf_counter() - started,
+        output=str(result.fixed_ui),
+        stages={name: round(t.duration, 3) for name, t in result.run.timings.items()},
+        usage=result.usage.totals(),
+    )
+
+
+def run_batch(
+    task_paths: Sequence[Path],
+    out_dir: str | os.PathLike[str],
+    workers: int = 2,
+    **options: Any,
+) -> Dict[str, Any]:
+    """Generate every task not already done and return the batch summary.
+
+    Extra keyword arguments (``use_cache``, ``num_samples``...) are passed to
+    `generate_fe`.
+    """
+    out = Path(out_dir)
+    manifest = Manifest(out / "manifest.json")
+    store = ArtifactStore(out / "jobs", max_age=float("inf"), max_jobs=1 << 30)
+    keys = [str(p.resolve()) for p in task_paths]
+
+    todo = []
+    for key, path in zip(keys, task_paths):
+        entry = manifest.get(key)
+        if entry.get("status") == "succeeded" and Path(entry.get("output", "")).is_file():
+            try:
+                unchanged = load_task(path).content_hash == entry.get("content_hash")
+            except (OSError, TaskValidationError):
+                unchanged = False
+            if unchanged:
+                logger.info("[skip] %s (already generated)", path)
+                continue
+        todo.append((key, path))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_run_one, key, path, manifest, store, **options) for key, path in todo]
+        for future in futures:
+            future.result()
+
+    summary = summarize(manifest, keys, ran=len(todo), wall_time=time.perf_counter() - started)
+    (out / "summary.json").write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+    return summary
+
+
+def summarize(manifest: Manifest, keys: Sequence[str], ran: int, wall_time: float) -> Dict[str, Any]:
+    """Aggregate the manifest entries of ``keys`` into a batch report."""
+    entries = {key: manifest.get(key) for key in keys}
+    succeeded = [e for e in entries.values() if e.get("status") == "succeeded"]
+    costs = [e["usage"]["cost"] for e in succeeded if e.get("usage", {}).get("cost") is not None]
+    return {
+        "tasks": len(keys),
+        "ran": ran,
+        "succeeded": len(succeeded),
+        "failed": {key: e.get("error") for key, e in entries.items() if e.get("status") != "succeeded"},
+        "wall_time": wall_time,
+        "total_tokens": sum(e.get("usage", {}).get("total_tokens", 0) for e in succeeded),
+        "cost": sum(costs) if costs else None,
+        "per_task": entries,
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render a batch summary as a short table."""
+    lines = [f"{'task':<40} {'status':<10} {'time':>8} {'tokens':>9}"]
+    for key, e in summary["per_task"].items():
+        tokens = e.get("usage", {}).get("total_tokens", "")
+        duration = f"{e['duration']:.1f}s" if "duration" in e else ""
+        lines.append(f"{Path(key).name[:40]:<40} {e.get('status', 'pending'):<10} {duration:>8} {tokens:>9}")
+    lines.append(
+        f"{summary['succeeded']}/{summary['tasks']} succeeded, {len(summary['failed'])} failed, "
+        f"{summary['total_tokens']} tokens, {summary['wall_time']:.1f}s"
+    )
+    for key, error in summary["failed"].items():
+        lines.append(f"  FAILED {key}: {error}")
+    return "\n".join(lines)
+
+
+def _parse_rate(value: str) -> tuple[str, float]:
+    provider, sep, rpm = value.partition("=")
+    try:
+        if not sep or not provider:
+            raise ValueError
+        return provider, float(rpm)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected PROVIDER=REQUESTS_PER_MINUTE, got {value!r}") from None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line entry point; returns 1 if any task failed."""
+    parser = argparse.ArgumentParser(description="Generate UIs for a batch of task YAML files.")
+    parser.add_argument("tasks", nargs="+", help="Task YAML files or directories containing them")
+    parser.add_argument("--out", default="batch-output", help="Output directory (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=2, help="Tasks generated concurrently (default: %(default)s)")
+    parser.add_argument("--rpm", type=_parse_rate, action="append", default=[], metavar="PROVIDER=N",
+                        help="Limit LLM requests per minute for a provider, e.g. openai=500 (repeatable)")
+    parser.add_argument("--num-samples", type=int, default=1, help="Sample inputs probed per task")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response, stage and skeleton caches")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(message)s")
+
+    for provider, rpm in args.rpm:
+        configure_rate_limit(provider, rpm)
+    tasks = collect_tasks(args.tasks)
+    if not tasks:
+        parser.error("no task files found")
+
+    summary = run_batch(tasks, args.out, workers=args.workers,
+                        use_cache=not args.no_cache, num_samples=args.num_samples)
+    sys.stdout.write(format_summary(summary) + "\n")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
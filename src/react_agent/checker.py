@@ -1,13 +1,19 @@
-from react_agent import graph
+from typing import Callable, Optional, Tuple
 
-def _llm(system_prompt: str, user_message: str) -> str:
-    res = graph.invoke(
-        {"messages": [("system", system_prompt), ("user", user_message)]},
-        {"configurable": {"system_prompt": system_prompt}},
-    )
-    return str(res["messages"][-1].content).strip()
+from react_agent.llm import ainvoke_llm, invoke_llm
+from react_agent.patching import PATCH_INSTRUCTIONS, apatch_or_regenerate, patch_or_regenerate
+from react_agent.static_check import StaticReport, static_check, strip_code_fence
+
+# LLM stages run by `detect_bug_n_fix`, for per-stage model selection.
+CHECKER_STAGES = ("checker_pre_risk", "checker_specific_bug", "checker_fix", "checker_fix_patch")
+
+def _llm(system_prompt: str, user_message: str, stage: str, use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None, validate: Optional[Callable[[str], bool]] = None) -> str:
+    return invoke_llm(system_prompt, user_message, stage=stage, use_cache=use_cache, on_token=on_token, validate=validate)
 
-def _detect_pre_risk(html_code: str) -> str:
+async def _allm(system_prompt: str, user_message: str, stage: str, use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None, validate: Optional[Callable[[str], bool]] = None) -> str:
+    return await ainvoke_llm(system_prompt, user_message, stage=stage, use_cache=use_cache, on_token=on_token, validate=validate)
+
+def _pre_risk_prompts(html_code: str) -> Tuple[str, str]:
     # system_prompt = "You are a senior front-end developer and code reviewer. "\
     #         "You analyze HTML files that include inline JavaScript and CSS. "\
     #         "Your task is to identify potential issues, especially in the JavaScript part, "\
@@ -38,10 +44,20 @@ def _detect_pre_risk(html_code: str) -> str:
         "```html"\
         f"{html_code}"
     
-    return _llm(system_prompt, user_message)
+    return system_prompt, user_message
+
+def _valid_pre_risk(text: str) -> bool:
+    # A small model sometimes answers with nothing, or with a code dump.
+    return bool(text) and "<html" not in text.lower()
+
+def _detect_pre_risk(html_code: str, use_cache: bool = True) -> str:
+    return _llm(*_pre_risk_prompts(html_code), "checker_pre_risk", use_cache, validate=_valid_pre_risk)
 
+async def _adetect_pre_risk(html_code: str, use_cache: bool = True) -> str:
+    return await _allm(*_pre_risk_prompts(html_code), "checker_pre_risk", use_cache, validate=_valid_pre_risk)
 
-def _detect_specific_bug(html_code: str, pre_risk: str, project_description: str, model_information: str, input_example:str, output_example: str) -> str:
+
+def _specific_bug_prompts(html_code: str, pre_risk: str, project_description: str, model_information: str, input_example:str, output_example: str) -> Tuple[str, str]:
     system_prompt = "You are a senior front-end engineer and code reviewer. Your job is to analyze an HTML file "\
         "that includes inline JavaScript and CSS, focusing especially on the JavaScript logic. "\
         "You are provided with a list of potential issues. Your task is to confirm whether each issue is real, "\
@@ -72,9 +88,17 @@ def _detect_specific_bug(html_code: str, pre_risk: str, project_description: str
         "### Full Code:\n"\
         f"```html\n{html_code}\n```"
     
-    return _llm(system_prompt, user_message)
+    return system_prompt, user_message
+
+def _detect_specific_bug(html_code: str, pre_risk: str, project_description: str, model_information: str, input_example:str, output_example: str, use_cache: bool = True) -> str:
+    prompts = _specific_bug_prompts(html_code, pre_risk, project_description, model_information, input_example, output_example)
+    return _llm(*prompts, "checker_specific_bug", use_cache)
+
+async def _adetect_specific_bug(html_code: str, pre_risk: str, project_description: str, model_information: str, input_example:str, output_example: str, use_cache: bool = True) -> str:
+    prompts = _specific_bug_prompts(html_code, pre_risk, project_description, model_information, input_example, output_example)
+    return await _allm(*prompts, "checker_specific_bug", use_cache)
 
-def _fix_code(html_code: str, specific_bug: str, project_description: str) -> str:
+def _fix_prompts(html_code: str, specific_bug: str, project_description: str) -> Tuple[str, str, str]:
     system_prompt = "You are a senior developer who specializes in debugging and refactoring front-end code. "\
         "You will be given an HTML file (with inline JavaScript and CSS), and a list of confirmed issues in it. "\
         "Your task is to fix the code based on these issues, without changing parts of the code that are correct. "\
@@ -87,30 +111,86 @@ def _fix_code(html_code: str, specific_bug: str, project_description: str) -> st
         "### Original Code:\n"\
         f"```html\n{html_code}\n```\n\n"\
         "Please return the corrected full HTML code below:"
-    
-    return _llm(system_prompt, user_message)
 
-# Use this function only
-def detect_bug_n_fix(html_code: str, project_description: str, model_information: str, input_example:str, output_example: str) -> str:
-    pre_risk = _detect_pre_risk(html_code)
-    specific_bug = _detect_specific_bug(html_code, pre_risk, project_description, model_information, input_example, output_example)
-    fixed_code = _fix_code(html_code, specific_bug, project_description)
+    # Fixes usually touch a few lines; a diff avoids re-emitting the page.
+    patch_message = user_message.replace("Please return the corrected full HTML code below:", PATCH_INSTRUCTIONS)
+    return system_prompt, user_message, patch_message
+
+def _fix_code(html_code: str, specific_bug: str, project_description: str, use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None, patch_mode: bool = True) -> str:
+    system_prompt, user_message, patch_message = _fix_prompts(html_code, specific_bug, project_description)
+    if not patch_mode:
+        return _llm(system_prompt, user_message, "checker_fix", use_cache, on_token)
+    return patch_or_regenerate(
+        html_code,
+        (system_prompt, patch_message),
+        (system_prompt, user_message),
+        stage="checker_fix",
+        use_cache=use_cache,
+        on_token=on_token,
+    )
+
+async def _afix_code(html_code: str, specific_bug: str, project_description: str, use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None, patch_mode: bool = True) -> str:
+    system_prompt, user_message, patch_message = _fix_prompts(html_code, specific_bug, project_description)
+    if not patch_mode:
+        return await _allm(system_prompt, user_message, "checker_fix", use_cache, on_token)
+    return await apatch_or_regenerate(
+        html_code,
+        (system_prompt, patch_message),
+        (system_prompt, user_message),
+        stage="checker_fix",
+        use_cache=use_cache,
+        on_token=on_token,
+    )
+
+def _static_report(html_code: str, model_information: str) -> StaticReport:
+    api_url = model_information.get("api_url") if isinstance(model_information, dict) else None
+    return static_check(html_code, api_url)
+
+def _with_static_findings(report: StaticReport, pre_risk: str) -> str:
+    # Static findings are certain, so the bug-detection stage gets them first;
+    # the LLM's risk list still covers what static checks cannot see.
+    return f"Confirmed by static analysis:\n{report.format()}\n\nPossible risks:\n{pre_risk}"
+
+def _strip_html_fence(fixed_code: str) -> str:
     if fixed_code.startswith("```html"):
         fixed_code = fixed_code.strip("```html").strip("```").strip()
-    
     return fixed_code
 
+# Use this function only
+def detect_bug_n_fix(html_code: str, project_description: str, model_information: str, input_example:str, output_example: str, use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None, static_precheck: bool = True, patch_mode: bool = True) -> str:
+    report = _static_report(html_code, model_information) if static_precheck else None
+    if report is not None and report.clean:
+        # Nothing for the LLM stages to confirm or fix
+        return strip_code_fence(html_code)
+    pre_risk = _detect_pre_risk(html_code, use_cache)
+    if report is not None:
+        pre_risk = _with_static_findings(report, pre_risk)
+    specific_bug = _detect_specific_bug(html_code, pre_risk, project_description, model_information, input_example, output_example, use_cache)
+    fixed_code = _fix_code(html_code, specific_bug, project_description, use_cache, on_token, patch_mode)
+    return _strip_html_fence(fixed_code)
+
+
+async def adetect_bug_n_fix(html_code: str, project_description: str, model_information: str, input_example:str, output_example: str, use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None, static_precheck: bool = True, patch_mode: bool = True) -> str:
+    """Async counterpart of `detect_bug_n_fix`."""
+    report = _static_report(html_code, model_information) if static_precheck else None
+    if report is not None and report.clean:
+        return strip_code_fence(html_code)
+    pre_risk = await _adetect_pre_risk(html_code, use_cache)
+    if report is not None:
+        pre_risk = _with_static_findings(report, pre_risk)
+    specific_bug = await _adetect_specific_bug(html_code, pre_risk, project_description, model_information, input_example, output_example, use_cache)
+    fixed_code = await _afix_code(html_code, specific_bug, project_description, use_cache, on_token, patch_mode)
+    return _strip_html_fence(fixed_code)
+
 
 if __name__ == "__main__":
-    from yaml_extracter import extract_description, extract_model_info
-    yaml_path = "./_test_extracter/task.yaml"
+    from react_agent.yaml_extracter import load_task
+    task = load_task("./_test_extracter/task.yaml")
     with open("./_test_checker/test_html.html", "r", encoding="utf-8") as f:
         code = f.read()
         print(code)
-        project_description = extract_description(yaml_path)
-        model_information = extract_model_info(yaml_path)
-        output_example = "unknown"
-        fixed_code = detect_bug_n_fix(code, project_description, model_information, output_example)
+        input_example = output_example = "unknown"
+        fixed_code = detect_bug_n_fix(code, task.description, task.model_information, input_example, output_example)
         print(fixed_code)
         with open("./_test_checker/fixed_test_html.html", "w", encoding="utf-8") as f:
             f.write(fixed_code)
@@ -2,14 +2,26 @@
 
 from __future__ import annotations
 
+import json
+import os
 from dataclasses import dataclass, field, fields
 from typing import Annotated
 
-from langchain_core.runnables import ensure_config
-from langgraph.config import get_config
-
 from react_agent import prompts
 
+# Short, structured stages that a small model handles as well as a large one.
+TIERED_STAGES = ("sample_input", "sample_input_batch", "checker_pre_risk")
+# The small model used for TIERED_STAGES, per provider of the configured model.
+SMALL_MODELS = {
+    "openai": "openai/gpt-4.1-mini",
+    "anthropic": "anthropic/claude-3-5-haiku-latest",
+}
+
+
+def _default_stage_models() -> dict[str, str]:
+    """Stage models from the LLM_STAGE_MODELS JSON object."""
+    return json.loads(os.getenv("LLM_STAGE_MODELS") or "{}")
+
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -31,6 +43,17 @@ class Configuration:
         },
     )
 
+    stage_models: dict[str, str] = field(
+        default_factory=_default_stage_models,
+        metadata={
+            "description": "Per-stage model overrides, mapping a pipeline stage name (e.g. sample_input, "
+            "checker_pre_risk, html) to a provider/model-name. Short structured stages not listed use "
+            "the small model of `model`'s provider; other stages, and stages mapped to an empty "
+            "string, use `model`, which is also the model a stage escalates to when the smaller "
+            "model fails or its output fails validation."
+        },
+    )
+
     max_search_results: int = field(
         default=10,
         metadata={
@@ -38,9 +61,42 @@ class Configuration:
         },
     )
 
+    requests_per_minute: int = field(
+        default=0,
+        metadata={
+            "description": "Client-side limit on requests per minute to the model (0 for no limit). "
+            "Shared by every concurrent run using the same model."
+        },
+    )
+
+    tokens_per_minute: int = field(
+        default=0,
+        metadata={
+            "description": "Client-side limit on tokens per minute to the model (0 for no limit)."
+        },
+    )
+
+    max_concurrent_requests: int = field(
+        default=0,
+        metadata={
+            "description": "Maximum number of requests to the model in flight at once (0 for no limit)."
+        },
+    )
+
+    def model_for(self, stage: str) -> str:
+        """Return the model to use for a pipeline stage."""
+        if stage in self.stage_models:
+            return self.stage_models[stage] or self.model
+        if stage in TIERED_STAGES:
+            return SMALL_MODELS.get(self.model.split("/", 1)[0], self.model)
+        return self.model
+
     @classmethod
     def from_context(cls) -> Configuration:
         """Create a Configuration instance from a RunnableConfig object."""
+        from langchain_core.runnables import ensure_config
+        from langgraph.config import get_config
+
         try:
             config = get_config()
         except RuntimeError:
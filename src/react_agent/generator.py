@@ -1,17 +1,29 @@
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from src.react_agent import graph
-
-import pytest
-import asyncio
-from langsmith import unit
-from react_agent import graph
-from checker import detect_bug_n_fix
+import hashlib
+import importlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
 import yaml
-from src.react_agent.utils import get_model_output
-import requests
-from yaml_extracter import *
+
+from react_agent.artifacts import ArtifactStore, JobArtifacts
+from react_agent.checker import CHECKER_STAGES, adetect_bug_n_fix, detect_bug_n_fix
+from react_agent.configuration import Configuration
+from react_agent.graph_token_count import UsageTracker, track_usage
+from react_agent.llm import ainvoke_llm, invoke_llm
+from react_agent.llm_cache import ResponseCache, cache_enabled, get_stage_cache
+from react_agent.patching import PATCH_INSTRUCTIONS, apatch_or_regenerate, patch_or_regenerate
+from react_agent.pipeline import PipelineRun, Stage, arun_stages, run_stages
+from react_agent.skeletons import SkeletonStore, get_skeleton_store, skeletons_enabled
+from react_agent.static_check import strip_code_fence
+from react_agent.utils import ERROR_EXAMPLE, aget_model_output, get_model_output
+from react_agent.yaml_extracter import Task, load_task
+
+logger = logging.getLogger(__name__)
+
 
 def specification_agent(task: str):
     system_prompt = """
@@ -62,28 +74,41 @@ Describe the interactive behaviors, including:
     - Pagination or scroll areas for long batch outputs
 
 Use abstract description only—no code should be included. Your specification must adapt to the task’s data type, interaction complexity, and visualization needs.
+
+Return ONLY a JSON object, with no surrounding text, that has exactly these three string fields:
+
+- "HTML_SPEC": Clearly describe the full interface structure, broken into logical sections that match the nature of the task. Each section must include inputs, outputs, layout intentions, and their role.
+- "CSS_SPEC": Describe the visual design choices for the layout, spacing, contrast, responsiveness, and theme consistency.
+- "JS_SPEC": Describe the functional logic that connects user input with backend inference and updates the display dynamically. Include batch handling, parsing, validation, and visualization logic if needed.
+
+Markdown is allowed inside the field values.
 """
 
     user_prompt = f'''
 Below is a `task.yaml` file that defines the task. Please analyze it and generate the UI specification as instructed.
 {task}
+'''
+    return system_prompt, user_prompt
 
-Your response must contain three sections:
 
-### HTML_SPEC
-Clearly describe the full interface structure, broken into logical sections that match the nature of the task. Each section must include inputs, outputs, layout intentions, and their role.
 
-### CSS_SPEC
-Describe the visual design choices for the layout, spacing, contrast, responsiveness, and theme consistency.
+def specification_repair_agent(task: str, sections: Dict[str, str], missing: List[str]) -> tuple[str, str]:
+    # Same system prompt as the specification stage, so its cached prefix is reused
+    system_prompt, _ = specification_agent(task)
+    written = json.dumps(sections, ensure_ascii=False, indent=2)
+    user_prompt = f'''
+Below is a `task.yaml` file that defines the task.
+{task}
 
-### JS_SPEC
-Describe the functional logic that connects user input with backend inference and updates the display dynamically. Include batch handling, parsing, validation, and visualization logic if needed.
+Part of its UI specification has already been written:
+{written}
+
+Write ONLY the missing section(s): {", ".join(missing)}. Keep them consistent with the sections above.
+Return ONLY a JSON object whose fields are the missing section names.
 '''
     return system_prompt, user_prompt
 
 
-
-
 def design_agent(html_spec: str, css_spec: str, js_spec: str) -> tuple[str, str]:
     system_prompt = """
 You are a Senior UI/UX Architect.
@@ -153,7 +178,7 @@ Using both the HTML_SPEC and DESIGN, generate a full and well-structured HTML5 f
 
 
 def js_injector_agent(html_code: str, js_spec: str, api_url: str, input_example: str, output_example: str) -> str:
-    system_prompt = f"""
+    system_prompt = """
 You are a senior frontend developer. Enhance the provided HTML file by adding JavaScript functionality as described in the JS_SPEC.
 
 Requirements:
@@ -165,29 +190,29 @@ Requirements:
 - Do not alter the existing HTML structure unless absolutely necessary.
 - Ensure all user interactions are smooth, with proper error handling and UI updates.
 
-To handel Machine Learning task please abide by the following format:
+To handel Machine Learning task please abide by the API endpoint and the input/output formats given with the HTML file.
+Output of ML task always is the label with highest probability.
+
+Return the full updated HTML file with the JavaScript embedded.
+"""
+    user_prompt = f"""
 API endpoint: {api_url}
 Example of API input format:
 {input_example}
 Example of API output format:
 {output_example}
 
-Return the full updated HTML file with the JavaScript embedded.
-"""
-    user_prompt = f"""
 Here is the HTML file:
 {html_code}
 
 And here is the JS_SPEC describing the logic to be implemented:
 {js_spec}
 
-Output of ML task always is the label with highest probability.
-
 Please return the complete HTML with JavaScript inserted at the end.
 """
     return system_prompt, user_prompt
 
-def tailwind_styler_agent(html_code: str, css_spec: str, design: str) -> tuple[str, str]:
+def tailwind_styler_agent(html_code: str, css_spec: str, design: str, patch_mode: bool = False) -> tuple[str, str]:
     system_prompt = """
 You are a UI/UX expert and Tailwind CSS specialist.
 
@@ -220,6 +245,15 @@ Your responsibilities:
 - Do not mix multiple unrelated color families (e.g., don’t combine blue with red or green).
 - Ensure text remains readable on colored backgrounds using proper contrast (e.g., `text-white` on `bg-blue-600`).
 
+**Important**: Some containers or cards in the interface (such as the input box, result section, or history panel) may shrink too much if the content is small. Prevent this behavior by using appropriate Tailwind classes to maintain a consistent and readable layout. Use `min-width`, `min-height`, or `flex-grow` utilities to avoid awkward collapsing.
+**Important**: If any output section (like batch results) can grow too long due to user interaction or data size, suggest UX strategies such as scrollable containers with fixed max height or pagination mechanisms to ensure layout remains manageable, consistency and user-friendly.
+
+Make sure the final HTML file includes:
+- Tailwind classes added into each relevant `class=""` attribute
+- Visual hierarchy, spacing, layout, and interaction states per CSS_SPEC
+- The Tailwind CDN link added inside the <head> section
+- Strictly no external or internal <style> blocks
+
 Return the full updated HTML file with Tailwind classes applied directly to elements.
 """
 
@@ -235,37 +269,103 @@ And here is the high-level DESIGN document that explains the layout structure an
 {design}
 
 Please use both the CSS_SPEC and DESIGN document to apply appropriate Tailwind classes for layout, appearance, and responsiveness.
-
-**Important**: Some containers or cards in the interface (such as the input box, result section, or history panel) may shrink too much if the content is small. Prevent this behavior by using appropriate Tailwind classes to maintain a consistent and readable layout. Use `min-width`, `min-height`, or `flex-grow` utilities to avoid awkward collapsing.
-**Important**: If any output section (like batch results) can grow too long due to user interaction or data size, suggest UX strategies such as scrollable containers with fixed max height or pagination mechanisms to ensure layout remains manageable, consistency and user-friendly.
-
-Make sure the final HTML file includes:
-- Tailwind classes added into each relevant `class=""` attribute
-- Visual hierarchy, spacing, layout, and interaction states per CSS_SPEC
-- The Tailwind CDN link added inside the <head> section
-- Strictly no external or internal <style> blocks
 """
+    if patch_mode:
+        system_prompt = system_prompt.replace(
+            "Return the full updated HTML file with Tailwind classes applied directly to elements.",
+            PATCH_INSTRUCTIONS,
+        )
     return system_prompt, user_prompt
 
 
 
+SPEC_SECTIONS = ("HTML_SPEC", "CSS_SPEC", "JS_SPEC")
+
+
+def _json_object(output: str) -> Optional[Dict[str, Any]]:
+    text = strip_code_fence(output)
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def parse_specs(output: str) -> Dict[str, str]:
+    """Return the non-empty specification sections found in ``output``.
+
+    The specification stage answers with a JSON object; free-form answers
+    that only label their sections with the section names are still read.
+    """
+    data = _json_object(output)
+    if data is not None:
+        return {name: str(data[name]).strip() for name in SPEC_SECTIONS if str(data.get(name) or "").strip()}
+
+    starts = sorted((output.find(name), name) for name in SPEC_SECTIONS if name in output)
+    sections = {}
+    for (start, name), (end, _) in zip(starts, starts[1:] + [(len(output), "")]):
+        # Drop the heading prefix ("### 2.") left before the next section name
+        text = re.sub(r"\n[#*\d. ]*$", "", output[start + len(name):end]).strip("-#*:\", \n")
+        if text:
+            sections[name] = text
+    return sections
+
+
+def _spec_tuple(sections: Dict[str, str]) -> Tuple[str, str, str]:
+    missing = [name for name in SPEC_SECTIONS if name not in sections]
+    if missing:
+        raise ValueError(f"Specification is missing {', '.join(missing)}")
+    return sections["HTML_SPEC"], sections["CSS_SPEC"], sections["JS_SPEC"]
+
+
 def extract_specs(output):
-    html_marker = "HTML_SPEC"
-    css_marker = "CSS_SPEC"
-    js_marker = "JS_SPEC"
+    return _spec_tuple(parse_specs(output))
+
+
+def _repair_request(task: str, output: str) -> Tuple[Dict[str, str], Optional[Tuple[str, str]]]:
+    """Split ``output`` into its sections and the prompts for the missing ones."""
+    sections = parse_specs(output)
+    missing = [name for name in SPEC_SECTIONS if name not in sections]
+    if not missing:
+        return sections, None
+    logger.info("[specification] missing %s; requesting only those sections", ", ".join(missing))
+    return sections, specification_repair_agent(task, sections, missing)
+
+
+def _merge_repair(sections: Dict[str, str], repair: str) -> Tuple[str, str, str]:
+    for name, text in parse_specs(repair).items():
+        sections.setdefault(name, text)
+    return _spec_tuple(sections)
+
+
+def complete_specs(task: str, output: str, use_cache: bool = True) -> Tuple[str, str, str]:
+    """Return the three sections of a specification answer.
+
+    Sections missing from ``output`` are requested in one targeted call
+    instead of rerunning the whole specification stage.
 
-    html_start = output.find(html_marker)
-    css_start = output.find(css_marker)
-    js_start = output.find(js_marker)
+    Raises:
+        ValueError: If a section is still missing after the repair call.
+    """
+    sections, repair_prompts = _repair_request(task, output)
+    if repair_prompts is None:
+        return _spec_tuple(sections)
+    return _merge_repair(sections, invoke_llm(*repair_prompts, stage="specification_repair", use_cache=use_cache))
 
-    if html_start == -1 or css_start == -1 or js_start == -1:
-        raise ValueError("Không tìm thấy đủ 3 section trong output")
 
-    html_spec = output[html_start + len(html_marker):css_start].strip("- \n:")
-    css_spec = output[css_start + len(css_marker):js_start].strip("- \n:")
-    js_spec = output[js_start + len(js_marker):].strip("- \n:")
+async def acomplete_specs(task: str, output: str, use_cache: bool = True) -> Tuple[str, str, str]:
+    """Async counterpart of `complete_specs`."""
+    sections, repair_prompts = _repair_request(task, output)
+    if repair_prompts is None:
+        return _spec_tuple(sections)
+    return _merge_repair(sections, await ainvoke_llm(*repair_prompts, stage="specification_repair", use_cache=use_cache))
 
-    return html_spec.strip(), css_spec.strip(), js_spec.strip()
+def _is_page(output: str) -> bool:
+    # Output of the page-producing stages must at least be an HTML document.
+    return "<html" in output.lower() or "<body" in output.lower()
 
 def extract_project_info_from_task_info(task_info: str):
     data = yaml.safe_load(task_info)
@@ -285,63 +385,333 @@ def extract_project_info_from_task_info(task_info: str):
         api_output_example = str(output_format)
     return project_description, api_input_format, api_output_example
 
-def generate_fe(task_path:str) -> None:
-    with open(task_path, 'r', encoding='utf-8') as f:
-        task_info = yaml.safe_load(f)
-    
-    system_prompt, user_prompt = specification_agent(str(task_info))
-    res = graph.invoke(
-        {"messages": [("system", system_prompt), ("user", user_prompt)]},
-        {"configurable": {"system_prompt": system_prompt}},
-    )
-    
-    html_spec, css_spec, js_spec = extract_specs(str(res["messages"][-1].content).strip())
-    
-    system_prompt, user_prompt = design_agent(html_spec, css_spec, js_spec)
-    design_res = graph.invoke(
-        {"messages": [("system", system_prompt), ("user", user_prompt)]},
-        {"configurable": {"system_prompt": system_prompt}},
-    )
-    design = str(design_res["messages"][-1].content).strip()
-
-    html_system, html_user = html_generator_agent(html_spec, design)
-    html_res = graph.invoke(
-        {"messages": [("system", html_system), ("user", html_user)]},
-        {"configurable": {"system_prompt": html_system}},
-    )
-    html_code = str(html_res["messages"][-1].content).strip()
-
-    api_url = task_info.get("model_information", {}).get("api_url", "")
-    input_example, output_example = get_model_output(task_path)
-    
-    js_system, js_user = js_injector_agent(html_code, js_spec, api_url, input_example, output_example)
-    js_res = graph.invoke(
-        {"messages": [("system", js_system), ("user", js_user)]},
-        {"configurable": {"system_prompt": js_system}},
-    )
-    html_with_js = str(js_res["messages"][-1].content).strip()
 
-
-    css_system, css_user = tailwind_styler_agent(html_with_js, css_spec, design)
-    css_res = graph.invoke(
-        {"messages": [("system", css_system), ("user", css_user)]},
-        {"configurable": {"system_prompt": css_system}},
+# The specification describes the UI, not how it is wired to the endpoint, so
+# it is written without the API URL and survives edits to it.
+SPEC_EXCLUDED_FIELDS = ("model_information.api_url",)
+
+# Modules whose source shapes the stages' prompts, calls and stored results
+VERSIONED_MODULES = (
+    __name__,
+    "react_agent.checker",
+    "react_agent.llm",
+    "react_agent.patching",
+    "react_agent.pipeline",
+    "react_agent.prompts",
+    "react_agent.skeletons",
+    "react_agent.static_check",
+    "react_agent.utils",
+)
+
+_code_version: Optional[str] = None
+
+
+def code_version() -> str:
+    """Hash the source of the modules that write the stages' prompts and results.
+
+    It is part of every stage fingerprint, so editing a prompt or the code
+    around it invalidates the stage cache instead of serving stale outputs.
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for name in VERSIONED_MODULES:
+            digest.update(Path(importlib.import_module(name).__file__).read_bytes())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+@dataclass
+class GenerationResult:
+    """Handles to the outputs of one `generate_fe` run."""
+
+    artifacts: JobArtifacts
+    generated_ui: Path
+    fixed_ui: Path
+    run: PipelineRun
+    usage: UsageTracker
+
+
+@dataclass
+class _Plan:
+    """Stages of one generation, shared by `generate_fe` and `agenerate_fe`."""
+
+    task: Task
+    artifacts: JobArtifacts
+    stages: List[Stage]
+    cache: Optional[ResponseCache]
+    skeletons: Optional[SkeletonStore]
+    reused_skeleton: bool
+
+    def finish(self, run: PipelineRun, usage: UsageTracker) -> GenerationResult:
+        """Store the skeleton and write the job's output artifacts."""
+        artifacts = self.artifacts
+        if not self.reused_skeleton and self.skeletons is not None:
+            self.skeletons.put(self.task, run.results["specification"], run.results["design"], run.results["html"])
+
+        artifacts.write_text("generated_ui.html", run.results["tailwind_styling"].replace("```html", "").replace("```", ""))
+        fixed_ui = artifacts.write_text("fixed_generated_ui.html", run.results["checker"])
+        artifacts.write_text("timings.txt", run.format_timings())
+        artifacts.write_text("usage.json", json.dumps(usage.to_dict(), indent=2))
+        usage.log(job_id=artifacts.id, task=self.task.source, duration=run.total)
+
+        return GenerationResult(
+            artifacts=artifacts,
+            generated_ui=artifacts.path("generated_ui.html"),
+            fixed_ui=fixed_ui,
+            run=run,
+            usage=usage,
+        )
+
+
+def _plan(
+    task_path: Union[str, Task],
+    use_cache: bool,
+    artifacts: Optional[JobArtifacts],
+    on_event: Optional[Callable[[Dict[str, Any]], None]],
+    num_samples: int,
+    patch_mode: bool,
+    skeletons: Optional[SkeletonStore],
+) -> _Plan:
+    if artifacts is None:
+        artifacts = ArtifactStore().create_job()
+
+    task = load_task(task_path)
+    api_url = task.api_url
+
+    def tokens(stage: str) -> Optional[Callable[[str], None]]:
+        if on_event is None:
+            return None
+        return lambda text: on_event({"type": "token", "stage": stage, "text": text})
+
+    match = None
+    if skeletons_enabled():
+        skeletons = skeletons or get_skeleton_store()
+        # A stored skeleton is a cache too, so bypassing caches skips it
+        if use_cache and cache_enabled():
+            match = skeletons.lookup(task)
+    if match is not None:
+        skeleton, score = match
+        reuse_specs = skeleton.matches_description(task)
+        logger.info("Reusing skeleton from %s (similarity %.2f, %s specification)", skeleton.source or skeleton.key,
+                    score, "stored" if reuse_specs else "new")
+        if on_event is not None:
+            on_event({"type": "skeleton", "source": skeleton.source, "similarity": score,
+                      "specification": "stored" if reuse_specs else "new"})
+
+    config = Configuration()
+
+    def models(*stage_names: str) -> List[str]:
+        # Every model a stage may call, including the one it escalates to
+        return sorted({config.model, *map(config.model_for, stage_names)})
+
+    sample_stage = "sample_input" if num_samples <= 1 else "sample_input_batch"
+    version = code_version()
+    inputs = {
+        "specification": {"models": models("specification", "specification_repair"), "task": task.without(*SPEC_EXCLUDED_FIELDS)},
+        "sample_io": {"models": models(sample_stage), "model_information": task.model_information,
+                      "num_samples": num_samples},
+        "design": {"models": models("design")},
+        "html": {"models": models("html")},
+        "js_injection": {"models": models("js_injection"), "api_url": api_url},
+        "tailwind_styling": {"models": models("tailwind_styling", "tailwind_styling_patch"),
+                             "patch_mode": patch_mode},
+        "checker": {"models": models(*CHECKER_STAGES), "description": task.description,
+                    "model_information": task.model_information, "patch_mode": patch_mode},
+    }
+    for stage_inputs in inputs.values():
+        stage_inputs["code"] = version
+
+    def llm_stage(name: str, deps: Tuple[str, ...], prompts: Callable[..., Tuple[str, str]],
+                  post: Callable[[str], Any] = lambda text: text,
+                  validate: Optional[Callable[[str], bool]] = None) -> Stage:
+        # A stage that sends prompts(*dependency results) to the model
+        def fn(*args):
+            return post(invoke_llm(*prompts(*args), stage=name, use_cache=use_cache, on_token=tokens(name),
+                                   validate=validate))
+
+        async def afn(*args):
+            return post(await ainvoke_llm(*prompts(*args), stage=name, use_cache=use_cache, on_token=tokens(name),
+                                          validate=validate))
+
+        return Stage(name, fn, deps, inputs=inputs[name], afn=afn)
+
+    def stored_stage(name: str, deps: Tuple[str, ...], value: Any, skeleton: str) -> Stage:
+        # Fingerprinted by the skeleton rather than the task: its outputs must
+        # not be served for this task once skeleton reuse is turned off.
+        async def afn(*args):
+            return value
+
+        return Stage(name, lambda *args: value, deps, inputs={"skeleton": skeleton, "code": version}, afn=afn)
+
+    spec_task = task.to_yaml(exclude=SPEC_EXCLUDED_FIELDS)
+
+    def specification():
+        output = invoke_llm(*specification_agent(spec_task), stage="specification", use_cache=use_cache,
+                            on_token=tokens("specification"))
+        return complete_specs(spec_task, output, use_cache=use_cache)
+
+    async def aspecification():
+        output = await ainvoke_llm(*specification_agent(spec_task), stage="specification", use_cache=use_cache,
+                                   on_token=tokens("specification"))
+        return await acomplete_specs(spec_task, output, use_cache=use_cache)
+
+    fresh_specification = Stage("specification", specification, inputs=inputs["specification"], afn=aspecification)
+    if match is not None:
+        skeleton = match[0]
+        skeleton_hash = hashlib.sha256(
+            json.dumps([skeleton.specs, skeleton.design, skeleton.html], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        # A task described differently still gets its own specification,
+        # laid out with the stored design and HTML.
+        early = [
+            stored_stage("specification", (), skeleton.specs, skeleton_hash) if reuse_specs else fresh_specification,
+            stored_stage("design", ("specification",), skeleton.design, skeleton_hash),
+            stored_stage("html", ("specification", "design"), skeleton.html, skeleton_hash),
+        ]
+    else:
+        early = [
+            fresh_specification,
+            llm_stage("design", ("specification",), lambda specs: design_agent(*specs)),
+            llm_stage("html", ("specification", "design"), lambda specs, design: html_generator_agent(specs[0], design),
+                      validate=_is_page),
+        ]
+
+    def sample_io():
+        return get_model_output(task, use_cache=use_cache, num_samples=num_samples)
+
+    async def asample_io():
+        return await aget_model_output(task, use_cache=use_cache, num_samples=num_samples)
+
+    def js_prompts(specs, html_code, sample):
+        input_example, output_example = sample
+        return js_injector_agent(html_code, specs[2], api_url, input_example, output_example)
+
+    def styling_args(specs, design, html_with_js):
+        full = tailwind_styler_agent(html_with_js, specs[1], design)
+        patch = tailwind_styler_agent(html_with_js, specs[1], design, patch_mode=True)
+        return (html_with_js, patch, full), {"stage": "tailwind_styling", "use_cache": use_cache,
+                                             "on_token": tokens("tailwind_styling")}
+
+    def checker_args(final_html, sample):
+        input_example, output_example = sample
+        return (final_html, task.description, task.model_information, input_example, output_example), {
+            "use_cache": use_cache, "on_token": tokens("checker"), "patch_mode": patch_mode}
+
+    if patch_mode:
+        def tailwind_styling(*deps):
+            args, kwargs = styling_args(*deps)
+            return patch_or_regenerate(*args, **kwargs)
+
+        async def atailwind_styling(*deps):
+            args, kwargs = styling_args(*deps)
+            return await apatch_or_regenerate(*args, **kwargs)
+
+        styling = Stage("tailwind_styling", tailwind_styling, ("specification", "design", "js_injection"),
+                        inputs=inputs["tailwind_styling"], afn=atailwind_styling)
+    else:
+        styling = llm_stage("tailwind_styling", ("specification", "design", "js_injection"),
+                            lambda specs, design, html_with_js: tailwind_styler_agent(html_with_js, specs[1], design),
+                            validate=_is_page)
+
+    def checker(*deps):
+        args, kwargs = checker_args(*deps)
+        return detect_bug_n_fix(*args, **kwargs)
+
+    async def achecker(*deps):
+        args, kwargs = checker_args(*deps)
+        return await adetect_bug_n_fix(*args, **kwargs)
+
+    stages = [
+        *early,
+        # A failed probe must be retried once the API is back, not reused
+        Stage("sample_io", sample_io, inputs=inputs["sample_io"], afn=asample_io,
+              cacheable=lambda sample: tuple(sample) != ERROR_EXAMPLE),
+        llm_stage("js_injection", ("specification", "html", "sample_io"), js_prompts, validate=_is_page),
+        styling,
+        Stage("checker", checker, ("tailwind_styling", "sample_io"), inputs=inputs["checker"], afn=achecker),
+    ]
+    return _Plan(
+        task=task,
+        artifacts=artifacts,
+        stages=stages,
+        cache=get_stage_cache() if use_cache and cache_enabled() else None,
+        skeletons=skeletons if skeletons_enabled() else None,
+        reused_skeleton=match is not None,
     )
-    final_html = str(css_res["messages"][-1].content).strip()
-
 
-    with open("tests/integration_tests/generated_ui.html", "w", encoding="utf-8") as f:
-        f.write(final_html.replace("```html", "").replace("```", ""))
-    print("Saved to file tests/integration_tests/generated_ui.html")
 
-    project_description = extract_description(task_path)
-    model_information = extract_model_info(task_path)
-    
-    fixed_code = detect_bug_n_fix(final_html, project_description, model_information, input_example, output_example)
-    
-    with open("tests/integration_tests/fixed_generated_ui.html", "w", encoding="utf-8") as f:
-        f.write(fixed_code)
-        print("Saved to file tests/integration_tests/fixed_generated_ui.html")
+def generate_fe(
+    task_path: Union[str, Task],
+    use_cache: bool = True,
+    artifacts: Optional[JobArtifacts] = None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    num_samples: int = 1,
+    patch_mode: bool = True,
+    skeletons: Optional[SkeletonStore] = None,
+) -> GenerationResult:
+    """Generate the UI for a task file into a job-scoped artifact directory.
+
+    Stages run as a dependency graph: the sample input/output probe only needs
+    the task file, so it overlaps with the specification, design and HTML
+    stages instead of waiting for them. When no ``artifacts`` handle is given a
+    new job directory is created in the default `ArtifactStore`.
+
+    ``on_event`` receives stage start/end events from the pipeline and
+    ``{"type": "token", "stage": ..., "text": ...}`` events as the model
+    streams each stage's output, so callers can show partial HTML early.
+
+    With ``num_samples`` > 1 that many sample inputs are generated and sent to
+    the model API concurrently, and a representative set of input/output
+    examples is given to the JS injection and checker stages.
+
+    With ``patch_mode`` the styling and fix stages ask the model for a unified
+    diff against the page instead of the whole document, falling back to full
+    regeneration when the diff does not apply cleanly.
+
+    If the skeleton store (``skeletons``, or the default store) holds the
+    specification, design and HTML of a task with the same type and a similar
+    input/output schema, the design and HTML stages reuse it instead of calling
+    the model, as does the specification stage if the task's description and
+    visualization requirements are also the same; otherwise their fresh
+    outputs are added to the store. Without
+    ``use_cache`` no skeleton is reused.
+
+    With ``use_cache`` each stage is fingerprinted by the task sections and
+    options it depends on, its upstream stages and the pipeline's code, and
+    stage results from earlier runs are reused when the fingerprint matches.
+    Editing only ``model_information.api_url``, for instance, reruns the
+    sample probe, JS injection, styling and checker, but not the
+    specification, design or HTML.
+    """
+    plan = _plan(task_path, use_cache, artifacts, on_event, num_samples, patch_mode, skeletons)
+    with track_usage() as usage:
+        run = run_stages(plan.stages, on_event=on_event, cache=plan.cache)
+    return plan.finish(run, usage)
+
+
+async def agenerate_fe(
+    task_path: Union[str, Task],
+    use_cache: bool = True,
+    artifacts: Optional[JobArtifacts] = None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    num_samples: int = 1,
+    patch_mode: bool = True,
+    skeletons: Optional[SkeletonStore] = None,
+) -> GenerationResult:
+    """Async counterpart of `generate_fe`.
+
+    Every model call and model API probe is awaited on the running event
+    loop, so one process can drive many generations concurrently without a
+    thread per job. The small artifact and cache file writes stay
+    synchronous.
+    """
+    plan = _plan(task_path, use_cache, artifacts, on_event, num_samples, patch_mode, skeletons)
+    with track_usage() as usage:
+        run = await arun_stages(plan.stages, on_event=on_event, cache=plan.cache)
+    return plan.finish(run, usage)
 
 if __name__ == "__main__":
-    generate_fe("src/react_agent/task (3).yaml")
\ No newline at end of file
+    result = generate_fe("src/react_agent/task (3).yaml")
+    print(result.run.format_timings())
+    print(f"Saved to {result.generated_ui} and {result.fixed_ui}")
\ No newline at end of file
@@ -4,38 +4,80 @@ Works with a chat model with tool calling support.
 """
 
 from datetime import UTC, datetime
-from typing import Dict, List, Literal, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
-from langchain_core.messages import AIMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph
 from langgraph.prebuilt import ToolNode
 
 from react_agent.configuration import Configuration
+from react_agent.rate_limit import (
+    Governor,
+    Limits,
+    estimate_tokens,
+    get_governor,
+    provider_of,
+)
 from react_agent.state import InputState, State
 from react_agent.tools import TOOLS
-from react_agent.utils import load_chat_model
+from react_agent.utils import get_chat_model
 
 # Define the function that calls the model
 
 
-def call_model(state: State) -> Dict[str, List[AIMessage]]:
-    """Call the LLM powering our "agent"."""
-    configuration = Configuration.from_context()
-    
-    # Initialize the model with tool binding
-    model = load_chat_model(configuration.model).bind_tools(TOOLS)
-    
-    # Format the system prompt
-    system_message = configuration.system_prompt
-    
-    # Get the model's response (synchronous version)
-    response = cast(
-        AIMessage,
-        model.invoke(
-            [{"role": "system", "content": system_message}, *state.messages]
+def _system_content(configuration: Configuration) -> Any:
+    """Return the system prompt, marked as a cache breakpoint for Anthropic.
+
+    Pipeline prompts keep everything task-independent in the system prompt,
+    so it is the prefix shared by every run of a stage. OpenAI caches such
+    prefixes automatically; Anthropic only caches up to an explicit marker.
+    """
+    if provider_of(configuration.model) != "anthropic":
+        return configuration.system_prompt
+    return [{"type": "text", "text": configuration.system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def model_client(configuration: Configuration, tools: Sequence[Callable[..., Any]]) -> Tuple[BaseChatModel, Optional[Governor]]:
+    """Resolve the chat model client and the rate-limit governor."""
+    # Share the provider's quota with every other run through its governor
+    governor = get_governor(
+        configuration.model,
+        Limits(
+            configuration.requests_per_minute,
+            configuration.tokens_per_minute,
+            configuration.max_concurrent_requests,
         ),
     )
-    
+    # Reuse the shared client (and its connection pool), bound to ``tools`` if
+    # any. A governed call is retried by the governor, not by the SDK as well.
+    model = get_chat_model(configuration.model, tools=tools, max_retries=0 if governor else None)
+    return model, governor
+
+
+def _prepare(state: State) -> Tuple[BaseChatModel, List[Any], Optional[Governor]]:
+    """Resolve the model, the messages to send and the rate-limit governor."""
+    configuration = Configuration.from_context()
+    model, governor = model_client(configuration, TOOLS)
+
+    # Format the system prompt
+    messages = [{"role": "system", "content": _system_content(configuration)}, *state.messages]
+    return model, messages, governor
+
+
+def _finish(state: State, response: AIMessage) -> Dict[str, List[AIMessage]]:
     # Handle the case when it's the last step and the model still wants to use a tool
     if state.is_last_step and response.tool_calls:
         return {
@@ -46,15 +88,112 @@ def call_model(state: State) -> Dict[str, List[AIMessage]]:
                 )
             ]
         }
-    
+
     return {"messages": [response]}
 
+
+def call_model(state: State) -> Dict[str, List[AIMessage]]:
+    """Call the LLM powering our "agent"."""
+    model, messages, governor = _prepare(state)
+
+    # Get the model's response (synchronous version)
+    if governor is None:
+        response = cast(AIMessage, model.invoke(messages))
+    else:
+        response = cast(
+            AIMessage,
+            governor.call(lambda: model.invoke(messages), estimate_tokens(messages)),
+        )
+    return _finish(state, response)
+
+
+async def acall_model(state: State) -> Dict[str, List[AIMessage]]:
+    """Call the LLM powering our "agent" without blocking the event loop."""
+    model, messages, governor = _prepare(state)
+
+    if governor is None:
+        response = cast(AIMessage, await model.ainvoke(messages))
+    else:
+        response = cast(
+            AIMessage,
+            await governor.acall(lambda: model.ainvoke(messages), estimate_tokens(messages)),
+        )
+    return _finish(state, response)
+
+def _direct(configuration: Configuration, user_prompt: str) -> Tuple[BaseChatModel, List[Any], Optional[Governor]]:
+    model, governor = model_client(configuration, ())
+    messages = [
+        {"role": "system", "content": _system_content(configuration)},
+        {"role": "user", "content": user_prompt},
+    ]
+    return model, messages, governor
+
+
+def _collect(chunks: Iterable[AIMessageChunk], on_chunk: Callable[[AIMessageChunk], None]) -> AIMessage:
+    message: Optional[AIMessageChunk] = None
+    for chunk in chunks:
+        on_chunk(chunk)
+        message = chunk if message is None else message + chunk
+    return message if message is not None else AIMessage(content="")
+
+
+def call_model_direct(
+    configuration: Configuration,
+    user_prompt: str,
+    on_chunk: Optional[Callable[[AIMessageChunk], None]] = None,
+) -> AIMessage:
+    """Answer a single prompt without tools, bypassing the agent loop.
+
+    No tool schema is sent and no ``tools`` round trip can happen, which is
+    all a pipeline stage needs. Rate limits and the prompt-cache marker are
+    applied as in `call_model`.
+
+    Args:
+        configuration: Supplies the model, system prompt and rate limits.
+        user_prompt: The user message.
+        on_chunk: If given, the answer is streamed and every chunk passed here.
+    """
+    model, messages, governor = _direct(configuration, user_prompt)
+
+    def run() -> AIMessage:
+        if on_chunk is None:
+            return cast(AIMessage, model.invoke(messages))
+        return _collect(model.stream(messages), on_chunk)
+
+    if governor is None:
+        return run()
+    return governor.call(run, estimate_tokens(messages))
+
+
+async def acall_model_direct(
+    configuration: Configuration,
+    user_prompt: str,
+    on_chunk: Optional[Callable[[AIMessageChunk], None]] = None,
+) -> AIMessage:
+    """Async counterpart of `call_model_direct`."""
+    model, messages, governor = _direct(configuration, user_prompt)
+
+    async def run() -> AIMessage:
+        if on_chunk is None:
+            return cast(AIMessage, await model.ainvoke(messages))
+        message: Optional[AIMessageChunk] = None
+        async for chunk in model.astream(messages):
+            on_chunk(chunk)
+            message = chunk if message is None else message + chunk
+        return message if message is not None else AIMessage(content="")
+
+    if governor is None:
+        return await run()
+    return await governor.acall(run, estimate_tokens(messages))
+
+
 # Define a new graph
 
 builder = StateGraph(State, input=InputState, config_schema=Configuration)
 
-# Define the two nodes we will cycle between
-builder.add_node(call_model)
+# Define the two nodes we will cycle between; `graph.ainvoke` runs the async
+# model call and `graph.invoke` the synchronous one
+builder.add_node("call_model", RunnableLambda(call_model, afunc=acall_model, name="call_model"))
 builder.add_node("tools", ToolNode(TOOLS))
 
 # Set the entrypoint as `call_model`
@@ -1,23 +1,215 @@
-from react_agent import graph
-from langchain_core.callbacks import get_usage_metadata_callback
+"""Token, latency and cost accounting for LLM calls.
+
+`graph_invoke_with_token_count` measures a single graph call. For whole
+pipelines, `track_usage` installs a `UsageTracker` in the current context;
+every stage run through `react_agent.llm.invoke_llm` while it is active
+records its model, token counts and latency there, so a job can report which
+stage dominates its cost and latency.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+logger = logging.getLogger("react_agent.usage")
+
+
+def _load_prices() -> Dict[str, List[float]]:
+    # USD per million (input, output[, cached input]) tokens, e.g.
+    # LLM_PRICES='{"openai/gpt-4.1": [2.0, 8.0, 0.5]}'
+    try:
+        return json.loads(os.environ.get("LLM_PRICES", "{}"))
+    except ValueError:
+        return {}
+
+
+PRICES = _load_prices()
+
+
+def sum_usage(usage_metadata: Mapping[str, Mapping[str, Any]]) -> Dict[str, int]:
+    """Add up the usage of every model in a usage-metadata callback.
+
+    ``cache_read`` and ``cache_creation`` count the input tokens served from,
+    and written to, the provider's prompt cache; both are part of ``input``.
+    """
+    totals = {"input": 0, "output": 0, "total": 0, "cache_read": 0, "cache_creation": 0}
+    for usage in usage_metadata.values():
+        totals["input"] += usage.get("input_tokens", 0)
+        totals["output"] += usage.get("output_tokens", 0)
+        totals["total"] += usage.get("total_tokens", 0)
+        details = usage.get("input_token_details") or {}
+        totals["cache_read"] += details.get("cache_read") or 0
+        totals["cache_creation"] += details.get("cache_creation") or 0
+    return totals
+
+
+@dataclass
+class StageUsage:
+    """Usage of one LLM call."""
+
+    stage: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    latency: float = 0.0
+    cached: bool = False
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    hedged: bool = False
+
+    @property
+    def cost(self) -> Optional[float]:
+        """USD cost of the call, if the model's price is configured."""
+        price = PRICES.get(self.model)
+        if price is None:
+            return None
+        # Prompt-cache reads are billed at the cached-input price when given.
+        cached_price = price[2] if len(price) > 2 else price[0]
+        uncached = self.input_tokens - self.cache_read_tokens
+        return (uncached * price[0] + self.cache_read_tokens * cached_price
+                + self.output_tokens * price[1]) / 1_000_000
+
+
+class UsageTracker:
+    """Thread-safe collection of `StageUsage` records for one job."""
+
+    def __init__(self) -> None:
+        """Create an empty tracker."""
+        self.records: List[StageUsage] = []
+        self._lock = threading.Lock()
+
+    def record(self, usage: StageUsage) -> None:
+        """Add a record."""
+        with self._lock:
+            self.records.append(usage)
+
+    def by_stage(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregate records per stage."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            records = list(self.records)
+        for r in records:
+            agg = stages.setdefault(
+                r.stage,
+                {"models": [], "calls": 0, "cached_calls": 0, "input_tokens": 0,
+                 "output_tokens": 0, "total_tokens": 0, "cache_read_tokens": 0,
+                 "cache_creation_tokens": 0, "hedged_calls": 0, "latency": 0.0, "cost": None},
+            )
+            if r.model not in agg["models"]:
+                agg["models"].append(r.model)
+            agg["calls"] += 1
+            agg["cached_calls"] += int(r.cached)
+            agg["hedged_calls"] += int(r.hedged)
+            agg["input_tokens"] += r.input_tokens
+            agg["output_tokens"] += r.output_tokens
+            agg["total_tokens"] += r.total_tokens
+            agg["cache_read_tokens"] += r.cache_read_tokens
+            agg["cache_creation_tokens"] += r.cache_creation_tokens
+            agg["latency"] += r.latency
+            if r.cost is not None:
+                agg["cost"] = (agg["cost"] or 0.0) + r.cost
+        return stages
+
+    def totals(self) -> Dict[str, Any]:
+        """Aggregate records across all stages."""
+        stages = self.by_stage().values()
+        costs = [s["cost"] for s in stages if s["cost"] is not None]
+        return {
+            "calls": sum(s["calls"] for s in stages),
+            "input_tokens": sum(s["input_tokens"] for s in stages),
+            "output_tokens": sum(s["output_tokens"] for s in stages),
+            "total_tokens": sum(s["total_tokens"] for s in stages),
+            "cache_read_tokens": sum(s["cache_read_tokens"] for s in stages),
+            "cache_creation_tokens": sum(s["cache_creation_tokens"] for s in stages),
+            "latency": sum(s["latency"] for s in stages),
+            "cost": sum(costs) if costs else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize totals, per-stage aggregates and raw records."""
+        with self._lock:
+            records = [asdict(r) for r in self.records]
+        return {"totals": self.totals(), "stages": self.by_stage(), "calls": records}
+
+    def log(self, **fields: Any) -> None:
+        """Emit one structured (JSON) log line with the per-stage summary."""
+        logger.info(json.dumps({"event": "llm_usage", **fields,
+                                "totals": self.totals(), "stages": self.by_stage()}))
+
+
+_current_tracker: contextvars.ContextVar[Optional[UsageTracker]] = contextvars.ContextVar(
+    "usage_tracker", default=None
+)
+
+
+def current_tracker() -> Optional[UsageTracker]:
+    """Return the tracker installed by the enclosing `track_usage`, if any."""
+    return _current_tracker.get()
+
+
+@contextmanager
+def track_usage(tracker: Optional[UsageTracker] = None) -> Iterator[UsageTracker]:
+    """Collect the usage of every LLM stage run inside the block."""
+    tracker = tracker or UsageTracker()
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+@contextmanager
+def measure_stage(stage: str, model: str) -> Iterator[StageUsage]:
+    """Time an LLM call and capture its token usage into the current tracker."""
+    from langchain_core.callbacks import get_usage_metadata_callback
+
+    usage = StageUsage(stage=stage, model=model)
+    started = time.perf_counter()
+    with get_usage_metadata_callback() as cb:
+        try:
+            yield usage
+        finally:
+            usage.latency = time.perf_counter() - started
+            tokens = sum_usage(cb.usage_metadata)
+            usage.input_tokens = tokens["input"]
+            usage.output_tokens = tokens["output"]
+            usage.total_tokens = tokens["total"]
+            usage.cache_read_tokens = tokens["cache_read"]
+            usage.cache_creation_tokens = tokens["cache_creation"]
+            tracker = current_tracker()
+            if tracker is not None:
+                tracker.record(usage)
+
 
 def graph_invoke_with_token_count(system_prompt: str, user_message: str):
+    from langchain_core.callbacks import get_usage_metadata_callback
+
+    from react_agent.graph import graph
+
     with get_usage_metadata_callback() as cb:
         res = graph.invoke(
             {"messages": [("system", system_prompt), ("user", user_message)]},
             {"configurable": {"system_prompt": system_prompt}},
         )
 
-    tokens = list(cb.usage_metadata.values())[0]
-    model = list(cb.usage_metadata.keys())[0]
+    tokens = sum_usage(cb.usage_metadata)
 
     return {
-        "model": model,
+        "model": ", ".join(cb.usage_metadata),
         "response": res,
         "token": {
-            "total": tokens["total_tokens"],
-            "input": tokens["input_tokens"],
-            "output": tokens["output_tokens"]
+            "total": tokens["total"],
+            "input": tokens["input"],
+            "output": tokens["output"]
         }
     }
 
@@ -29,8 +221,6 @@ if __name__ == "__main__":
 
     print(tkc_res["token"]["input"])
     print(tkc_res["token"]["output"])
-    
+
     res = tkc_res["response"]
     print(str(res["messages"][-1].content).strip())
-
-
@@ -0,0 +1,290 @@
+"""Hedged model requests for the long generation stages.
+
+A single slow provider response stalls a whole job, and the page-writing
+stages (``html``, ``js_injection``, ``tailwind_styling``) are long enough
+for that to dominate the p99. For the stages listed in ``LLM_HEDGE_STAGES``,
+`Hedger` starts a duplicate request (to ``LLM_HEDGE_MODEL`` if set,
+otherwise the same model) once the first one has produced no output within
+the ``LLM_HEDGE_PERCENTILE`` of that stage's recent latencies. The first
+request to answer wins and the other one is cancelled:
+
+* Without streaming, "output" is the complete answer. A losing coroutine is
+  cancelled; a losing thread cannot be interrupted mid-request, so its
+  answer is discarded when it arrives.
+* With streaming, "output" is the first chunk. The request that sends it
+  first owns the stream; the other stops at its next chunk.
+
+No request is hedged until ``LLM_HEDGE_MIN_SAMPLES`` latencies of the stage
+have been seen, and the deadline is never shorter than
+``LLM_HEDGE_MIN_DELAY`` seconds. Both requests count towards the stage's
+token usage; `hedge_metrics` reports how often each stage hedged and which
+request won.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# A request attempt, given the chunk callback to stream through (or None)
+Attempt = Callable[[Optional[Callable[[Any], None]]], T]
+
+HEDGE_STAGES = frozenset(s.strip() for s in os.environ.get("LLM_HEDGE_STAGES", "").split(",") if s.strip())
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "90"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", "1.0"))
+HEDGE_MODEL = os.environ.get("LLM_HEDGE_MODEL", "")
+# Latencies kept per stage for the percentile.
+HEDGE_WINDOW = 200
+
+
+class Superseded(Exception):
+    """Raised in a streaming request once the other request owns the stream."""
+
+
+class _Race:
+    """Which request owns the output, and a signal for the first progress."""
+
+    def __init__(self, on_chunk: Optional[Callable[[Any], None]], notify: Callable[[], None]):
+        self.on_chunk = on_chunk
+        self.notify = notify
+        self.owner: Optional[int] = None
+        self.started: Dict[int, float] = {}
+        self.first_chunk: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def gate(self, index: int) -> Optional[Callable[[Any], None]]:
+        if self.on_chunk is None:
+            return None
+
+        def forward(chunk: Any) -> None:
+            with self._lock:
+                claimed = self.owner is None
+                if claimed:
+                    self.owner = index
+                    # From the primary's start: that is how long the caller waited
+                    self.first_chunk = time.perf_counter() - self.started[0]
+            if self.owner != index:
+                raise Superseded()
+            if claimed:
+                self.notify()
+            self.on_chunk(chunk)
+
+        return forward
+
+
+class Hedger:
+    """Per-stage latency history and the hedged-request runner."""
+
+    def __init__(
+        self,
+        stages: Iterable[str] = HEDGE_STAGES,
+        percentile: float = HEDGE_PERCENTILE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        min_delay: float = HEDGE_MIN_DELAY,
+        model: str = HEDGE_MODEL,
+        window: int = HEDGE_WINDOW,
+    ):
+        """Hedge ``stages`` after the ``percentile`` of their latency."""
+        self.stages = frozenset(stages)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.model = model
+        self.window = window
+        self._samples: Dict[Tuple[str, bool], Deque[float]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def enabled(self, stage: str) -> bool:
+        """Return True if requests of ``stage`` are hedged."""
+        return stage in self.stages
+
+    def deadline(self, stage: str, streaming: bool) -> Optional[float]:
+        """Seconds to wait for output before hedging, or None while learning."""
+        with self._lock:
+            samples = sorted(self._samples.get((stage, streaming), ()))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        rank = max(0, math.ceil(self.percentile / 100 * len(samples)) - 1)
+        return max(self.min_delay, samples[rank])
+
+    def record(self, stage: str, streaming: bool, seconds: float) -> None:
+        """Add a latency (to first chunk when ``streaming``) to the history."""
+        with self._lock:
+            self._samples.setdefault((stage, streaming), deque(maxlen=self.window)).append(seconds)
+
+    def _count(self, stage: str, field: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(stage, {"requests": 0, "hedged": 0, "primary_wins": 0, "hedge_wins": 0})
+            stats[field] += 1
+
+    def _won(self, stage: str, race: _Race, index: int, hedged: bool) -> None:
+        # Latencies are measured from the primary's start, including the time
+        # waited before hedging, so a hedge win does not lower the deadline.
+        streaming = race.on_chunk is not None
+        if streaming and race.first_chunk is not None:
+            self.record(stage, True, race.first_chunk)
+        elif not streaming:
+            self.record(stage, False, time.perf_counter() - race.started[0])
+        if hedged:
+            self._count(stage, "hedge_wins" if index else "primary_wins")
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+            return self._pool
+
+    def run(
+        self,
+        stage: str,
+        primary: Attempt[T],
+        backup: Attempt[T],
+        on_chunk: Optional[Callable[[Any], None]] = None,
+    ) -> Tuple[T, bool, bool]:
+        """Run ``primary``, hedging with ``backup`` if it is slow.
+
+        Returns:
+            The winning result, whether the backup request was sent, and
+            whether the backup's result won.
+        """
+        progress = threading.Event()
+        race = _Race(on_chunk, progress.set)
+        futures: Dict[Future, int] = {}
+
+        def start(index: int, attempt: Attempt[T]) -> None:
+            race.started[index] = time.perf_counter()
+            # Each request keeps the caller's context (usage tracking, config)
+            future = self._executor().submit(contextvars.copy_context().run, attempt, race.gate(index))
+            future.add_done_callback(lambda _: progress.set())
+            futures[future] = index
+
+        self._count(stage, "requests")
+        start(0, primary)
+        hedged = not progress.wait(self.deadline(stage, on_chunk is not None))
+        if hedged:
+            self._count(stage, "hedged")
+            start(1, backup)
+
+        errors: List[BaseException] = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self._won(stage, race, futures[future], hedged)
+                    return future.result(), hedged, futures[future] == 1
+                if race.owner == futures[future] or not isinstance(error, Superseded):
+                    errors.append(error)
+                if race.owner == futures[future]:
+                    # Output was already streamed; the other request can't take over
+                    raise error
+        raise errors[0]
+
+    async def arun(
+        self,
+        stage: str,
+        primary: Attempt[Awaitable[T]],
+        backup: Attempt[Awaitable[T]],
+        on_chunk: Optional[Callable[[Any], None]] = None,
+    ) -> Tuple[T, bool, bool]:
+        """Async counterpart of `run`; the losing request is cancelled."""
+        progress = asyncio.Event()
+        race = _Race(on_chunk, progress.set)
+        tasks: Dict[asyncio.Task, int] = {}
+
+        def start(index: int, attempt: Attempt[Awaitable[T]]) -> None:
+            race.started[index] = time.perf_counter()
+            task = asyncio.ensure_future(attempt(race.gate(index)))
+            task.add_done_callback(lambda _: progress.set())
+            tasks[task] = index
+
+        self._count(stage, "requests")
+        start(0, primary)
+        try:
+            await asyncio.wait_for(progress.wait(), self.deadline(stage, on_chunk is not None))
+            hedged = False
+        except TimeoutError:
+            hedged = True
+            self._count(stage, "hedged")
+            start(1, backup)
+
+        errors: List[BaseException] = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        self._won(stage, race, tasks[task], hedged)
+                        return task.result(), hedged, tasks[task] == 1
+                    if race.owner == tasks[task] or not isinstance(error, Superseded):
+                        errors.append(error)
+                    if race.owner == tasks[task]:
+                        raise error
+            raise errors[0]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage request, hedge and win counts, and the current deadlines."""
+        with self._lock:
+            stats = {stage: dict(s) for stage, s in self._stats.items()}
+        for stage, s in stats.items():
+            s["hedge_rate"] = round(s["hedged"] / s["requests"], 4) if s["requests"] else 0.0
+            s["deadline"] = self.deadline(stage, False)
+            s["stream_deadline"] = self.deadline(stage, True)
+        return stats
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Return the process-wide hedger configured from the environment."""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger()
+        return _hedger
+
+
+def configure_hedging(stages: Iterable[str], **options: Any) -> Hedger:
+    """Replace the shared hedger; keyword arguments are passed to `Hedger`."""
+    global _hedger
+    with _hedger_lock:
+        _hedger = Hedger(stages, **options)
+        return _hedger
+
+
+def hedge_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return the hedging metrics of every stage seen so far."""
+    return get_hedger().metrics()
@@ -0,0 +1,213 @@
+"""Shared HTTP client for calling the task's model API.
+
+Probing the model endpoint is the only plain HTTP traffic in the pipeline,
+and the same host is hit by every job for a task. `ModelApiClient` keeps a
+pooled session per process with connect/read timeouts and bounded retries
+with exponential backoff, and trips a per-host circuit breaker after
+repeated failures so a dead endpoint fails fast instead of tying up workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.environ.get("MODEL_API_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("MODEL_API_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.environ.get("MODEL_API_RETRIES", "2"))
+BACKOFF_FACTOR = float(os.environ.get("MODEL_API_BACKOFF", "0.5"))
+POOL_SIZE = int(os.environ.get("MODEL_API_POOL_SIZE", "20"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a request is refused because the host's circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single host.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are refused for ``reset_timeout`` seconds. A single request is
+    then let through as a trial while others are still refused: success
+    closes the circuit, failure opens it again. A trial whose outcome is
+    never recorded is replaced after another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        """Create a closed breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """One of ``closed``, ``open`` or ``half-open``."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_request(self, host: str) -> None:
+        """Raise `CircuitOpenError` if requests to the host are refused."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = self._clock()
+            if now - self._opened_at >= self.reset_timeout and (
+                self._trial_at is None or now - self._trial_at >= self.reset_timeout
+            ):
+                self._trial_at = now
+                return
+        raise CircuitOpenError(f"Circuit open for {host}; failing fast")
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = self._clock()
+                self._trial_at = None
+
+
+class ModelApiClient:
+    """Pooled sync and async JSON client with retries and per-host breakers."""
+
+    def __init__(
+        self,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        pool_size: int = POOL_SIZE,
+    ):
+        """Create the client; connections are opened lazily."""
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+
+        retry = Retry(
+            total=max_retries,
+            # A POST whose response timed out may already have been handled,
+            # so only failures to connect and retryable statuses are retried.
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Return the circuit breaker for the URL's host."""
+        host = urlsplit(url).netloc
+        with self._breakers_lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def post_json(self, url: str, payload: Any) -> requests.Response:
+        """POST ``payload`` as JSON, retrying transient failures.
+
+        Raises:
+            CircuitOpenError: If the host's circuit is open.
+            requests.RequestException: If the request still fails after retries.
+        """
+        breaker = self.breaker(url)
+        breaker.before_request(urlsplit(url).netloc)
+        try:
+            response = self.session.post(url, json=payload, timeout=self.timeout)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # httpx clients are bound to the loop they were created on.
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def apost_json(self, url: str, payload: Any) -> httpx.Response:
+        """Async counterpart of `post_json`."""
+        breaker = self.breaker(url)
+        breaker.before_request(urlsplit(url).netloc)
+        client = self._async_client()
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                response = await client.post(url, json=payload)
+            except httpx.ReadTimeout:
+                # The API may have received the POST; don't send it again
+                breaker.record_failure()
+                raise
+            except httpx.TransportError:
+                if last:
+                    breaker.record_failure()
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last:
+                    if response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    return response
+            await asyncio.sleep(self.backoff_factor * (2**attempt))
+        raise AssertionError("unreachable")
+
+
+_client: Optional[ModelApiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> ModelApiClient:
+    """Return the process-wide model API client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ModelApiClient()
+        return _client
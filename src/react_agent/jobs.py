@@ -0,0 +1,316 @@
+"""Bounded background job queue for UI generations.
+
+A generation makes many sequential LLM round trips, so callers such as the
+HTTP API hand them to a `JobQueue` and poll for the outcome instead of
+blocking. A plain function runs on a fixed pool of worker threads; a
+coroutine function runs as a task on the caller's event loop, with the same
+limit on how many run at once. The queue refuses new work once the number of
+queued and running jobs reaches its limit, giving callers backpressure.
+
+Each job keeps its progress events in a bounded ring buffer. Streamed tokens
+are coalesced per stage before they are stored, and subscribers wait on the
+job for new events instead of polling it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# Progress events kept per job; older ones are dropped.
+MAX_JOB_EVENTS = int(os.environ.get("JOB_MAX_EVENTS", "2000"))
+# Streamed tokens of a stage are stored as one event once they reach this many
+# characters or have been buffered this long.
+TOKEN_FLUSH_CHARS = 512
+TOKEN_FLUSH_INTERVAL = 0.25
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    """Lifecycle states of a job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass
+class Job:
+    """A unit of work tracked by the queue."""
+
+    id: str
+    name: str = ""
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Any = None
+    _events: Deque[Tuple[int, Dict[str, Any]]] = field(
+        default_factory=lambda: deque(maxlen=MAX_JOB_EVENTS), init=False, repr=False, compare=False
+    )
+    _next: int = field(default=0, init=False, repr=False, compare=False)
+    _tokens: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    _tokens_since: float = field(default=0.0, init=False, repr=False, compare=False)
+    _cond: threading.Condition = field(default_factory=threading.Condition, init=False, repr=False, compare=False)
+    _waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Record a progress event for pollers and event-stream clients.
+
+        Consecutive ``token`` events of one stage are merged into a single
+        event, stored once it holds `TOKEN_FLUSH_CHARS` characters, has
+        waited `TOKEN_FLUSH_INTERVAL` seconds, or another event arrives.
+        """
+        with self._cond:
+            if event.get("type") != "token":
+                self._flush_tokens()
+                self._append(event)
+                return
+            if self._tokens is not None and self._tokens.get("stage") != event.get("stage"):
+                self._flush_tokens()
+            if self._tokens is None:
+                self._tokens = dict(event)
+                self._tokens_since = time.monotonic()
+            else:
+                self._tokens["text"] += event["text"]
+            if (len(self._tokens["text"]) >= TOKEN_FLUSH_CHARS
+                    or time.monotonic() - self._tokens_since >= TOKEN_FLUSH_INTERVAL):
+                self._flush_tokens()
+
+    def _flush_tokens(self) -> None:
+        # Caller holds the condition
+        if self._tokens is not None:
+            tokens, self._tokens = self._tokens, None
+            self._append(tokens)
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        # Caller holds the condition
+        self._events.append((self._next, event))
+        self._next += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        # Caller holds the condition
+        self._cond.notify_all()
+        for loop, waiter in self._waiters:
+            loop.call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+        self._waiters.clear()
+
+    def close_events(self) -> None:
+        """Store any buffered tokens and wake subscribers; called when the job ends."""
+        with self._cond:
+            self._flush_tokens()
+            self._wake()
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """Progress events still retained, oldest first."""
+        with self._cond:
+            return [event for _, event in self._events]
+
+    def events_after(self, cursor: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool]:
+        """Return the retained ``(sequence, event)`` pairs from ``cursor`` on.
+
+        Events that fell out of the buffer are skipped. The flag tells whether
+        the job is done and no later event will follow.
+        """
+        with self._cond:
+            events = [(seq, event) for seq, event in self._events if seq >= cursor]
+            last = events[-1][0] + 1 if events else cursor
+            return events, self.done and self._tokens is None and last >= self._next
+
+    def wait_for_events(self, cursor: int, timeout: Optional[float] = None) -> bool:
+        """Block until an event with sequence ``cursor`` or later exists, or the job ends."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._next > cursor or self.done, timeout)
+
+    async def await_events(self, cursor: int, timeout: Optional[float] = None) -> None:
+        """Async counterpart of `wait_for_events`, without blocking the loop."""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._cond:
+            if self._next > cursor or self.done:
+                return
+            self._waiters.append((loop, waiter))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has finished, successfully or not."""
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the job's status, without its result payload."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+_current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+def current_job() -> Optional[Job]:
+    """Return the job being run by the calling worker, if any."""
+    return _current_job.get()
+
+
+class JobQueue:
+    """Run ``fn`` for submitted jobs on a bounded pool of workers."""
+
+    def __init__(
+        self,
+        fn: Callable[..., Any],
+        max_workers: int = 2,
+        max_pending: int = 16,
+        max_history: int = 1000,
+    ):
+        """Create a queue running ``fn`` on ``max_workers`` threads.
+
+        If ``fn`` is a coroutine function, jobs run as tasks on the event loop
+        that submits them instead, ``max_workers`` at a time. At most
+        ``max_pending`` jobs may be queued or running at once, and only the
+        ``max_history`` most recent jobs are remembered for polling.
+        """
+        self.fn = fn
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._is_async = asyncio.iscoroutinefunction(fn)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._jobs: Dict[str, Job] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        """Number of jobs queued or running."""
+        return self._active
+
+    def submit(self, *args: Any, name: str = "", job_id: Optional[str] = None, **kwargs: Any) -> Job:
+        """Enqueue a call to ``fn(*args, **kwargs)`` and return its job.
+
+        ``job_id`` lets the caller pick the id, e.g. to match a directory it
+        already created for the job; a random one is generated otherwise. A
+        coroutine ``fn`` must be submitted from a running event loop.
+
+        Raises:
+            QueueFullError: If ``max_pending`` jobs are already in flight.
+        """
+        with self._lock:
+            if self._active >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} jobs in flight)")
+            job = Job(id=job_id or uuid.uuid4().hex, name=name)
+            self._jobs[job.id] = job
+            self._active += 1
+            self._forget_finished()
+        if self._is_async:
+            task = asyncio.get_running_loop().create_task(self._arun(job, args, kwargs))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._pool.submit(self._run, job, args, kwargs)
+        return job
+
+    def active_ids(self) -> Set[str]:
+        """Ids of the jobs queued or running."""
+        with self._lock:
+            return {job.id for job in self._jobs.values() if not job.done}
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with ``job_id``, if known."""
+        return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and optionally wait for running jobs.
+
+        Without ``wait``, jobs running on the event loop are cancelled.
+        """
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+        if not wait:
+            for task in list(self._tasks):
+                task.cancel()
+
+    def _forget_finished(self) -> None:
+        excess = len(self._jobs) - self.max_history
+        for job_id in [j.id for j in self._jobs.values() if j.done][: max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _start(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        _current_job.set(job)
+
+    def _fail(self, job: Job, error: BaseException) -> None:
+        job.error = f"{type(error).__name__}: {error}"
+        job.status = JobStatus.FAILED
+
+    def _finish(self, job: Job) -> None:
+        _current_job.set(None)
+        job.finished_at = time.time()
+        job.close_events()
+        with self._lock:
+            self._active -= 1
+
+    def _run(self, job: Job, args: tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
+        self._start(job)
+        try:
+            job.result = self.fn(*args, **kwargs)
+            job.status = JobStatus.SUCCEEDED
+        except Exception as e:
+            self._fail(job, e)
+            logger.exception("Job %s failed", job.id)
+        finally:
+            self._finish(job)
+
+    async def _arun(self, job: Job, args: tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        try:
+            async with self._slots:
+                self._start(job)
+                job.result = await self.fn(*args, **kwargs)
+                job.status = JobStatus.SUCCEEDED
+        except asyncio.CancelledError as e:
+            self._fail(job, e)
+            raise
+        except Exception as e:
+            self._fail(job, e)
+            logger.exception("Job %s failed", job.id)
+        finally:
+            self._finish(job)
@@ -0,0 +1,337 @@
+"""Single entry point for the LLM calls made by the generation pipeline.
+
+Each stage of the generator, the checker and the sample-input generator sends
+one (system prompt, user prompt) pair to the model and only needs the final
+message text back. Routing them through `invoke_llm` gives every stage the
+same response cache, usage accounting and optional token streaming. None of
+the stages needs web search, so by default they call the model directly
+without tools; ``tools=True`` runs the full ReAct agent graph instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import replace
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from react_agent.configuration import TIERED_STAGES, Configuration
+from react_agent.graph_token_count import StageUsage, current_tracker, measure_stage
+from react_agent.hedging import get_hedger
+from react_agent.llm_cache import cache_enabled, get_response_cache, get_stage_cache
+
+if TYPE_CHECKING:
+    from langchain_core.messages import AIMessageChunk
+
+logger = logging.getLogger(__name__)
+
+
+def _lookup(model_name: str, stage: str, system_prompt: str, user_prompt: str, use_cache: bool) -> Tuple[Optional[str], Optional[str]]:
+    """Return the cache key (None when caching is off) and any cached response."""
+    if not (use_cache and cache_enabled()):
+        return None, None
+    key = get_response_cache().make_key(model_name, stage, system_prompt, user_prompt)
+    cached = get_response_cache().get(key)
+    if cached is not None:
+        tracker = current_tracker()
+        if tracker is not None:
+            tracker.record(StageUsage(stage=stage, model=model_name, cached=True))
+    return key, cached
+
+
+def _configuration(system_prompt: str, model_name: str) -> Configuration:
+    """Return the stage's configuration, keeping the caller's rate limits."""
+    return replace(Configuration.from_context(), system_prompt=system_prompt, model=model_name)
+
+
+def _prepare(system_prompt: str, user_prompt: str, model_name: str) -> Tuple[dict, dict]:
+    configuration = _configuration(system_prompt, model_name)
+    configurable = {
+        name: getattr(configuration, name)
+        for name in ("system_prompt", "model", "requests_per_minute", "tokens_per_minute", "max_concurrent_requests")
+    }
+    # The graph prepends the system prompt from the configuration.
+    inputs = {"messages": [("user", user_prompt)]}
+    return inputs, {"configurable": configurable}
+
+
+def _store(key: Optional[str], message: Any, model_name: str, stage: str) -> str:
+    text = str(message.content).strip()
+    if key is not None:
+        get_response_cache().set(key, text, model=model_name, stage=stage)
+    return text
+
+
+def _escalation(stage: str, model: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Return the model for ``stage`` and the model to retry with, if any."""
+    if model:
+        return model, None
+    config = Configuration()
+    model_name = config.model_for(stage)
+    return model_name, (config.model if model_name != config.model else None)
+
+
+def _should_escalate(text: str, stage: str, model_name: str, fallback: Optional[str],
+                     validate: Optional[Callable[[str], bool]]) -> bool:
+    if fallback is None or validate is None or validate(text):
+        return False
+    logger.warning("[%s] output of %s failed validation; retrying with %s", stage, model_name, fallback)
+    return True
+
+
+def _on_chunk(on_token: Optional[Callable[[str], None]]) -> Optional[Callable[[AIMessageChunk], None]]:
+    if on_token is None:
+        return None
+
+    def forward(chunk: AIMessageChunk) -> None:
+        text = _chunk_text(chunk)
+        if text:
+            on_token(text)
+
+    return forward
+
+
+def _direct(system_prompt: str, user_prompt: str, stage: str, model_name: str,
+            on_token: Optional[Callable[[str], None]], usage: StageUsage) -> Any:
+    from react_agent.graph import call_model_direct
+
+    configuration = _configuration(system_prompt, model_name)
+    hedger = get_hedger()
+    if not hedger.enabled(stage):
+        return call_model_direct(configuration, user_prompt, _on_chunk(on_token))
+    backup = replace(configuration, model=hedger.model or model_name)
+    message, usage.hedged, backup_won = hedger.run(
+        stage,
+        partial(call_model_direct, configuration, user_prompt),
+        partial(call_model_direct, backup, user_prompt),
+        _on_chunk(on_token),
+    )
+    if backup_won:
+        # Attribute the call (and its price) to the model that answered
+        usage.model = backup.model
+    return message
+
+
+async def _adirect(system_prompt: str, user_prompt: str, stage: str, model_name: str,
+                   on_token: Optional[Callable[[str], None]], usage: StageUsage) -> Any:
+    from react_agent.graph import acall_model_direct
+
+    configuration = _configuration(system_prompt, model_name)
+    hedger = get_hedger()
+    if not hedger.enabled(stage):
+        return await acall_model_direct(configuration, user_prompt, _on_chunk(on_token))
+    backup = replace(configuration, model=hedger.model or model_name)
+    message, usage.hedged, backup_won = await hedger.arun(
+        stage,
+        partial(acall_model_direct, configuration, user_prompt),
+        partial(acall_model_direct, backup, user_prompt),
+        _on_chunk(on_token),
+    )
+    if backup_won:
+        # Attribute the call (and its price) to the model that answered
+        usage.model = backup.model
+    return message
+
+
+def _invoke(system_prompt: str, user_prompt: str, stage: str, model_name: str, use_cache: bool,
+            on_token: Optional[Callable[[str], None]], tools: bool) -> str:
+    key, cached = _lookup(model_name, stage, system_prompt, user_prompt, use_cache)
+    if cached is not None:
+        if on_token:
+            on_token(cached)
+        return cached
+
+    # The graph module loads LangGraph and the model SDKs; import it on first use
+    from react_agent.graph import graph
+
+    with measure_stage(stage, model_name) as usage:
+        if not tools:
+            message = _direct(system_prompt, user_prompt, stage, model_name, on_token, usage)
+        else:
+            inputs, config = _prepare(system_prompt, user_prompt, model_name)
+            if on_token is None:
+                res = graph.invoke(inputs, config)
+            else:
+                res = _stream(inputs, config, on_token)
+            message = res["messages"][-1]
+    return _store(key, message, model_name, stage)
+
+
+async def _ainvoke(system_prompt: str, user_prompt: str, stage: str, model_name: str, use_cache: bool,
+                   on_token: Optional[Callable[[str], None]], tools: bool) -> str:
+    key, cached = _lookup(model_name, stage, system_prompt, user_prompt, use_cache)
+    if cached is not None:
+        if on_token:
+            on_token(cached)
+        return cached
+
+    from react_agent.graph import graph
+
+    with measure_stage(stage, model_name) as usage:
+        if not tools:
+            message = await _adirect(system_prompt, user_prompt, stage, model_name, on_token, usage)
+        else:
+            inputs, config = _prepare(system_prompt, user_prompt, model_name)
+            if on_token is None:
+                res = await graph.ainvoke(inputs, config)
+            else:
+                res = await _astream(inputs, config, on_token)
+            message = res["messages"][-1]
+    return _store(key, message, model_name, stage)
+
+
+def invoke_llm(
+    system_prompt: str,
+    user_prompt: str,
+    *,
+    stage: str,
+    model: Optional[str] = None,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+    tools: bool = False,
+) -> str:
+    """Run one pipeline stage and return the model's final message text.
+
+    Args:
+        system_prompt: The system prompt for the stage.
+        user_prompt: The user message for the stage.
+        stage: Name of the pipeline stage, part of the cache key.
+        model: Model override in ``provider/model-name`` form. Defaults to
+            the stage's model from `Configuration.stage_models`, falling back
+            to the configured model.
+        use_cache: Set to False to bypass the response cache for this call.
+        on_token: Called with each text chunk as the model streams its answer.
+            A cached response is delivered as a single chunk.
+        validate: Checks the answer of a stage model. If it returns False the
+            stage is run again with the configured (larger) model, whose
+            answer is returned as is. A stage model that raises is retried
+            the same way. Ignored when ``model`` is given.
+        tools: Run the stage through the ReAct agent graph, letting the model
+            call its tools (web search). By default the model is called once
+            directly, without any tool schema.
+    """
+    model_name, fallback = _escalation(stage, model)
+    try:
+        text = _invoke(system_prompt, user_prompt, stage, model_name, use_cache, on_token, tools)
+    except Exception as e:
+        if fallback is None:
+            raise
+        logger.warning("[%s] %s failed (%s: %s); retrying with %s", stage, model_name, type(e).__name__, e, fallback)
+        return _invoke(system_prompt, user_prompt, stage, fallback, use_cache, on_token, tools)
+    if _should_escalate(text, stage, model_name, fallback, validate):
+        text = _invoke(system_prompt, user_prompt, stage, fallback, use_cache, on_token, tools)
+    return text
+
+
+async def ainvoke_llm(
+    system_prompt: str,
+    user_prompt: str,
+    *,
+    stage: str,
+    model: Optional[str] = None,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+    tools: bool = False,
+) -> str:
+    """Async counterpart of `invoke_llm`, running the graph with ``ainvoke``."""
+    model_name, fallback = _escalation(stage, model)
+    try:
+        text = await _ainvoke(system_prompt, user_prompt, stage, model_name, use_cache, on_token, tools)
+    except Exception as e:
+        if fallback is None:
+            raise
+        logger.warning("[%s] %s failed (%s: %s); retrying with %s", stage, model_name, type(e).__name__, e, fallback)
+        return await _ainvoke(system_prompt, user_prompt, stage, fallback, use_cache, on_token, tools)
+    if _should_escalate(text, stage, model_name, fallback, validate):
+        text = await _ainvoke(system_prompt, user_prompt, stage, fallback, use_cache, on_token, tools)
+    return text
+
+
+def _chunk_text(chunk: AIMessageChunk) -> str:
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in chunk.content
+        if isinstance(part, str) or part.get("type") == "text"
+    )
+
+
+def _forward(payload: Any, on_token: Callable[[str], None]) -> None:
+    from langchain_core.messages import AIMessageChunk
+
+    chunk, metadata = payload
+    if isinstance(chunk, AIMessageChunk) and metadata.get("langgraph_node") == "call_model":
+        text = _chunk_text(chunk)
+        if text:
+            on_token(text)
+
+
+def _stream(inputs: dict, config: dict, on_token: Callable[[str], None]) -> Any:
+    """Run the graph, forwarding model tokens and returning the final state."""
+    from react_agent.graph import graph
+
+    state = None
+    for mode, payload in graph.stream(inputs, config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            state = payload
+        else:
+            _forward(payload, on_token)
+    return state
+
+
+async def _astream(inputs: dict, config: dict, on_token: Callable[[str], None]) -> Any:
+    from react_agent.graph import graph
+
+    state = None
+    async for mode, payload in graph.astream(inputs, config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            state = payload
+        else:
+            _forward(payload, on_token)
+    return state
+
+
+def warm_up() -> Dict[str, Any]:
+    """Load everything the first generation would otherwise pay for.
+
+    Compiles the agent graph, builds the chat model client of every
+    configured stage model, loads the JavaScript parser of the static check
+    and opens the shared HTTP client and caches. Models whose client cannot be
+    built (e.g. a missing API key) are reported rather than raised.
+
+    Returns:
+        Seconds spent per step, and an ``errors`` mapping of model to error.
+    """
+    from react_agent.http_client import get_http_client
+    from react_agent.static_check import static_check
+
+    timings: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+
+    started = time.perf_counter()
+    from react_agent.graph import model_client
+
+    timings["graph"] = time.perf_counter() - started
+
+    config = Configuration()
+    stage_models = [*config.stage_models.values(), *map(config.model_for, TIERED_STAGES), get_hedger().model]
+    for model in sorted({config.model, *filter(None, stage_models)}):
+        started = time.perf_counter()
+        try:
+            model_client(replace(config, model=model), ())
+        except Exception as e:
+            errors[model] = f"{type(e).__name__}: {e}"
+        timings[f"model:{model}"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    static_check("<html><body><script>let ready = true;</script></body></html>")
+    get_http_client()
+    get_response_cache()
+    get_stage_cache()
+    timings["clients"] = time.perf_counter() - started
+    return {**timings, "errors": errors}
+
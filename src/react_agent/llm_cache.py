@@ -0,0 +1,144 @@
+"""Persistent, content-addressed cache for LLM stage responses.
+
+Every pipeline stage sends a deterministic (system prompt, user prompt) pair
+to a known model, so the response can be stored on disk under a hash of
+those inputs. Re-running the same task then skips every stage that already
+completed. Entries are evicted least-recently-used once the cache directory
+grows past its size budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", ".cache/llm")
+DEFAULT_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Intermediate pipeline stage results, keyed by stage fingerprint.
+STAGE_CACHE_DIR = os.environ.get("STAGE_CACHE_DIR", ".cache/stages")
+
+
+def cache_enabled() -> bool:
+    """Return False when the cache is bypassed through ``LLM_CACHE_DISABLED``."""
+    return os.environ.get("LLM_CACHE_DISABLED", "").lower() not in {"1", "true", "yes"}
+
+
+class ResponseCache:
+    """Directory of JSON entries keyed by the hash of a stage's inputs.
+
+    Reads refresh an entry's mtime, which is what eviction orders by, so the
+    oldest mtime is always the least recently used entry.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int = DEFAULT_MAX_BYTES):
+        """Create a cache rooted at ``directory`` holding at most ``max_bytes``."""
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def make_key(model: str, stage: str, system_prompt: str, user_prompt: str) -> str:
+        """Hash everything that determines a stage's response."""
+        payload = json.dumps(
+            {"model": model, "stage": stage, "system": system_prompt, "user": user_prompt},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry.get("response")
+
+    def set(self, key: str, response: str, **metadata: str) -> None:
+        """Store ``response`` under ``key`` and evict old entries if needed."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"response": response, **metadata}, ensure_ascii=False).encode("utf-8")
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            # An overwritten entry's bytes leave the cache with it
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self._entries())
+            else:
+                self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            for p in self._entries():
+                p.unlink(missing_ok=True)
+            self._size = 0
+
+    def _entries(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("*/*.json"))
+
+    def _evict(self) -> None:
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+
+        size = sum(s for _, s, _ in entries)
+        for _, entry_size, p in entries:
+            if size <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            size -= entry_size
+        self._size = size
+
+
+_default_cache: Optional[ResponseCache] = None
+_stage_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES)
+        return _default_cache
+
+
+def get_stage_cache() -> ResponseCache:
+    """Return the process-wide cache of pipeline stage results."""
+    global _stage_cache
+    with _default_cache_lock:
+        if _stage_cache is None:
+            _stage_cache = ResponseCache(STAGE_CACHE_DIR, DEFAULT_MAX_BYTES)
+        return _stage_cache
@@ -0,0 +1,187 @@
+"""Apply model-written unified diffs instead of regenerating whole pages.
+
+Output tokens dominate the latency and cost of the fix and styling stages,
+and asking for the full HTML again makes them scale with page size even when
+only a few lines change. In patch mode the model returns a unified diff,
+which is applied and validated locally; if it does not apply cleanly, or
+leaves the page structurally worse, the stage falls back to full
+regeneration.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from react_agent.llm import ainvoke_llm, invoke_llm
+from react_agent.static_check import static_check, strip_code_fence
+
+logger = logging.getLogger(__name__)
+
+PATCH_INSTRUCTIONS = """
+Return ONLY a unified diff against the original HTML file, with no explanation:
+- Start with `--- a/index.html` and `+++ b/index.html` headers.
+- Use `@@` hunk headers, and keep 3 unchanged context lines around every change, copied exactly.
+- Prefix unchanged lines with a space, removed lines with `-` and added lines with `+`.
+- Only include hunks for lines that change.
+"""
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+class PatchError(ValueError):
+    """Raised when a diff cannot be parsed or applied."""
+
+
+@dataclass
+class Hunk:
+    """One ``@@`` section of a unified diff."""
+
+    old_start: Optional[int] = None
+    lines: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def old(self) -> List[str]:
+        """Lines the hunk expects to find (context and removals)."""
+        return [text for op, text in self.lines if op in (" ", "-")]
+
+    @property
+    def new(self) -> List[str]:
+        """Lines the hunk leaves behind (context and additions)."""
+        return [text for op, text in self.lines if op in (" ", "+")]
+
+
+def parse_unified_diff(diff: str) -> List[Hunk]:
+    """Parse the hunks of a unified diff, tolerating a surrounding code fence."""
+    hunks: List[Hunk] = []
+    current: Optional[Hunk] = None
+    for line in strip_code_fence(diff).splitlines():
+        if line.startswith("@@"):
+            m = _HUNK_HEADER.match(line)
+            current = Hunk(old_start=int(m.group(1)) if m else None)
+            hunks.append(current)
+            continue
+        # File headers and anything before the first hunk
+        if current is None or line.startswith(("--- a/", "+++ b/", "diff --git")):
+            current = None
+            continue
+        if line.startswith("\\"):
+            continue
+        if line == "":
+            current.lines.append((" ", ""))
+        elif line[0] in " -+":
+            current.lines.append((line[0], line[1:]))
+        else:
+            raise PatchError(f"Unexpected line in hunk: {line[:80]!r}")
+    for hunk in hunks:
+        # Blank lines between hunks are separators, not context.
+        while hunk.lines and hunk.lines[-1] == (" ", ""):
+            hunk.lines.pop()
+    hunks = [h for h in hunks if any(op != " " for op, _ in h.lines)]
+    if not hunks:
+        raise PatchError("Diff contains no changes")
+    return hunks
+
+
+def _find(lines: List[str], block: List[str], start: int) -> int:
+    for normalize in (lambda s: s, str.rstrip, str.strip):
+        target = [normalize(b) for b in block]
+        for i in range(start, len(lines) - len(block) + 1):
+            if [normalize(line) for line in lines[i : i + len(block)]] == target:
+                return i
+    raise PatchError("Hunk context not found: " + " / ".join(block[:3])[:120])
+
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """Apply ``diff`` to ``original``.
+
+    Hunks are located by their context rather than their line numbers, which
+    models get wrong, first exactly and then ignoring surrounding whitespace.
+
+    Raises:
+        PatchError: If the diff is malformed or a hunk does not match.
+    """
+    lines = original.split("\n")
+    position = 0
+    for hunk in parse_unified_diff(diff):
+        old = hunk.old
+        if old:
+            at = _find(lines, old, position)
+        elif hunk.old_start is not None:
+            at = min(hunk.old_start, len(lines))
+        else:
+            raise PatchError("Pure insertion without context or line number")
+        # Keep the page's own context lines, which may differ in whitespace.
+        matched = iter(lines[at : at + len(old)])
+        new: List[str] = []
+        for op, text in hunk.lines:
+            if op == " ":
+                new.append(next(matched))
+            elif op == "-":
+                next(matched)
+            else:
+                new.append(text)
+        lines[at : at + len(old)] = new
+        position = at + len(new)
+    return "\n".join(lines)
+
+
+def _structural_findings(html_code: str) -> int:
+    return sum(f.kind in ("html", "js-syntax") for f in static_check(html_code).findings)
+
+
+def _accept_patch(original: str, diff: str, stage: str) -> Optional[str]:
+    """Return the patched page, or None if the stage should regenerate it."""
+    try:
+        patched = apply_unified_diff(strip_code_fence(original), diff)
+    except PatchError as e:
+        logger.info("[%s] patch did not apply (%s); regenerating in full", stage, e)
+        return None
+    if _structural_findings(patched) > _structural_findings(original):
+        logger.info("[%s] patch made the page worse; regenerating in full", stage)
+        return None
+    return patched
+
+
+def patch_or_regenerate(
+    original: str,
+    patch_prompts: Tuple[str, str],
+    full_prompts: Tuple[str, str],
+    *,
+    stage: str,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Ask for a diff against ``original`` and fall back to a full rewrite.
+
+    The patched page is accepted only if the diff applies and the page has no
+    more structural findings (markup or script syntax) than before.
+    """
+    diff = invoke_llm(*patch_prompts, stage=f"{stage}_patch", use_cache=use_cache)
+    patched = _accept_patch(original, diff, stage)
+    if patched is not None:
+        if on_token:
+            on_token(patched)
+        return patched
+    return invoke_llm(*full_prompts, stage=stage, use_cache=use_cache, on_token=on_token)
+
+
+async def apatch_or_regenerate(
+    original: str,
+    patch_prompts: Tuple[str, str],
+    full_prompts: Tuple[str, str],
+    *,
+    stage: str,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Async counterpart of `patch_or_regenerate`."""
+    diff = await ainvoke_llm(*patch_prompts, stage=f"{stage}_patch", use_cache=use_cache)
+    patched = _accept_patch(original, diff, stage)
+    if patched is not None:
+        if on_token:
+            on_token(patched)
+        return patched
+    return await ainvoke_llm(*full_prompts, stage=stage, use_cache=use_cache, on_token=on_token)
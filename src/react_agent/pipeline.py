@@ -0,0 +1,320 @@
+"""Dependency-driven execution of the UI generation stages.
+
+A pipeline is a set of named stages, each declaring the stages whose results
+it consumes. Stages are submitted to a thread pool as soon as all of their
+dependencies have finished, so independent work (e.g. probing the model API
+while the specification is being written) overlaps instead of running back
+to back. `arun_stages` does the same with asyncio tasks on one event loop.
+
+Stages that declare ``inputs`` are also fingerprinted: the fingerprint
+covers the stage name, those inputs and the fingerprints of its
+dependencies. Given a cache, a stage whose fingerprint was seen before
+reuses its stored result instead of running. Editing one section of a task
+then reruns only the stages that depend on it, directly or indirectly. A
+result rejected by the stage's ``cacheable`` check, such as a fallback
+returned after an error, is not stored and neither is anything built on it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+from react_agent.llm_cache import ResponseCache
+
+
+@dataclass
+class Stage:
+    """A unit of work in the pipeline.
+
+    ``fn`` is called with the results of ``deps`` as positional arguments, in
+    the order the dependencies are listed. ``inputs`` is JSON-serializable
+    data for everything else the result depends on (task sections, options);
+    stages without it are never reused from the cache. ``afn`` is an optional
+    coroutine function with the same signature, used by `arun_stages`.
+    ``cacheable``, if given, is called with the result and returning False
+    keeps it, and the results of every stage depending on it, out of the
+    cache.
+    """
+
+    name: str
+    fn: Callable[..., Any]
+    deps: Sequence[str] = ()
+    inputs: Any = None
+    afn: Optional[Callable[..., Awaitable[Any]]] = None
+    cacheable: Optional[Callable[[Any], bool]] = None
+
+
+@dataclass
+class StageTiming:
+    """Wall-clock start/end of a stage, relative to the start of the run."""
+
+    name: str
+    started: float
+    finished: float
+
+    @property
+    def duration(self) -> float:
+        """Seconds the stage spent running."""
+        return self.finished - self.started
+
+
+@dataclass
+class PipelineRun:
+    """Results and timings of a completed pipeline."""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, StageTiming] = field(default_factory=dict)
+    total: float = 0.0
+    fingerprints: Dict[str, Optional[str]] = field(default_factory=dict)
+    reused: Set[str] = field(default_factory=set)
+
+    def format_timings(self) -> str:
+        """Render a one-line-per-stage timing report."""
+        lines = [
+            f"{t.name:<20} {t.started:7.2f}s -> {t.finished:7.2f}s ({t.duration:6.2f}s)"
+            + (" reused" if t.name in self.reused else "")
+            for t in sorted(self.timings.values(), key=lambda t: t.started)
+        ]
+        lines.append(f"{'total':<20} {self.total:7.2f}s")
+        return "\n".join(lines)
+
+
+def _validate(stages: Iterable[Stage]) -> Dict[str, Stage]:
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in by_name.values():
+        missing = [d for d in stage.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stage(s): {missing}")
+    return by_name
+
+
+def fingerprint(stage: Stage, dep_fingerprints: Sequence[Optional[str]]) -> Optional[str]:
+    """Hash a stage's name, inputs and dependency fingerprints.
+
+    Returns None if the stage or any dependency is not fingerprinted.
+    """
+    if stage.inputs is None or any(fp is None for fp in dep_fingerprints):
+        return None
+    payload = json.dumps(
+        {"stage": stage.name, "inputs": stage.inputs, "deps": list(dep_fingerprints)},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Scheduler:
+    """Bookkeeping shared by the thread-pool and asyncio runners."""
+
+    def __init__(
+        self,
+        stages: Iterable[Stage],
+        on_event: Optional[Callable[[Dict[str, Any]], None]],
+        cache: Optional[ResponseCache],
+    ):
+        self.stages = _validate(stages)
+        self.pending = dict(self.stages)
+        self.run = PipelineRun()
+        self.on_event = on_event
+        self.cache = cache
+        self.origin = time.perf_counter()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    def launchable(self) -> List[Stage]:
+        """Pop every stage whose dependencies are done and that must run.
+
+        Stages reused from the cache are completed on the spot, which may in
+        turn unblock more stages.
+        """
+        run = self.run
+        launch: List[Stage] = []
+        progress = True
+        while progress:
+            progress = False
+            for stage in [s for s in self.pending.values() if all(d in run.results for d in s.deps)]:
+                del self.pending[stage.name]
+                run.fingerprints[stage.name] = fingerprint(stage, [run.fingerprints[d] for d in stage.deps])
+                if self._reuse(stage):
+                    progress = True
+                else:
+                    launch.append(stage)
+        return launch
+
+    def check_finished(self) -> None:
+        if self.pending:
+            raise ValueError(f"Dependency cycle between stages: {sorted(self.pending)}")
+
+    def _reuse(self, stage: Stage) -> bool:
+        fp = self.run.fingerprints[stage.name]
+        hit = self.cache.get(fp) if self.cache is not None and fp is not None else None
+        if hit is None:
+            return False
+        now = self.now()
+        self.run.results[stage.name] = json.loads(hit)
+        self.run.timings[stage.name] = StageTiming(stage.name, now, now)
+        self.run.reused.add(stage.name)
+        self.emit({"type": "stage_reused", "stage": stage.name})
+        return True
+
+    def started(self, stage: Stage) -> float:
+        self.emit({"type": "stage_start", "stage": stage.name})
+        return self.now()
+
+    def finished(self, stage: Stage, started: float, error: Optional[BaseException] = None) -> None:
+        timing = StageTiming(stage.name, started, self.now())
+        self.run.timings[stage.name] = timing
+        if error is not None:
+            self.emit({"type": "stage_error", "stage": stage.name, "error": str(error)})
+        else:
+            self.emit({"type": "stage_end", "stage": stage.name, "duration": timing.duration})
+
+    def completed(self, name: str, result: Any) -> None:
+        self.run.results[name] = result
+        cacheable = self.stages[name].cacheable
+        if cacheable is not None and not cacheable(result):
+            # Dependents are fingerprinted after this, so they go uncached too
+            self.run.fingerprints[name] = None
+        fp = self.run.fingerprints[name]
+        if self.cache is None or fp is None:
+            return
+        try:
+            self.cache.set(fp, json.dumps(result, ensure_ascii=False), stage=name)
+        except TypeError:
+            pass  # not JSON-serializable; the stage always runs
+
+    def result(self) -> PipelineRun:
+        self.run.total = self.now()
+        return self.run
+
+
+def run_stages(
+    stages: Iterable[Stage],
+    max_workers: Optional[int] = None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cache: Optional[ResponseCache] = None,
+) -> PipelineRun:
+    """Run ``stages`` respecting their dependencies.
+
+    The first stage to raise cancels everything not yet started and the
+    exception is re-raised to the caller. ``on_event``, if given, receives a
+    ``stage_start`` event when a stage begins and a ``stage_end`` or
+    ``stage_error`` event when it finishes, or a ``stage_reused`` event when
+    its result is taken from ``cache``. Results are stored in ``cache`` as
+    JSON, so reused tuples come back as lists.
+    """
+    scheduler = _Scheduler(stages, on_event, cache)
+    running: Dict[Future[Any], str] = {}
+
+    def _timed(stage: Stage, args: list[Any]) -> Any:
+        started = scheduler.started(stage)
+        try:
+            result = stage.fn(*args)
+        except BaseException as e:
+            scheduler.finished(stage, started, e)
+            raise
+        scheduler.finished(stage, started)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(scheduler.pending) or 1) as pool:
+        while True:
+            for stage in scheduler.launchable():
+                args = [scheduler.run.results[d] for d in stage.deps]
+                # Each stage runs in a copy of the caller's context so that
+                # context-local state (e.g. the LangGraph config) carries over.
+                ctx = contextvars.copy_context()
+                running[pool.submit(ctx.run, _timed, stage, args)] = stage.name
+
+            if not running:
+                scheduler.check_finished()
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    raise error
+                scheduler.completed(name, future.result())
+
+    return scheduler.result()
+
+
+async def arun_stages(
+    stages: Iterable[Stage],
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cache: Optional[ResponseCache] = None,
+) -> PipelineRun:
+    """Async counterpart of `run_stages`, running stages as tasks on the current loop.
+
+    Stages with an ``afn`` are awaited directly; the others run in a worker
+    thread so they do not block the loop. The first stage to raise cancels
+    the stages still running.
+    """
+    scheduler = _Scheduler(stages, on_event, cache)
+    running: Dict[asyncio.Task[Any], str] = {}
+
+    async def _timed(stage: Stage, args: list[Any]) -> Any:
+        started = scheduler.started(stage)
+        try:
+            if stage.afn is not None:
+                result = await stage.afn(*args)
+            else:
+                result = await asyncio.to_thread(stage.fn, *args)
+        except BaseException as e:
+            scheduler.finished(stage, started, e)
+            raise
+        scheduler.finished(stage, started)
+        return result
+
+    try:
+        while True:
+            for stage in scheduler.launchable():
+                args = [scheduler.run.results[d] for d in stage.deps]
+                running[asyncio.create_task(_timed(stage, args))] = stage.name
+
+            if not running:
+                scheduler.check_finished()
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                error = task.exception()
+                if error is not None:
+                    raise error
+                scheduler.completed(name, task.result())
+    finally:
+        for task in running:
+            task.cancel()
+
+    return scheduler.result()
@@ -0,0 +1,425 @@
+"""Client-side rate limiting and concurrency control for LLM requests.
+
+Running many jobs at once (the batch CLI, a busy API worker pool) can easily
+exceed a provider's quota and turn every stage into a string of 429 retries.
+Every model call made by the graph's ``call_model`` node goes through a
+`Governor` shared by all calls to the same provider or model (threads wait
+on it with `Governor.call`, coroutines with `Governor.acall`), which:
+
+* limits requests per minute and tokens per minute with token buckets
+  (tokens are estimated from the prompt up front and corrected with the
+  reported usage afterwards),
+* caps the number of requests in flight,
+* on a rate-limit response, pauses the key for the server's ``Retry-After``
+  (or an exponential backoff), halves its request rate, and recovers the
+  rate gradually on success,
+* retries rate-limit and transient server errors itself; clients used under
+  a governor are built with the SDK's own retries disabled, so the two
+  layers do not multiply, and
+* keeps queue-depth and throttling metrics, see `rate_limit_metrics`.
+
+Limits come from `Configuration` (``requests_per_minute``,
+``tokens_per_minute``, ``max_concurrent_requests``, per model) or from
+``LLM_RATE_LIMITS``, a JSON object keyed by provider or ``provider/model``
+whose values are either requests per minute or an object with ``rpm``,
+``tpm`` and ``concurrency``, e.g.
+``{"openai": 500, "anthropic/claude-3-5-sonnet-latest": {"rpm": 50, "tpm": 40000}}``.
+Keys without limits are not throttled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# Rate multiplier bounds for adaptive backoff after 429 responses.
+MIN_RATE_SCALE = 0.1
+RECOVERY_STEP = 0.05
+RATE_LIMIT_RETRIES = int(os.environ.get("LLM_RATE_LIMIT_RETRIES", "3"))
+RATE_LIMIT_BACKOFF = float(os.environ.get("LLM_RATE_LIMIT_BACKOFF", "2.0"))
+# How often async callers re-check for a free in-flight slot.
+ASYNC_POLL_INTERVAL = 0.05
+
+
+class RateLimiter:
+    """Blocking token bucket refilled at ``per_minute`` units per minute.
+
+    The bucket holds at most ``burst`` units (by default one second's worth,
+    but at least one), so an idle limiter does not release a large burst.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None, clock=time.monotonic):
+        """Create a full bucket."""
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` units if available; otherwise return the seconds to wait.
+
+        Requests larger than the bucket are capped at its capacity, so they
+        wait for a full bucket instead of forever.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until ``amount`` units are available; return the time waited."""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(amount)
+            if delay == 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float) -> None:
+        """Debit (positive) or credit (negative) units after the fact."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+    def set_rate(self, per_minute: float) -> None:
+        """Change the refill rate, keeping the current fill level."""
+        with self._lock:
+            self._refill()
+            self.rate = per_minute / 60.0
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Quota for one provider or model; zero means unlimited."""
+
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    max_concurrency: int = 0
+
+    def __bool__(self) -> bool:
+        """Whether any limit is set."""
+        return bool(self.requests_per_minute or self.tokens_per_minute or self.max_concurrency)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Return True for provider errors that mean "slow down" (HTTP 429)."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Return True for provider errors worth retrying: 5xx, overload, connection."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return (isinstance(status, int) and status >= 500) or type(error).__name__ in (
+        "APIConnectionError",
+        "APITimeoutError",
+        "InternalServerError",
+        "OverloadedError",
+    )
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Return the ``Retry-After`` delay of a rate-limit error, if it has one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages: Sequence[Any]) -> int:
+    """Roughly estimate the prompt tokens of a message list (4 chars per token)."""
+    chars = 0
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", message)
+        chars += len(content if isinstance(content, str) else str(content))
+    return chars // 4 + 1
+
+
+class Governor:
+    """Rate limits, concurrency cap and backoff state for one provider or model."""
+
+    def __init__(self, key: str, limits: Limits, clock=time.monotonic):
+        """Create a governor enforcing ``limits``."""
+        self.key = key
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._scale = 1.0
+        self._blocked_until = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+        self.configure(limits)
+
+    def configure(self, limits: Limits) -> None:
+        """Replace the limits (a no-op if they are unchanged)."""
+        with self._cond:
+            if getattr(self, "limits", None) == limits:
+                return
+            self.limits = limits
+            self._requests = RateLimiter(limits.requests_per_minute) if limits.requests_per_minute else None
+            # A token budget must admit a whole prompt, so it holds a minute's worth.
+            self._tokens = (
+                RateLimiter(limits.tokens_per_minute, burst=limits.tokens_per_minute) if limits.tokens_per_minute else None
+            )
+            self._apply_scale()
+            self._cond.notify_all()
+
+    def _apply_scale(self) -> None:
+        if self._requests is not None:
+            self._requests.set_rate(self.limits.requests_per_minute * self._scale)
+
+    def _try_enter(self, estimated_tokens: int) -> Optional[float]:
+        """Take an in-flight slot and quota if possible (call with the lock held).
+
+        Returns 0 on success, otherwise the seconds to wait before trying
+        again, or None to wait for a request to finish.
+        """
+        pause = self._blocked_until - self._clock()
+        if pause > 0:
+            return pause
+        if self.limits.max_concurrency and self.in_flight >= self.limits.max_concurrency:
+            return None
+        if self._requests is not None:
+            delay = self._requests.try_acquire()
+            if delay:
+                return delay
+        if self._tokens is not None and estimated_tokens:
+            delay = self._tokens.try_acquire(estimated_tokens)
+            if delay:
+                if self._requests is not None:
+                    self._requests.adjust(-1)  # give the request back
+                return delay
+        self.in_flight += 1
+        self.requests += 1
+        return 0.0
+
+    def _queued(self, started: float) -> None:
+        self.waiting -= 1
+        self.wait_time += self._clock() - started
+
+    def _leave(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, estimated_tokens: int = 0) -> Iterator[None]:
+        """Wait for capacity, then hold one in-flight request for the block."""
+        started = self._clock()
+        with self._cond:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            while (delay := self._try_enter(estimated_tokens)) != 0:
+                self._cond.wait(delay)
+            self._queued(started)
+        try:
+            yield
+        finally:
+            self._leave()
+
+    @asynccontextmanager
+    async def aslot(self, estimated_tokens: int = 0) -> AsyncIterator[None]:
+        """Async counterpart of `slot`; waits without blocking the event loop."""
+        started = self._clock()
+        with self._cond:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_enter(estimated_tokens)
+                    if delay == 0:
+                        break
+                await asyncio.sleep(ASYNC_POLL_INTERVAL if delay is None else delay)
+        finally:
+            with self._cond:
+                self._queued(started)
+        try:
+            yield
+        finally:
+            self._leave()
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket with the usage the provider reported."""
+        if self._tokens is not None and actual_tokens:
+            self._tokens.adjust(actual_tokens - estimated_tokens)
+
+    def on_rate_limited(self, delay: float) -> None:
+        """Pause every request for ``delay`` seconds and halve the request rate."""
+        with self._cond:
+            self.throttled += 1
+            self._blocked_until = max(self._blocked_until, self._clock() + delay)
+            self._scale = max(MIN_RATE_SCALE, self._scale / 2)
+            self._apply_scale()
+
+    def on_success(self) -> None:
+        """Recover the request rate gradually after backoff."""
+        if self._scale < 1.0:
+            with self._cond:
+                self._scale = min(1.0, self._scale + RECOVERY_STEP)
+                self._apply_scale()
+
+    def _after_error(self, error: Exception, attempt: int, retries: int) -> float:
+        """Return the seconds to wait before retrying, or re-raise ``error``."""
+        if attempt == retries:
+            raise error
+        if is_rate_limit_error(error):
+            # The pause applies to every caller; `slot` waits it out.
+            self.on_rate_limited(retry_after(error) or RATE_LIMIT_BACKOFF * (2**attempt))
+            return 0.0
+        if is_transient_error(error):
+            return RATE_LIMIT_BACKOFF * (2**attempt)
+        raise error
+
+    def _after_success(self, result: Any, estimated_tokens: int) -> None:
+        usage = getattr(result, "usage_metadata", None) or {}
+        self.record_usage(estimated_tokens, usage.get("total_tokens", 0))
+        self.on_success()
+
+    def call(self, fn: Callable[[], T], estimated_tokens: int = 0, retries: int = RATE_LIMIT_RETRIES) -> T:
+        """Run ``fn`` under the limits, retrying rate-limit and transient errors."""
+        for attempt in range(retries + 1):
+            try:
+                with self.slot(estimated_tokens):
+                    result = fn()
+            except Exception as e:
+                time.sleep(self._after_error(e, attempt, retries))
+                continue
+            self._after_success(result, estimated_tokens)
+            return result
+        raise AssertionError("unreachable")
+
+    async def acall(
+        self, fn: Callable[[], Awaitable[T]], estimated_tokens: int = 0, retries: int = RATE_LIMIT_RETRIES
+    ) -> T:
+        """Async counterpart of `call`."""
+        for attempt in range(retries + 1):
+            try:
+                async with self.aslot(estimated_tokens):
+                    result = await fn()
+            except Exception as e:
+                await asyncio.sleep(self._after_error(e, attempt, retries))
+                continue
+            self._after_success(result, estimated_tokens)
+            return result
+        raise AssertionError("unreachable")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, throughput and throttling."""
+        with self._cond:
+            return {
+                "limits": {
+                    "requests_per_minute": self.limits.requests_per_minute,
+                    "tokens_per_minute": self.limits.tokens_per_minute,
+                    "max_concurrency": self.limits.max_concurrency,
+                },
+                "rate_scale": round(self._scale, 3),
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "wait_time": round(self.wait_time, 3),
+            }
+
+
+def provider_of(model: str) -> str:
+    """Return the provider part of a ``provider/model-name`` string."""
+    return model.split("/", maxsplit=1)[0] if "/" in model else model
+
+
+def _parse_limits(value: Any) -> Limits:
+    if isinstance(value, dict):
+        return Limits(
+            requests_per_minute=float(value.get("rpm", 0)),
+            tokens_per_minute=float(value.get("tpm", 0)),
+            max_concurrency=int(value.get("concurrency", 0)),
+        )
+    return Limits(requests_per_minute=float(value))
+
+
+def _load_limits() -> Dict[str, Limits]:
+    try:
+        return {k: _parse_limits(v) for k, v in json.loads(os.environ.get("LLM_RATE_LIMITS", "{}")).items()}
+    except (ValueError, TypeError, AttributeError):
+        return {}
+
+
+_governors: Dict[str, Governor] = {key: Governor(key, limits) for key, limits in _load_limits().items() if limits}
+_governors_lock = threading.Lock()
+
+
+def configure_rate_limit(
+    key: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+) -> None:
+    """Set the limits of a provider or ``provider/model`` key; no limits removes it."""
+    limits = Limits(requests_per_minute or 0, tokens_per_minute or 0, max_concurrency or 0)
+    with _governors_lock:
+        if not limits:
+            _governors.pop(key, None)
+        elif key in _governors:
+            _governors[key].configure(limits)
+        else:
+            _governors[key] = Governor(key, limits)
+
+
+def get_governor(model: str, limits: Optional[Limits] = None) -> Optional[Governor]:
+    """Return the governor for ``model``.
+
+    ``limits`` (from `Configuration`) apply to the model itself. Otherwise a
+    governor configured for the model, then for its provider, is used.
+    """
+    with _governors_lock:
+        if limits:
+            governor = _governors.get(model)
+            if governor is None:
+                governor = _governors[model] = Governor(model, limits)
+            else:
+                governor.configure(limits)
+            return governor
+        return _governors.get(model) or _governors.get(provider_of(model))
+
+
+def rate_limit_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return the metrics of every governor, keyed by provider or model."""
+    with _governors_lock:
+        governors = list(_governors.values())
+    return {g.key: g.metrics() for g in governors}
@@ -0,0 +1,225 @@
+"""Shared, cached web search client behind the agent's ``search`` tool.
+
+Concurrent agents often issue the same query. `SearchClient` answers them
+from an in-memory LRU and an on-disk cache (both expiring after a TTL), and
+runs at most one backend request per query at a time: callers that ask for a
+query already in flight, from any thread or event loop, wait for that
+request instead of repeating it.
+
+The backend is pluggable. `TavilyBackend` is the default; `LocalSearchBackend`
+answers from a mapping or function so tests and benchmarks can run without
+network access or API keys::
+
+    set_search_backend(LocalSearchBackend({"tailwind cdn": {"results": [...]}}))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Mapping, Optional, Protocol, Tuple, Union
+
+from react_agent.llm_cache import ResponseCache
+
+SEARCH_CACHE_DIR = os.environ.get("SEARCH_CACHE_DIR", ".cache/search")
+# Seconds a result stays fresh; 0 disables the cache (in-flight dedup remains).
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "256"))
+SEARCH_CACHE_MAX_BYTES = int(os.environ.get("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+class SearchBackend(Protocol):
+    """Something that can run a web search."""
+
+    name: str
+
+    async def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        """Return the results for ``query``."""
+        ...
+
+
+class TavilyBackend:
+    """Search with Tavily, reusing one wrapper per result count."""
+
+    name = "tavily"
+
+    def __init__(self) -> None:
+        """Create the backend; the Tavily client is built on first use."""
+        self._wrappers: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def _wrapper(self, max_results: int) -> Any:
+        with self._lock:
+            if max_results not in self._wrappers:
+                from langchain_tavily import TavilySearch  # type: ignore[import-not-found]
+
+                self._wrappers[max_results] = TavilySearch(max_results=max_results)
+            return self._wrappers[max_results]
+
+    async def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        """Run ``query`` through the Tavily API."""
+        return await self._wrapper(max_results).ainvoke({"query": query})
+
+
+class LocalSearchBackend:
+    """Offline stand-in answering from a mapping or a function of the query."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        results: Union[Mapping[str, Dict[str, Any]], Callable[[str], Dict[str, Any]]],
+        latency: float = 0.0,
+    ):
+        """Answer queries from ``results``, after ``latency`` seconds."""
+        self.results = results
+        self.latency = latency
+        self.calls = 0
+
+    async def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        """Return the canned results for ``query`` (empty if unknown)."""
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if callable(self.results):
+            return self.results(query)
+        return self.results.get(query, {"query": query, "results": []})
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.split())
+
+
+class SearchClient:
+    """Search backend wrapped with a TTL cache and in-flight deduplication."""
+
+    def __init__(
+        self,
+        backend: Optional[SearchBackend] = None,
+        ttl: float = SEARCH_CACHE_TTL,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        disk: Optional[ResponseCache] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Create a client for ``backend``, optionally persisting to ``disk``."""
+        self.backend = backend or TavilyBackend()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk = disk
+        self._clock = clock
+        self._memory: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+
+    def key(self, query: str, max_results: int) -> str:
+        """Hash what determines a search's results."""
+        payload = json.dumps([self.backend.name, _normalize(query), max_results], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        # Caller holds the lock
+        now = self._clock()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            del self._memory[key]
+        if self.disk is None:
+            return None
+        raw = self.disk.get(key)
+        if raw is None:
+            return None
+        stored = json.loads(raw)
+        if stored["expires"] <= now:
+            return None
+        self._remember(key, stored["expires"], stored["result"])
+        self.stats["disk_hits"] += 1
+        return stored["result"]
+
+    def _remember(self, key: str, expires: float, result: Dict[str, Any]) -> None:
+        self._memory[key] = (expires, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        if self.ttl <= 0:
+            return
+        expires = self._clock() + self.ttl
+        with self._lock:
+            self._remember(key, expires, result)
+        if self.disk is not None:
+            self.disk.set(key, json.dumps({"expires": expires, "result": result}, ensure_ascii=False))
+
+    async def search(self, query: str, max_results: int = 10) -> Dict[str, Any]:
+        """Return the results for ``query``, from cache when still fresh."""
+        key = self.key(query, max_results)
+        with self._lock:
+            cached = self._cached(key) if self.ttl > 0 else None
+            if cached is not None:
+                return cached
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return await asyncio.wrap_future(pending)
+
+        try:
+            result = await self.backend.search(_normalize(query), max_results)
+        except BaseException as e:
+            # Waiters share the failure (or cancellation) instead of hanging
+            pending.set_exception(e)
+            raise
+        else:
+            self._store(key, result)
+            pending.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every cached result, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_client: Optional[SearchClient] = None
+_client_lock = threading.Lock()
+
+
+def get_search_client() -> SearchClient:
+    """Return the process-wide search client configured from the environment."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SearchClient(disk=ResponseCache(SEARCH_CACHE_DIR, SEARCH_CACHE_MAX_BYTES))
+        return _client
+
+
+def set_search_backend(backend: SearchBackend, **options: Any) -> SearchClient:
+    """Replace the shared client with one using ``backend`` and return it.
+
+    Keyword arguments (``ttl``, ``max_entries``, ``disk``...) are passed to
+    `SearchClient`; no disk cache is used unless one is given.
+    """
+    global _client
+    with _client_lock:
+        _client = SearchClient(backend, **options)
+        return _client
@@ -0,0 +1,208 @@
+"""Reusable specification/design/HTML skeletons keyed by task shape.
+
+Most uploads are one of a handful of task types with familiar input and
+output schemas, yet the specification, design and HTML stages are rerun for
+each. After a fresh run their outputs are stored as a `Skeleton`, indexed by
+the task type and the *shape* of its input/output formats (field paths and
+declared types, not schema descriptions or examples). A later task of the
+same type with the same or a similar shape starts from the stored design and
+HTML, and only JS injection, styling and checking run. The specification is
+reused too when the task's description and visualization requirements match
+the skeleton's; otherwise it is written afresh for the new task.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from react_agent.yaml_extracter import Task
+
+DEFAULT_SKELETON_DIR = os.environ.get("SKELETON_DIR", ".cache/skeletons")
+MIN_SIMILARITY = float(os.environ.get("SKELETON_MIN_SIMILARITY", "0.8"))
+
+# Keys that describe a schema in prose rather than define its shape.
+_PROSE_KEYS = {"description", "example", "examples", "encoding", "default"}
+
+
+def skeletons_enabled() -> bool:
+    """Return False when skeleton reuse is turned off through ``SKELETONS_DISABLED``."""
+    return os.environ.get("SKELETONS_DISABLED", "").lower() not in {"1", "true", "yes"}
+
+
+def _normalize_type(task_type: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", task_type.lower()))
+
+
+def schema_features(schema: Any, prefix: str = "") -> FrozenSet[str]:
+    """Flatten a format schema into ``path:type`` features.
+
+    Prose such as descriptions and examples is ignored, so two tasks that
+    exchange the same JSON structure have the same features.
+    """
+    features = set()
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key in _PROSE_KEYS:
+                continue
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if key == "type" and not isinstance(value, (dict, list)):
+                features.add(f"{prefix}:{str(value).strip().lower()}")
+            else:
+                features.add(path)
+                features |= schema_features(value, path)
+    elif isinstance(schema, list):
+        for item in schema:
+            features |= schema_features(item, f"{prefix}[]")
+    return frozenset(features)
+
+
+def description_digest(task: Task) -> str:
+    """Hash the task's description and ``visualize`` section, ignoring whitespace.
+
+    Both decide what the specification asks the page to show (labels, charts,
+    per-item details), so a skeleton's specification is only reused for a
+    task with the same digest.
+    """
+    section = task.get("task_description.visualize")
+    text = json.dumps([task.description, section], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class Skeleton:
+    """Outputs of the specification, design and HTML stages for one task shape."""
+
+    task_type: str
+    input_features: List[str]
+    output_features: List[str]
+    specs: Tuple[str, str, str]
+    design: str
+    html: str
+    description: str = ""
+    source: Optional[str] = None
+    key: str = field(default="", compare=False)
+
+    def similarity(self, task: Task) -> float:
+        """Score how well this skeleton fits ``task``, from 0 to 1.
+
+        The task type must match; the score is then the mean Jaccard
+        similarity of the input and output schema features.
+        """
+        if _normalize_type(self.task_type) != _normalize_type(task.type):
+            return 0.0
+        inputs = _jaccard(frozenset(self.input_features), schema_features(task.input_format))
+        outputs = _jaccard(frozenset(self.output_features), schema_features(task.output_format))
+        return (inputs + outputs) / 2
+
+    def matches_description(self, task: Task) -> bool:
+        """Whether the stored specification was written for ``task``'s description."""
+        return self.description == description_digest(task)
+
+
+def skeleton_key(task: Task) -> str:
+    """Hash the task type and schema shape that a skeleton is indexed by."""
+    payload = json.dumps(
+        {
+            "type": _normalize_type(task.type),
+            "input": sorted(schema_features(task.input_format)),
+            "output": sorted(schema_features(task.output_format)),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SkeletonStore:
+    """Directory of skeletons, one JSON file per task shape."""
+
+    def __init__(self, directory: str | os.PathLike[str] = DEFAULT_SKELETON_DIR):
+        """Create a store rooted at ``directory``; files are read lazily."""
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Skeleton]] = None
+
+    def _load(self) -> Dict[str, Skeleton]:
+        if self._index is None:
+            self._index = {}
+            for path in sorted(self.directory.glob("*.json")):
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                    data["specs"] = tuple(data["specs"])
+                    self._index[path.stem] = Skeleton(**{**data, "key": path.stem})
+                except (OSError, ValueError, TypeError, KeyError):
+                    continue
+        return self._index
+
+    def __len__(self) -> int:
+        """Return the number of stored skeletons."""
+        with self._lock:
+            return len(self._load())
+
+    def lookup(self, task: Task, min_similarity: float = MIN_SIMILARITY) -> Optional[Tuple[Skeleton, float]]:
+        """Return the best skeleton for ``task`` and its score, if any is close enough."""
+        key = skeleton_key(task)
+        with self._lock:
+            index = self._load()
+            if key in index:
+                return index[key], 1.0
+            candidates = list(index.values())
+        scored = [(skeleton.similarity(task), skeleton) for skeleton in candidates]
+        scored = [(score, skeleton) for score, skeleton in scored if score and score >= min_similarity]
+        if not scored:
+            return None
+        score, best = max(scored, key=lambda pair: pair[0])
+        return best, score
+
+    def put(self, task: Task, specs: Tuple[str, str, str], design: str, html: str) -> Skeleton:
+        """Store the early-stage outputs for ``task``, replacing its shape's entry."""
+        key = skeleton_key(task)
+        skeleton = Skeleton(
+            task_type=task.type,
+            input_features=sorted(schema_features(task.input_format)),
+            output_features=sorted(schema_features(task.output_format)),
+            specs=tuple(specs),
+            design=design,
+            html=html,
+            description=description_digest(task),
+            source=task.source,
+            key=key,
+        )
+        data = asdict(skeleton)
+        del data["key"]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.directory / f"{key}.json")
+
+        with self._lock:
+            self._load()[key] = skeleton
+        return skeleton
+
+
+_store: Optional[SkeletonStore] = None
+_store_lock = threading.Lock()
+
+
+def get_skeleton_store() -> SkeletonStore:
+    """Return the process-wide skeleton store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SkeletonStore()
+        return _store
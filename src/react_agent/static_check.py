@@ -0,0 +1,226 @@
+"""Fast local checks on generated HTML before the LLM checker runs.
+
+The checker's LLM stages resend the whole page three times. Most of what
+they catch in practice is mechanical: a script that does not parse, a
+``getElementById`` for an element that was renamed during styling, or a
+``fetch`` to the wrong endpoint. `static_check` finds those locally in
+milliseconds, and the checker passes them on as confirmed problems next to the
+LLM's own risk list.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, Optional, Set, Tuple
+
+# Elements that never have a closing tag.
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+# Syntax newer than ES2017, which the bundled parser (esprima 4) rejects.
+# Errors on lines using it are not reported, to avoid sending false positives
+# to the fixer.
+_UNSUPPORTED_SYNTAX = re.compile(
+    r"""\?\.(?!\d) | \?\? | \|\|= | &&=     # optional chaining, nullish, logical assignment
+    | \bcatch\s*\{                      # optional catch binding
+    | \bfor\s+await\b                   # async iteration
+    | \#[A-Za-z_$] | \bstatic\s*\{        # private members, static blocks
+    | \d_\d | \b\d+n\b | \bimport\.meta\b  # numeric separators, BigInt, import.meta
+    """,
+    re.VERBOSE,
+)
+# A class field declaration, e.g. ``count = 0;`` or ``static items;``.
+_CLASS_FIELD = re.compile(r"^\s*(?:static\s+)?[A-Za-z_$][\w$]*\s*(?:=(?![=>])|;)")
+_CLASS = re.compile(r"\bclass\s+[A-Za-z_$]")
+
+_ID_LOOKUP = re.compile(r"""getElementById\(\s*(['"`])([^'"`$]+)\1\s*\)""")
+_SELECTOR_LOOKUP = re.compile(r"""querySelector(?:All)?\(\s*(['"`])([^'"`$]+)\1\s*\)""")
+_SIMPLE_ID = re.compile(r"^#([\w-]+)$")
+_SIMPLE_CLASS = re.compile(r"^\.([\w-]+)$")
+# IDs and classes assigned by scripts (templates, createElement, classList).
+_DYNAMIC_ID = re.compile(r"""(?:\bid\s*=\s*\\?|\.id\s*=\s*)(['"`])([\w-]+)""")
+_DYNAMIC_CLASS = re.compile(r"""(?:\bclass(?:Name)?\s*=\s*\\?|classList\.(?:add|toggle)\(\s*)(['"`])([^'"`$]+)""")
+_FETCH_URL = re.compile(r"""fetch\(\s*(['"`])(https?://[^'"`$]+)\1""")
+
+
+@dataclass
+class Finding:
+    """A single problem found in the page."""
+
+    kind: str
+    message: str
+    line: Optional[int] = None
+
+    def __str__(self) -> str:
+        """Render the finding as one report line."""
+        where = f" (line {self.line})" if self.line else ""
+        return f"[{self.kind}]{where} {self.message}"
+
+
+@dataclass
+class StaticReport:
+    """All findings for one page."""
+
+    findings: List[Finding] = field(default_factory=list)
+
+    @property
+    def clean(self) -> bool:
+        """Whether no problems were found."""
+        return not self.findings
+
+    def format(self) -> str:
+        """Render the findings as a bullet list for the LLM checker."""
+        return "\n".join(f"- {f}" for f in self.findings)
+
+
+class _PageParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.ids: List[Tuple[str, int]] = []
+        self.classes: Set[str] = set()
+        self.scripts: List[Tuple[str, int, bool]] = []
+        self.findings: List[Finding] = []
+        self._stack: List[Tuple[str, int]] = []
+        self._script_start: Optional[int] = None
+        self._script_is_module = False
+        self._script_parts: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        line = self.getpos()[0]
+        attributes = dict(attrs)
+        if attributes.get("id"):
+            self.ids.append((attributes["id"] or "", line))
+        self.classes.update((attributes.get("class") or "").split())
+        if tag == "script" and not attributes.get("src") and attributes.get("type") in (None, "", "text/javascript", "module"):
+            self._script_start = line
+            self._script_is_module = attributes.get("type") == "module"
+            self._script_parts = []
+        if tag not in VOID_ELEMENTS:
+            self._stack.append((tag, line))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self._stack and self._stack[-1][0] == tag:
+            self._stack.pop()
+
+    def handle_endtag(self, tag: str) -> None:
+        line = self.getpos()[0]
+        if tag == "script" and self._script_start is not None:
+            self.scripts.append(("".join(self._script_parts), self._script_start, self._script_is_module))
+            self._script_start = None
+        if tag in VOID_ELEMENTS:
+            return
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            self.findings.append(Finding("html", f"Closing </{tag}> has no matching opening tag", line))
+            return
+        while self._stack:
+            open_tag, open_line = self._stack.pop()
+            if open_tag == tag:
+                break
+            if open_tag not in ("p", "li", "td", "th", "tr", "option", "dt", "dd"):
+                self.findings.append(Finding("html", f"<{open_tag}> is not closed before </{tag}>", open_line))
+
+    def handle_data(self, data: str) -> None:
+        if self._script_start is not None:
+            self._script_parts.append(data)
+
+    def close(self) -> None:
+        super().close()
+        for tag, line in self._stack:
+            if tag not in ("html", "body", "head", "p", "li"):
+                self.findings.append(Finding("html", f"<{tag}> is never closed", line))
+
+
+def strip_code_fence(html_code: str) -> str:
+    """Remove a surrounding Markdown code fence, as models often add one."""
+    text = html_code.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text
+
+
+def _parser_cannot_judge(source: str, offending: str, is_module: bool) -> bool:
+    """Whether an error on ``offending`` may come from syntax esprima lacks."""
+    if _UNSUPPORTED_SYNTAX.search(offending):
+        return True
+    if _CLASS.search(source) and _CLASS_FIELD.match(offending):
+        return True
+    # Top-level await is valid in modules since ES2022.
+    return is_module and re.search(r"\bawait\b", offending) is not None
+
+
+def _check_script(source: str, start_line: int, is_module: bool) -> Optional[Finding]:
+    # esprima takes about half a second to import; load it on first use.
+    try:
+        import esprima
+        from esprima.error_handler import Error as _JsSyntaxError
+    except ImportError:  # pragma: no cover - the syntax check is skipped
+        return None
+    try:
+        if is_module:
+            esprima.parseModule(source)
+        else:
+            esprima.parseScript(source)
+    except _JsSyntaxError as e:
+        lines = source.splitlines()
+        line_no = getattr(e, "lineNumber", 1) or 1
+        offending = lines[line_no - 1] if 0 < line_no <= len(lines) else ""
+        if _parser_cannot_judge(source, offending, is_module):
+            return None
+        return Finding("js-syntax", str(e.message), start_line + line_no - 1)
+    return None
+
+
+def static_check(html_code: str, api_url: Optional[str] = None) -> StaticReport:
+    """Check a generated page for structural, syntax and wiring problems.
+
+    Args:
+        html_code: The full HTML document, optionally wrapped in a code fence.
+        api_url: The model endpoint the page is expected to call.
+    """
+    parser = _PageParser()
+    parser.feed(strip_code_fence(html_code))
+    parser.close()
+    report = StaticReport(list(parser.findings))
+
+    seen_ids: Set[str] = set()
+    for element_id, line in parser.ids:
+        if element_id in seen_ids:
+            report.findings.append(Finding("html", f'Duplicate id="{element_id}"', line))
+        seen_ids.add(element_id)
+
+    script = "\n".join(source for source, _, _ in parser.scripts)
+    for source, start_line, is_module in parser.scripts:
+        finding = _check_script(source, start_line, is_module)
+        if finding is not None:
+            report.findings.append(finding)
+
+    known_ids = seen_ids | {element_id for _, element_id in _DYNAMIC_ID.findall(script)}
+    known_classes = set(parser.classes)
+    for _, classes in _DYNAMIC_CLASS.findall(script):
+        known_classes.update(classes.split())
+
+    for _, element_id in _ID_LOOKUP.findall(script):
+        if element_id not in known_ids:
+            report.findings.append(Finding("selector", f"getElementById('{element_id}') matches no element"))
+    for _, selector in _SELECTOR_LOOKUP.findall(script):
+        selector = selector.strip()
+        if (m := _SIMPLE_ID.match(selector)) and m.group(1) not in known_ids:
+            report.findings.append(Finding("selector", f"querySelector('{selector}') matches no element id"))
+        elif (m := _SIMPLE_CLASS.match(selector)) and m.group(1) not in known_classes:
+            report.findings.append(Finding("selector", f"querySelector('{selector}') matches no element class"))
+
+    if api_url:
+        for _, url in _FETCH_URL.findall(script):
+            if url.rstrip("/") != api_url.rstrip("/"):
+                report.findings.append(Finding("api", f"fetch() calls {url}, expected the model API {api_url}"))
+        if api_url.rstrip("/") not in script:
+            report.findings.append(Finding("api", f"The model API {api_url} is never referenced by the page's scripts"))
+
+    return report
@@ -1,16 +1,16 @@
 """This module provides example tools for web scraping and search functionality.
 
-It includes a basic Tavily search function (as an example)
+It includes a basic web search function, backed by Tavily through the shared
+cached client in `react_agent.search`.
 
 These tools are intended as free examples to get started. For production use,
 consider implementing more robust and specialized tools tailored to your needs.
 """
 
-from typing import Any, Callable, List, Optional, cast
-
-from langchain_tavily import TavilySearch  # type: ignore[import-not-found]
+from typing import Any, Callable, List, Optional
 
 from react_agent.configuration import Configuration
+from react_agent.search import get_search_client
 
 
 async def search(query: str) -> Optional[dict[str, Any]]:
@@ -20,9 +20,11 @@ async def search(query: str) -> Optional[dict[str, Any]]:
     to provide comprehensive, accurate, and trusted results. It's particularly useful
     for answering questions about current events.
     """
+    # The docstring is the tool description the model reads, so implementation
+    # notes live here: identical queries are answered from a shared cache and
+    # never sent twice at the same time.
     configuration = Configuration.from_context()
-    wrapped = TavilySearch(max_results=configuration.max_search_results)
-    return cast(dict[str, Any], await wrapped.ainvoke({"query": query}))
+    return await get_search_client().search(query, configuration.max_search_results)
 
 
 TOOLS: List[Callable[..., Any]] = [search]
@@ -1,19 +1,39 @@
 """Utility & helper functions."""
 
-from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import BaseMessage
+from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
-from typing import Any, Dict, List, Optional, Union
-from langchain_core.language_models import BaseChatModel
-from dotenv import load_dotenv
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from .yaml_extracter import extract_info, extract_model_input
-from react_agent import graph
+import httpx
 import requests
-import json
+from dotenv import load_dotenv
+
+from .http_client import CircuitOpenError, get_http_client
+from .static_check import strip_code_fence
+from .yaml_extracter import Task, load_task
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage
 
 
 def get_message_text(msg: BaseMessage) -> str:
@@ -31,9 +51,13 @@ def get_message_text(msg: BaseMessage) -> str:
 # Load environment variables from .env file
 load_dotenv()
 
-def load_chat_model(model_name: str) -> BaseChatModel:
-    """Load a chat model based on the model name."""
+def load_chat_model(model_name: str, temperature: float = 1, max_retries: Optional[int] = None) -> BaseChatModel:
+    """Load a chat model based on the model name.
+
+    ``max_retries`` overrides the provider SDK's own retry count.
+    """
     provider, model = model_name.split("/", 1)
+    retries = {} if max_retries is None else {"max_retries": max_retries}
     
     if provider == "openai":
         from langchain_openai import ChatOpenAI
@@ -41,17 +65,72 @@ def load_chat_model(model_name: str) -> BaseChatModel:
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
-        return ChatOpenAI(model=model, temperature=1, api_key=api_key)
+        return ChatOpenAI(model=model, temperature=temperature, api_key=api_key, **retries)
     elif provider == "anthropic":
         from langchain_anthropic import ChatAnthropic
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
-        return ChatAnthropic(model=model, temperature=1, api_key=api_key)
+        return ChatAnthropic(model=model, temperature=temperature, api_key=api_key, **retries)
     # Add other providers as needed
     
     raise ValueError(f"Unsupported model provider: {provider}")
 
+
+# Chat model clients keyed by (provider, model, temperature, tool names).
+# Each client owns its HTTP connection pool, so reusing them across graph
+# invocations and threads keeps connections warm between LLM turns.
+CHAT_MODEL_CACHE_SIZE = int(os.environ.get("CHAT_MODEL_CACHE_SIZE", "16"))
+
+_chat_models: OrderedDict[Tuple[Hashable, ...], Any] = OrderedDict()
+_chat_models_lock = threading.Lock()
+
+
+def _tool_key(tools: Sequence[Any]) -> Tuple[str, ...]:
+    return tuple(
+        getattr(tool, "name", None) or getattr(tool, "__name__", repr(tool))
+        for tool in tools
+    )
+
+
+def get_chat_model(
+    model_name: str,
+    *,
+    temperature: float = 1,
+    tools: Optional[Sequence[Callable[..., Any]]] = None,
+    max_retries: Optional[int] = None,
+) -> Any:
+    """Return a shared chat model client, optionally bound to ``tools``.
+
+    Clients are built once per (provider, model, temperature, tool set,
+    retry count) and
+    kept in a bounded LRU registry shared by every thread in the process. The
+    least recently used client is evicted once ``CHAT_MODEL_CACHE_SIZE`` is
+    exceeded.
+    """
+    provider, model = model_name.split("/", 1)
+    key = (provider, model, temperature, _tool_key(tools or ()), max_retries)
+
+    with _chat_models_lock:
+        client = _chat_models.get(key)
+        if client is not None:
+            _chat_models.move_to_end(key)
+            return client
+
+        client = load_chat_model(model_name, temperature=temperature, max_retries=max_retries)
+        if tools:
+            client = client.bind_tools(tools)
+        _chat_models[key] = client
+        while len(_chat_models) > CHAT_MODEL_CACHE_SIZE:
+            _chat_models.popitem(last=False)
+        return client
+
+
+def clear_chat_model_cache() -> None:
+    """Drop every cached chat model client."""
+    with _chat_models_lock:
+        _chat_models.clear()
+
 def extract_description(yaml):
     return yaml['task_description']['description']
 
@@ -109,7 +188,7 @@ def generate_fake_data_with_openai(yaml_description: dict, num_samples: int = 1,
         prompt = create_data_generation_prompt(format_info, num_samples)
         
         # Load OpenAI model
-        chat_model = load_chat_model(model_name)
+        chat_model = get_chat_model(model_name)
         
         # Generate data
         from langchain_core.messages import HumanMessage
@@ -148,6 +227,12 @@ def extract_format_from_yaml(yaml_description: dict) -> str:
 
 def create_data_generation_prompt(format_info: str, num_samples: int) -> str:
     """Create a prompt for OpenAI to generate fake data."""
+    if num_samples > 1:
+        return f"""
+Create a JSON array of {num_samples} different fake inputs to fetch to with the following format, return data only:
+input_format:
+{format_info}
+"""
     prompt = f"""
 Create a fake input to fetch to with the following format, return data only:
 input_format:
@@ -158,42 +243,205 @@ input_format:
 
 
 
-def get_model_output(yaml_file_path: str):
+SAMPLE_SYSTEM_PROMPT = "You are a JSON input generator for machine learning APIs. You will receive an `input_format` specification describing " \
+    "the expected structure of a JSON input."\
+    "Your job is to generate a valid sample JSON input based on the given format."\
+    "Guidelines:"\
+    "- Only return the JSON input. Do not include explanations or descriptions."\
+    "- Fill in realistic and coherent dummy data for each field, based on field names and types."\
+    "- Always match the required structure and types exactly."\
+    "- Return JSON in compact format (single-line, no comments, no code-style string concatenation)."\
+    "Never repeat the schema or format. Only output the resulting JSON input."
+
+ERROR_EXAMPLE = ("ERROR - UNKNOWN", "ERROR - UNKNOWN")
+
+
+def _sample_request(task: Task, num_samples: int) -> Tuple[str, str]:
+    """Return the user prompt and stage name for generating sample inputs."""
+    if num_samples <= 1:
+        user_prompt = "Based on the following input_format schema, generate a valid JSON input:"\
+            f"{task.input_format}"
+        return user_prompt, "sample_input"
+    user_prompt = f"Based on the following input_format schema, generate a JSON array of {num_samples} "\
+        "valid and mutually different JSON inputs, covering varied and edge-case values:"\
+        f"{task.input_format}"
+    return user_prompt, "sample_input_batch"
+
+
+def _parse_samples(text: str, num_samples: int) -> List[Any]:
+    if num_samples <= 1:
+        return [json.loads(text)]
+    samples = json.loads(strip_code_fence(text))
+    if not isinstance(samples, list):
+        samples = [samples]
+    return samples[:num_samples]
+
+
+def _valid_samples(text: str, num_samples: int) -> bool:
+    try:
+        return bool(_parse_samples(text, num_samples))
+    except ValueError:
+        return False
+
+
+def generate_sample_inputs(task: Union[Task, str], num_samples: int = 1, use_cache: bool = True) -> List[Any]:
+    """Generate ``num_samples`` sample API inputs for a task in one LLM call."""
+    from react_agent.llm import invoke_llm
+
+    user_prompt, stage = _sample_request(load_task(task), num_samples)
+    text = invoke_llm(SAMPLE_SYSTEM_PROMPT, user_prompt, stage=stage, use_cache=use_cache,
+                      validate=lambda text: _valid_samples(text, num_samples))
+    return _parse_samples(text, num_samples)
+
+
+async def agenerate_sample_inputs(task: Union[Task, str], num_samples: int = 1, use_cache: bool = True) -> List[Any]:
+    """Async counterpart of `generate_sample_inputs`."""
+    from react_agent.llm import ainvoke_llm
+
+    user_prompt, stage = _sample_request(load_task(task), num_samples)
+    text = await ainvoke_llm(SAMPLE_SYSTEM_PROMPT, user_prompt, stage=stage, use_cache=use_cache,
+                             validate=lambda text: _valid_samples(text, num_samples))
+    return _parse_samples(text, num_samples)
+
+
+def _probe_result(api: str, payload: Any, status_code: int, decode: Callable[[], Any]) -> Optional[Any]:
+    if status_code != 200:
+        logger.warning("Probe of %s with %.200s returned %s", api, json.dumps(payload), status_code)
+        return None
+    try:
+        return decode()
+    except ValueError as e:
+        logger.warning("Probe of %s with %.200s returned invalid JSON: %s", api, json.dumps(payload), e)
+        return None
+
+
+def probe_model_api(api: str, inputs: Sequence[Any], concurrency: int = 4) -> List[Optional[Any]]:
+    """POST every input to the model API, at most ``concurrency`` at a time.
+
+    Returns the decoded JSON response for each input, or None where the call
+    failed.
     """
-        - return: input: str, output: str, ("ERROR - UNKNOWN", "ERROR - UNKNOWN") if error
+    client = get_http_client()
+
+    def _probe(payload: Any) -> Optional[Any]:
+        try:
+            response = client.post_json(api, payload)
+        except (requests.RequestException, CircuitOpenError) as e:
+            logger.warning("Probe of %s with %.200s failed: %s", api, json.dumps(payload), e)
+            return None
+        return _probe_result(api, payload, response.status_code, response.json)
+
+    if len(inputs) == 1:
+        return [_probe(inputs[0])]
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(inputs)))) as pool:
+        return list(pool.map(_probe, inputs))
+
+
+async def aprobe_model_api(api: str, inputs: Sequence[Any], concurrency: int = 4) -> List[Optional[Any]]:
+    """Async counterpart of `probe_model_api`, sharing the pooled async client."""
+    client = get_http_client()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _probe(payload: Any) -> Optional[Any]:
+        async with semaphore:
+            try:
+                response = await client.apost_json(api, payload)
+            except (httpx.HTTPError, CircuitOpenError) as e:
+                logger.warning("Probe of %s with %.200s failed: %s", api, json.dumps(payload), e)
+                return None
+        return _probe_result(api, payload, response.status_code, response.json)
+
+    return list(await asyncio.gather(*(_probe(payload) for payload in inputs)))
+
+
+def _shape(value: Any) -> Any:
+    """Structural signature of a JSON value: keys and leaf types, not values."""
+    if isinstance(value, dict):
+        return tuple((k, _shape(v)) for k, v in sorted(value.items()))
+    if isinstance(value, list):
+        return ("list", _shape(value[0]) if value else None)
+    return type(value).__name__
+
+
+def _first_string(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        return value
+    children = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+    for child in children:
+        found = _first_string(child)
+        if found is not None:
+            return found
+    return None
+
+
+def select_representative(pairs: Sequence[Tuple[Any, Any]], k: int = 3) -> List[Tuple[Any, Any]]:
+    """Pick up to ``k`` (input, output) pairs with the most varied outputs.
+
+    Outputs are grouped by structure and their first string value (typically
+    the predicted label); one pair per group is taken first, in order, and the
+    remaining slots are filled with the other pairs.
     """
-    sys_prt = "You are a JSON input generator for machine learning APIs. You will receive an `input_format` specification describing " \
-        "the expected structure of a JSON input."\
-        "Your job is to generate a valid sample JSON input based on the given format."\
-        "Guidelines:"\
-        "- Only return the JSON input. Do not include explanations or descriptions."\
-        "- Fill in realistic and coherent dummy data for each field, based on field names and types."\
-        "- Always match the required structure and types exactly."\
-        "- Return JSON in compact format (single-line, no comments, no code-style string concatenation)."\
-        "Never repeat the schema or format. Only output the resulting JSON input."
-    
-    user_prompt = "Based on the following input_format schema, generate a valid JSON input:"\
-        f"{extract_model_input(yaml_file_path)}"
-    
-    res = graph.invoke(
-        {"messages": [("system", sys_prt), ("user", user_prompt)]},
-        {"configurable": {"system_prompt": sys_prt}},
-    )
+    seen = set()
+    picked: List[Tuple[Any, Any]] = []
+    rest: List[Tuple[Any, Any]] = []
+    for pair in pairs:
+        signature = (_shape(pair[1]), _first_string(pair[1]))
+        if signature in seen:
+            rest.append(pair)
+        else:
+            seen.add(signature)
+            picked.append(pair)
+    return (picked + rest)[:k]
 
-    api = extract_info("model_information.api_url", yaml_file_path)
 
-    json_str_res = str(res["messages"][-1].content).strip()
+def format_examples(pairs: Sequence[Tuple[Any, Any]]) -> Tuple[str, str]:
+    """Render (input, output) pairs as the example strings used by prompts."""
+    if len(pairs) == 1:
+        return json.dumps(pairs[0][0]), json.dumps(pairs[0][1])
+    inputs = "\n".join(f"Example {i}: {json.dumps(inp)}" for i, (inp, _) in enumerate(pairs, 1))
+    outputs = "\n".join(f"Example {i}: {json.dumps(out)}" for i, (_, out) in enumerate(pairs, 1))
+    return inputs, outputs
 
-    payload = json.loads(json_str_res)
 
-    response = requests.post(api, json=payload)
+def _examples(inputs: Sequence[Any], outputs: Sequence[Optional[Any]], max_examples: int) -> Tuple[str, str]:
+    pairs = [(inp, out) for inp, out in zip(inputs, outputs) if out is not None]
+    if not pairs:
+        return ERROR_EXAMPLE
+    return format_examples(select_representative(pairs, max_examples))
 
-    if response.status_code == 200:
-        return json_str_res, json.dumps(response.json()) # input, output
-    
-    print(api, json_str_res, response.status_code)
-        
-    return "ERROR - UNKNOWN", "ERROR - UNKNOWN"
+
+def get_model_output(
+    task: Union[Task, str],
+    use_cache: bool = True,
+    num_samples: int = 1,
+    concurrency: int = 4,
+    max_examples: int = 3,
+):
+    """Probe the task's model API and return example input and output strings.
+
+    Returns ``ERROR_EXAMPLE`` (``("ERROR - UNKNOWN", "ERROR - UNKNOWN")``) if
+    no probe succeeds. With ``num_samples`` > 1 the inputs are generated in one
+    LLM call and probed concurrently; up to ``max_examples`` representative
+    pairs are returned as numbered examples.
+    """
+    task = load_task(task)
+    inputs = generate_sample_inputs(task, num_samples, use_cache=use_cache)
+    outputs = probe_model_api(task.api_url, inputs, concurrency=concurrency)
+    return _examples(inputs, outputs, max_examples)
+
+
+async def aget_model_output(
+    task: Union[Task, str],
+    use_cache: bool = True,
+    num_samples: int = 1,
+    concurrency: int = 4,
+    max_examples: int = 3,
+) -> Tuple[str, str]:
+    """Async counterpart of `get_model_output`."""
+    task = load_task(task)
+    inputs = await agenerate_sample_inputs(task, num_samples, use_cache=use_cache)
+    outputs = await aprobe_model_api(task.api_url, inputs, concurrency=concurrency)
+    return _examples(inputs, outputs, max_examples)
 
 
 if __name__ == "__main__":
@@ -1,34 +1,172 @@
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
 import yaml
 
-def extract_info(field: str, yaml_src: str):
-    def get_nested(data, keys):
-        for key in keys:
-            if isinstance(data, list):
-                try:
-                    key = int(key)
-                    data = data[key]
-                except (ValueError, IndexError):
-                    return None
-            elif isinstance(data, dict):
-                data = data.get(key)
-            else:
-                return None
-        return data
 
-    with open(yaml_src, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
+class TaskValidationError(ValueError):
+    """Raised when a task YAML is missing required sections."""
 
-    keys = field.split('.')
-    return get_nested(data, keys)
 
-def extract_description(yaml_src: str):
-    return extract_info("task_description.description", yaml_src)
+def _get_nested(data, keys):
+    for key in keys:
+        if isinstance(data, list):
+            try:
+                key = int(key)
+                data = data[key]
+            except (ValueError, IndexError):
+                return None
+        elif isinstance(data, dict):
+            data = data.get(key)
+        else:
+            return None
+    return data
+
+
+@dataclass(frozen=True, slots=True)
+class Task:
+    """A parsed and validated `task.yaml`.
+
+    The fields every stage needs are resolved once at parse time; anything
+    else can be looked up from ``raw`` with `Task.get`.
+    """
+
+    raw: Dict[str, Any]
+    type: str
+    description: str
+    model_information: Dict[str, Any]
+    api_url: str
+    input_format: Any
+    output_format: Any
+    content_hash: str = ""
+    source: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Any, content_hash: str = "", source: Optional[str] = None) -> "Task":
+        """Validate a loaded YAML document and build a Task from it."""
+        where = f" in {source}" if source else ""
+        if not isinstance(data, dict):
+            raise TaskValidationError(f"Task file{where} must be a YAML mapping")
+        task_description = data.get("task_description")
+        if not isinstance(task_description, dict) or not task_description.get("description"):
+            raise TaskValidationError(f"Missing task_description.description{where}")
+        model_information = data.get("model_information")
+        if not isinstance(model_information, dict):
+            raise TaskValidationError(f"Missing model_information{where}")
+        for key in ("api_url", "input_format"):
+            if model_information.get(key) in (None, ""):
+                raise TaskValidationError(f"Missing model_information.{key}{where}")
+
+        return cls(
+            raw=data,
+            type=str(task_description.get("type", "")),
+            description=task_description["description"],
+            model_information=model_information,
+            api_url=str(model_information["api_url"]),
+            input_format=model_information["input_format"],
+            output_format=model_information.get("output_format"),
+            content_hash=content_hash,
+            source=source,
+        )
+
+    def get(self, field: str) -> Any:
+        """Look up a dotted path such as ``model_information.api_url``."""
+        return _get_nested(self.raw, field.split("."))
+
+    def to_yaml(self, exclude: Tuple[str, ...] = ()) -> str:
+        """Serialize the task back to YAML, preserving key order.
+
+        Dotted paths in ``exclude`` are left out.
+        """
+        return yaml.dump(self.without(*exclude), allow_unicode=True, sort_keys=False)
+
+    def without(self, *fields: str) -> Dict[str, Any]:
+        """Return a copy of ``raw`` with the given dotted paths removed."""
+        data = copy.deepcopy(self.raw)
+        for path in fields:
+            *parents, last = path.split(".")
+            parent = _get_nested(data, parents)
+            if isinstance(parent, dict):
+                parent.pop(last, None)
+        return data
 
-def extract_model_info(yaml_src: str):
-    return extract_info("model_information", yaml_src)
 
-def extract_model_input(yaml_src: str):
-    return extract_info("model_information.input_format", yaml_src)
+def parse_task(text: Union[str, bytes], source: Optional[str] = None) -> Task:
+    """Parse and validate task YAML content."""
+    data = text.encode("utf-8") if isinstance(text, str) else text
+    content_hash = hashlib.sha256(data).hexdigest()
+    with _cache_lock:
+        loaded = _by_hash.get(content_hash)
+    if loaded is None:
+        try:
+            loaded = yaml.safe_load(data)
+        except yaml.YAMLError as e:
+            raise TaskValidationError(f"Invalid YAML{f' in {source}' if source else ''}: {e}") from e
+    # Each Task owns a copy of the document: mutating its ``raw`` or
+    # ``model_information`` cannot change the cached parse or other tasks.
+    task = Task.from_dict(copy.deepcopy(loaded), content_hash=content_hash, source=source)
+    with _cache_lock:
+        _remember(_by_hash, content_hash, loaded)
+    return task
+
+
+# Parsed YAML documents, keyed by content hash so identical files at
+# different paths (e.g. the same upload in two job directories) share one
+# parse, and the content hash of each file by (path, mtime, size) so
+# unchanged files are not re-read.
+TASK_CACHE_SIZE = 128
+
+_by_stat: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+_by_hash: "OrderedDict[str, Any]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _remember(cache: OrderedDict, key: Any, value: Any) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > TASK_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def load_task(yaml_src: Union[str, os.PathLike, Task]) -> Task:
+    """Return the parsed Task for a file, reusing the cached parse if unchanged."""
+    if isinstance(yaml_src, Task):
+        return yaml_src
+    path = os.path.abspath(yaml_src)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _by_stat.get(path)
+        loaded = _by_hash.get(hit[1]) if hit is not None and hit[0] == stamp else None
+        if loaded is not None:
+            _by_stat.move_to_end(path)
+            _by_hash.move_to_end(hit[1])
+    if loaded is not None:
+        return Task.from_dict(copy.deepcopy(loaded), content_hash=hit[1], source=str(yaml_src))
+
+    with open(path, "rb") as f:
+        task = parse_task(f.read(), source=str(yaml_src))
+    with _cache_lock:
+        _remember(_by_stat, path, (stamp, task.content_hash))
+    return task
+
+
+def extract_info(field: str, yaml_src: Union[str, Task]):
+    return load_task(yaml_src).get(field)
+
+def extract_description(yaml_src: Union[str, Task]):
+    return load_task(yaml_src).description
+
+def extract_model_info(yaml_src: Union[str, Task]):
+    return load_task(yaml_src).model_information
+
+def extract_model_input(yaml_src: Union[str, Task]):
+    return load_task(yaml_src).input_format
 
 if __name__ == "__main__":
     yaml_path = "./_test_extracter/task.yaml"
@@ -0,0 +1,86 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from react_agent.artifacts import ArtifactStore, UploadStore, UploadTooLargeError
+from react_agent.yaml_extracter import TaskValidationError
+
+TASK_YAML = b"""
+task_description:
+  description: Classify the emotion of a text.
+model_information:
+  api_url: "http://localhost:8000/api/emotion"
+  input_format:
+    texts: string
+"""
+
+
+def test_jobs_are_isolated(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path)
+    a, b = store.create_job("a"), store.create_job("b")
+
+    a.write_text("generated_ui.html", "<p>a</p>")
+    b.write_stream("generated_ui.html", io.BytesIO(b"<p>b</p>"))
+
+    assert a.read_text("generated_ui.html") == "<p>a</p>"
+    assert b.read_text("generated_ui.html") == "<p>b</p>"
+    assert store.job("a").root == a.root  # type: ignore[union-attr]
+    assert store.job("../a") is None
+    with pytest.raises(ValueError):
+        a.path("../b/generated_ui.html")
+
+
+def test_cleanup_applies_retention_policy(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path, max_age=100, max_jobs=2)
+    for i, job_id in enumerate(["old", "mid", "new", "newest"]):
+        job = store.create_job(job_id)
+        os.utime(job.root, (1000 + i, 1000 + i))
+
+    removed = store.cleanup(now=1050)
+
+    assert sorted(removed) == ["mid", "old"]
+    assert store.job("new") is not None and store.job("newest") is not None
+    assert store.cleanup(now=2000) == ["newest", "new"]
+
+
+def test_cleanup_keeps_running_jobs(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path, max_age=100, max_jobs=1)
+    for i, job_id in enumerate(["running", "done", "newest"]):
+        os.utime(store.create_job(job_id).root, (1000 + i, 1000 + i))
+
+    assert store.cleanup(now=1050, keep={"running"}) == ["done"]
+    assert store.job("running") is not None
+
+
+def test_uploads_are_stored_once_per_content(tmp_path: Path) -> None:
+    uploads = UploadStore(tmp_path)
+
+    first = uploads.ingest(io.BytesIO(TASK_YAML), "task.yaml")
+    second = uploads.ingest(io.BytesIO(TASK_YAML), "../renamed.yml")
+
+    assert not first.duplicate and second.duplicate
+    assert first.digest == second.digest and first.path == second.path
+    assert first.path.read_bytes() == TASK_YAML
+    assert [p.name for p in tmp_path.iterdir()] == [f"{first.digest}.yaml"]
+
+
+@pytest.mark.parametrize(
+    "content, filename",
+    [(TASK_YAML, "task.json"), (b"task: [unclosed", "task.yaml"), (b"model_information: {}", "task.yaml")],
+)
+def test_invalid_uploads_are_rejected(tmp_path: Path, content: bytes, filename: str) -> None:
+    uploads = UploadStore(tmp_path)
+
+    with pytest.raises(TaskValidationError):
+        uploads.ingest(io.BytesIO(content), filename)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_oversized_upload_is_rejected(tmp_path: Path) -> None:
+    uploads = UploadStore(tmp_path, max_bytes=len(TASK_YAML) - 1)
+
+    with pytest.raises(UploadTooLargeError):
+        uploads.ingest(io.BytesIO(TASK_YAML), "task.yaml")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from react_agent import batch
+from react_agent.generator import GenerationResult
+from react_agent.graph_token_count import StageUsage, UsageTracker
+from react_agent.pipeline import PipelineRun
+
+TASK = """
+task_description:
+  type: Text classification
+  description: {description}
+model_information:
+  api_url: "http://localhost:8000/api/emotion"
+  input_format:
+    texts: string
+"""
+
+
+def write_task(path: Path, description: str) -> Path:
+    path.write_text(TASK.format(description=description), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def generated(monkeypatch: pytest.MonkeyPatch) -> list:
+    calls = []
+
+    def fake_generate_fe(task, artifacts, **options):
+        calls.append(task.description)
+        if "broken" in task.description:
+            raise RuntimeError("model refused")
+        usage = UsageTracker()
+        usage.record(StageUsage("html", "fake/model", total_tokens=7))
+        return GenerationResult(
+            artifacts=artifacts,
+            generated_ui=artifacts.path("generated_ui.html"),
+            fixed_ui=artifacts.write_text("fixed_generated_ui.html", "<html></html>"),
+            run=PipelineRun(),
+            usage=usage,
+        )
+
+    monkeypatch.setattr(batch, "generate_fe", fake_generate_fe)
+    return calls
+
+
+def test_batch_resumes_from_manifest(tmp_path: Path, generated: list) -> None:
+    tasks_dir = tmp_path / "tasks"
+    tasks_dir.mkdir()
+    write_task(tasks_dir / "a.yaml", "first")
+    write_task(tasks_dir / "b.yaml", "broken")
+    (tasks_dir / "notes.txt").write_text("not a task")
+    out = tmp_path / "out"
+
+    summary = batch.run_batch(batch.collect_tasks([tasks_dir]), out)
+    assert summary["tasks"] == 2 and summary["succeeded"] == 1
+    assert summary["total_tokens"] == 7
+    assert list(summary["failed"].values()) == ["RuntimeError: model refused"]
+    assert json.loads((out / "summary.json").read_text())["succeeded"] == 1
+
+    # Only the failed task is retried; an edited task is regenerated.
+    generated.clear()
+    batch.run_batch(batch.collect_tasks([tasks_dir]), out)
+    assert generated == ["broken"]
+
+    generated.clear()
+    write_task(tasks_dir / "a.yaml", "first, edited")
+    summary = batch.run_batch(batch.collect_tasks([tasks_dir]), out)
+    assert sorted(generated) == ["broken", "first, edited"]
+    assert "a-" in summary["per_task"][str((tasks_dir / "a.yaml").resolve())]["job_id"]
+
+
+def test_main_reports_failures(tmp_path: Path, generated: list, capsys: pytest.CaptureFixture) -> None:
+    task = write_task(tmp_path / "ok.yaml", "fine")
+    assert batch.main([str(task), "--out", str(tmp_path / "out"), "--rpm", "fake=600"]) == 0
+    assert "1/1 succeeded" in capsys.readouterr().out
+
+    invalid = tmp_path / "invalid.yaml"
+    invalid.write_text("task_description: {}\n")
+    assert batch.main([str(invalid), "--out", str(tmp_path / "out")]) == 1
@@ -0,0 +1,46 @@
+import pytest
+
+from react_agent import checker
+
+PAGE = (
+    "<html><body><div id='out'></div><script>"
+    "fetch('http://x').then(r => r.json()).then(d => { document.getElementById('out').textContent = d; });"
+    "</script></body></html>"
+)
+
+
+@pytest.fixture
+def stages(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, str]]:
+    calls: list[tuple[str, str]] = []
+
+    def llm(system_prompt: str, user_message: str, stage: str, *args: object, **kwargs: object) -> str:
+        calls.append((stage, user_message))
+        return {"checker_pre_risk": "fetch result is not checked", "checker_specific_bug": "no bug"}.get(stage, PAGE)
+
+    monkeypatch.setattr(checker, "_llm", llm)
+    return calls
+
+
+def test_clean_static_report_skips_llm_checks(stages: list[tuple[str, str]]) -> None:
+    fixed = checker.detect_bug_n_fix(f"```html\n{PAGE}\n```", "desc", {"api_url": "http://x"}, "in", "out")
+
+    assert fixed.strip() == PAGE
+    assert stages == []
+
+
+def test_static_findings_run_every_llm_check(stages: list[tuple[str, str]]) -> None:
+    broken = PAGE.replace("getElementById('out')", "getElementById('missing')")
+
+    checker.detect_bug_n_fix(broken, "desc", {"api_url": "http://x"}, "in", "out", patch_mode=False)
+
+    assert [stage for stage, _ in stages] == ["checker_pre_risk", "checker_specific_bug", "checker_fix"]
+
+
+def test_static_findings_are_passed_to_bug_detection(stages: list[tuple[str, str]]) -> None:
+    broken = PAGE.replace("getElementById('out')", "getElementById('missing')")
+
+    checker.detect_bug_n_fix(broken, "desc", {"api_url": "http://x"}, "in", "out", patch_mode=False)
+
+    specific_bug_prompt = dict(stages)["checker_specific_bug"]
+    assert "Confirmed by static analysis" in specific_bug_prompt and "missing" in specific_bug_prompt
+    assert "fetch result is not checked" in specific_bug_prompt
@@ -1,5 +1,24 @@
+import pytest
+
 from react_agent.configuration import Configuration
 
 
 def test_configuration_empty() -> None:
     Configuration.from_context()
+
+
+def test_model_for_stage(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_STAGE_MODELS", '{"html": "anthropic/claude-small", "checker_pre_risk": ""}')
+    config = Configuration(model="openai/big")
+
+    assert config.model_for("html") == "anthropic/claude-small"
+    assert config.model_for("sample_input") == "openai/gpt-4.1-mini"
+    assert config.model_for("checker_pre_risk") == "openai/big"
+    assert config.model_for("design") == "openai/big"
+
+
+def test_small_model_follows_provider(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("LLM_STAGE_MODELS", raising=False)
+
+    assert Configuration(model="anthropic/claude-big").model_for("sample_input") == "anthropic/claude-3-5-haiku-latest"
+    assert Configuration(model="fireworks/llama").model_for("sample_input") == "fireworks/llama"
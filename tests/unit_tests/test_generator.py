@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from react_agent import generator
+from react_agent.artifacts import ArtifactStore
+from react_agent.generator import complete_specs, extract_specs, parse_specs
+from react_agent.pipeline import fingerprint
+from react_agent.skeletons import SkeletonStore
+from react_agent.yaml_extracter import Task
+
+
+def test_parse_specs_reads_json_in_a_code_fence() -> None:
+    output = "```json\n" + json.dumps({"HTML_SPEC": "form", "CSS_SPEC": "blue", "JS_SPEC": "fetch"}) + "\n```"
+
+    assert extract_specs(output) == ("form", "blue", "fetch")
+
+
+def test_parse_specs_falls_back_to_section_markers() -> None:
+    output = "### 1. HTML_SPEC\nform\n\n### 2. CSS_SPEC:\nblue\n\n### 3. JS_SPEC\n- fetch"
+
+    assert parse_specs(output) == {"HTML_SPEC": "form", "CSS_SPEC": "blue", "JS_SPEC": "fetch"}
+
+
+def test_complete_specs_requests_only_missing_sections(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def fake_invoke_llm(system_prompt: str, user_prompt: str, *, stage: str, **kwargs: object) -> str:
+        calls.append((stage, user_prompt))
+        return json.dumps({"JS_SPEC": "fetch", "HTML_SPEC": "ignored"})
+
+    monkeypatch.setattr(generator, "invoke_llm", fake_invoke_llm)
+
+    specs = complete_specs("task", json.dumps({"HTML_SPEC": "form", "CSS_SPEC": "blue", "JS_SPEC": ""}))
+
+    assert specs == ("form", "blue", "fetch")
+    assert [stage for stage, _ in calls] == ["specification_repair"]
+    assert "missing section(s): JS_SPEC" in calls[0][1]
+
+
+def test_complete_specs_skips_repair_when_complete(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(generator, "invoke_llm", lambda *a, **k: pytest.fail("unexpected repair call"))
+
+    assert complete_specs("task", json.dumps({"HTML_SPEC": "a", "CSS_SPEC": "b", "JS_SPEC": "c"})) == ("a", "b", "c")
+
+
+TASK = {
+    "task_description": {"type": "Text classification", "description": "Classify text"},
+    "model_information": {"api_url": "http://localhost/api", "input_format": {"texts": "string"}},
+}
+
+
+def _spec_fingerprint(tmp_path: Path, store: SkeletonStore) -> str:
+    plan = generator._plan(Task.from_dict(TASK), True, ArtifactStore(tmp_path / "jobs").create_job("job"),
+                           None, 1, True, store)
+    return fingerprint(next(s for s in plan.stages if s.name == "specification"), [])
+
+
+def test_stage_fingerprints_cover_code_and_skeleton(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("SKELETONS_DISABLED", raising=False)
+    store = SkeletonStore(tmp_path / "skeletons")
+    fresh = _spec_fingerprint(tmp_path, store)
+
+    monkeypatch.setattr(generator, "_code_version", "edited")
+    assert _spec_fingerprint(tmp_path, store) != fresh
+
+    store.put(Task.from_dict(TASK), ("h", "c", "j"), "d", "<html></html>")
+    reused = _spec_fingerprint(tmp_path, store)
+    assert reused != fresh and reused != _spec_fingerprint(tmp_path, SkeletonStore(tmp_path / "empty"))
+
+
+def test_cache_bypass_also_skips_stage_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    artifacts = ArtifactStore(tmp_path / "jobs").create_job("job")
+    assert generator._plan(Task.from_dict(TASK), True, artifacts, None, 1, True, None).cache is not None
+
+    monkeypatch.setenv("LLM_CACHE_DISABLED", "1")
+    assert generator._plan(Task.from_dict(TASK), True, artifacts, None, 1, True, None).cache is None
+
+
+def test_cache_bypass_skips_skeleton_reuse(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("SKELETONS_DISABLED", raising=False)
+    store = SkeletonStore(tmp_path / "skeletons")
+    store.put(Task.from_dict(TASK), ("h", "c", "j"), "d", "<html></html>")
+    artifacts = ArtifactStore(tmp_path / "jobs").create_job("job")
+
+    assert generator._plan(Task.from_dict(TASK), True, artifacts, None, 1, True, store).reused_skeleton
+    assert not generator._plan(Task.from_dict(TASK), False, artifacts, None, 1, True, store).reused_skeleton
+
+
+def test_new_description_reruns_only_the_specification(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("SKELETONS_DISABLED", raising=False)
+    store = SkeletonStore(tmp_path / "skeletons")
+    store.put(Task.from_dict(TASK), ("h", "c", "j"), "d", "<html></html>")
+    described = json.loads(json.dumps(TASK))
+    described["task_description"]["description"] = "Show every detected emotion with its score"
+
+    plan = generator._plan(Task.from_dict(described), True, ArtifactStore(tmp_path / "jobs").create_job("job"),
+                           None, 1, True, store)
+    stages = {stage.name: stage for stage in plan.stages}
+
+    assert plan.reused_skeleton
+    assert "task" in stages["specification"].inputs
+    assert stages["design"].fn() == "d" and stages["html"].fn() == "<html></html>"
@@ -0,0 +1,52 @@
+import threading
+
+from react_agent import graph_token_count
+from react_agent.graph_token_count import (
+    StageUsage,
+    UsageTracker,
+    current_tracker,
+    sum_usage,
+    track_usage,
+)
+
+
+def test_usage_tracker_aggregates_per_stage(monkeypatch) -> None:
+    monkeypatch.setattr(graph_token_count, "PRICES", {"openai/gpt-4.1": [2.0, 8.0]})
+    tracker = UsageTracker()
+    tracker.record(StageUsage("html", "openai/gpt-4.1", 1000, 500, 1500, 2.0))
+    tracker.record(StageUsage("html", "openai/gpt-4.1", 0, 0, 0, 0.0, cached=True))
+    tracker.record(StageUsage("design", "anthropic/claude", 10, 20, 30, 1.0))
+
+    stages = tracker.by_stage()
+    assert stages["html"]["calls"] == 2 and stages["html"]["cached_calls"] == 1
+    assert stages["html"]["cost"] == (1000 * 2.0 + 500 * 8.0) / 1_000_000
+    assert stages["design"]["cost"] is None
+    assert tracker.totals()["total_tokens"] == 1530
+
+
+def test_prompt_cache_reads_are_reported_and_priced(monkeypatch) -> None:
+    monkeypatch.setattr(graph_token_count, "PRICES", {"anthropic/claude": [3.0, 15.0, 0.3]})
+    tokens = sum_usage({
+        "claude": {"input_tokens": 1200, "output_tokens": 100, "total_tokens": 1300,
+                   "input_token_details": {"cache_read": 1000, "cache_creation": 0}},
+    })
+    assert tokens["cache_read"] == 1000 and tokens["cache_creation"] == 0
+
+    tracker = UsageTracker()
+    tracker.record(StageUsage("specification", "anthropic/claude", 1200, 100, 1300,
+                              cache_read_tokens=tokens["cache_read"]))
+
+    assert tracker.by_stage()["specification"]["cache_read_tokens"] == 1000
+    assert tracker.totals()["cache_read_tokens"] == 1000
+    assert tracker.totals()["cost"] == (200 * 3.0 + 1000 * 0.3 + 100 * 15.0) / 1_000_000
+
+
+def test_track_usage_is_context_local() -> None:
+    seen = []
+    with track_usage() as tracker:
+        assert current_tracker() is tracker
+        t = threading.Thread(target=lambda: seen.append(current_tracker()))
+        t.start()
+        t.join()
+    assert seen == [None]
+    assert current_tracker() is None
@@ -0,0 +1,149 @@
+import asyncio
+import importlib
+import time
+from typing import Any, Callable, List, Optional
+
+import pytest
+
+from react_agent import hedging
+from react_agent.graph_token_count import track_usage
+from react_agent.hedging import Hedger, Superseded
+from react_agent.llm import invoke_llm
+
+
+def _trained(stage: str = "html", **options: Any) -> Hedger:
+    hedger = Hedger([stage], min_samples=5, min_delay=0.05, **options)
+    for _ in range(5):
+        hedger.record(stage, False, 0.05)
+        hedger.record(stage, True, 0.05)
+    return hedger
+
+
+def _attempt(answer: str, delay: float) -> Callable[[Optional[Callable[[Any], None]]], str]:
+    def attempt(on_chunk: Optional[Callable[[Any], None]]) -> str:
+        time.sleep(delay)
+        if on_chunk is not None:
+            on_chunk(answer)
+        return answer
+
+    return attempt
+
+
+def test_hedger_waits_for_samples_before_hedging() -> None:
+    hedger = Hedger(["html"], min_samples=5)
+
+    result, hedged, backup_won = hedger.run("html", _attempt("primary", 0.05), _attempt("backup", 0))
+
+    assert (result, hedged, backup_won) == ("primary", False, False)
+    assert hedger.deadline("html", False) is None
+    assert not hedger.enabled("checker")
+
+
+def test_hedger_deadline_uses_percentile() -> None:
+    hedger = Hedger(["html"], percentile=90, min_samples=10, min_delay=0.1)
+    for seconds in range(1, 11):
+        hedger.record("html", False, float(seconds))
+
+    assert hedger.deadline("html", False) == 9.0
+    assert hedger.deadline("html", True) is None
+
+
+def test_slow_primary_loses_to_backup() -> None:
+    hedger = _trained()
+
+    result, hedged, backup_won = hedger.run("html", _attempt("primary", 0.5), _attempt("backup", 0))
+
+    assert (result, hedged, backup_won) == ("backup", True, True)
+    # The sample includes the wait before hedging, not just the backup's time
+    assert hedger._samples[("html", False)][-1] >= 0.05
+    stats = hedger.metrics()["html"]
+    assert stats["requests"] == 1 and stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1 and stats["primary_wins"] == 0
+    assert stats["hedge_rate"] == 1.0
+
+
+def test_stream_is_owned_by_first_request_to_send_a_chunk() -> None:
+    hedger = _trained()
+    chunks: List[str] = []
+    superseded: List[str] = []
+
+    def primary(on_chunk: Optional[Callable[[Any], None]]) -> str:
+        time.sleep(0.3)
+        try:
+            on_chunk("primary")
+        except Superseded:
+            superseded.append("primary")
+            raise
+        return "primary"
+
+    result, hedged, _ = hedger.run("html", primary, _attempt("backup", 0), chunks.append)
+    time.sleep(0.4)
+
+    assert (result, hedged) == ("backup", True)
+    assert chunks == ["backup"]
+    assert superseded == ["primary"]
+
+
+def test_failed_backup_falls_back_to_primary() -> None:
+    hedger = _trained()
+
+    def failing(on_chunk: Optional[Callable[[Any], None]]) -> str:
+        raise RuntimeError("overloaded")
+
+    result, hedged, backup_won = hedger.run("html", _attempt("primary", 0.2), failing)
+
+    assert (result, hedged, backup_won) == ("primary", True, False)
+    assert hedger.metrics()["html"]["primary_wins"] == 1
+
+
+def test_async_hedge_cancels_the_loser() -> None:
+    hedger = _trained()
+    cancelled: List[str] = []
+
+    async def primary(on_chunk: Optional[Callable[[Any], None]]) -> str:
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append("primary")
+            raise
+        return "primary"
+
+    async def backup(on_chunk: Optional[Callable[[Any], None]]) -> str:
+        return "backup"
+
+    async def run() -> Any:
+        result = await hedger.arun("html", primary, backup)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == ("backup", True, True)
+    assert cancelled == ["primary"]
+
+
+def test_async_errors_are_raised_when_both_fail() -> None:
+    hedger = _trained()
+
+    async def failing(on_chunk: Optional[Callable[[Any], None]]) -> str:
+        await asyncio.sleep(0.1)
+        raise RuntimeError("overloaded")
+
+    with pytest.raises(RuntimeError, match="overloaded"):
+        asyncio.run(hedger.arun("html", failing, failing))
+
+
+def test_usage_names_the_model_that_answered(monkeypatch: pytest.MonkeyPatch) -> None:
+    from langchain_core.messages import AIMessage
+
+    monkeypatch.setattr(hedging, "_hedger", _trained(model="openai/backup"))
+
+    def call_model_direct(configuration: Any, user_prompt: str, on_chunk: Any = None) -> AIMessage:
+        if configuration.model != "openai/backup":
+            time.sleep(0.5)
+        return AIMessage(configuration.model)
+
+    monkeypatch.setattr(importlib.import_module("react_agent.graph"), "call_model_direct", call_model_direct)
+    with track_usage() as usage:
+        text = invoke_llm("sys", "user", stage="html", model="openai/primary", use_cache=False)
+
+    assert text == "openai/backup"
+    assert [(r.model, r.hedged) for r in usage.records] == [("openai/backup", True)]
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import httpx
+import pytest
+import requests
+
+from react_agent.http_client import CircuitBreaker, CircuitOpenError, ModelApiClient
+
+
+def test_circuit_breaker_opens_and_recovers() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    breaker.before_request("api")
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("api")
+
+    now[0] = 11
+    assert breaker.state == "half-open"
+    breaker.before_request("api")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("api")
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 22
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_breakers_are_per_host() -> None:
+    client = ModelApiClient()
+
+    a = client.breaker("http://10.0.0.1:8000/api/a")
+    assert client.breaker("http://10.0.0.1:8000/api/b") is a
+    assert client.breaker("http://10.0.0.2:8000/api/a") is not a
+
+
+@pytest.fixture
+def slow_api() -> Iterator[tuple[str, list[str]]]:
+    received: list[str] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers["Content-Length"]))
+            received.append(self.path)
+            time.sleep(0.5)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/predict", received
+    server.shutdown()
+
+
+def test_posts_are_not_resent_after_a_read_timeout(slow_api: tuple[str, list[str]]) -> None:
+    url, received = slow_api
+    client = ModelApiClient(read_timeout=0.1, max_retries=2, backoff_factor=0)
+
+    with pytest.raises(requests.ConnectionError):
+        client.post_json(url, {"t": 1})
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(client.apost_json(url, {"t": 1}))
+
+    assert len(received) == 2
@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Modules whose import is deferred until a generation actually needs them;
+# any langchain_* package counts as well.
+HEAVY_MODULES = ("langgraph", "langsmith", "esprima", "pytest")
+
+SCRIPT = """
+import importlib, json, sys
+importlib.import_module(sys.argv[1])
+print(json.dumps(sorted({m.split(".")[0] for m in sys.modules})))
+"""
+
+
+def _modules_after_import(module: str) -> set[str]:
+    out = subprocess.run([sys.executable, "-c", SCRIPT, module], check=True, capture_output=True, text=True)
+    return set(json.loads(out.stdout.strip().splitlines()[-1]))
+
+
+@pytest.mark.parametrize("module", ["react_agent.jobs", "react_agent.batch", "react_agent.generator"])
+def test_import_defers_heavy_dependencies(module: str) -> None:
+    modules = _modules_after_import(module)
+
+    assert not set(HEAVY_MODULES) & modules
+    assert not {m for m in modules if m.startswith("langchain")}
+    assert "src" not in modules
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+
+from react_agent import jobs
+from react_agent.jobs import Job, JobQueue, JobStatus, QueueFullError, current_job
+
+
+def test_job_queue_runs_jobs_and_records_failures() -> None:
+    def work(x: int) -> int:
+        if x < 0:
+            raise ValueError("negative")
+        return x * 2
+
+    queue = JobQueue(work, max_workers=2)
+    ok = queue.submit(21, name="ok")
+    bad = queue.submit(-1)
+    queue.shutdown(wait=True)
+
+    assert ok.status == JobStatus.SUCCEEDED and ok.result == 42
+    assert bad.status == JobStatus.FAILED and "negative" in (bad.error or "")
+    assert queue.get(ok.id) is ok
+    assert queue.active == 0
+
+
+def test_job_queue_applies_backpressure() -> None:
+    release = threading.Event()
+    queue = JobQueue(lambda: release.wait(5), max_workers=1, max_pending=2)
+
+    first = queue.submit()
+    second = queue.submit()
+    with pytest.raises(QueueFullError):
+        queue.submit()
+    assert queue.active_ids() == {first.id, second.id}
+
+    release.set()
+    queue.shutdown(wait=True)
+    assert queue.active == 0
+    assert queue.active_ids() == set()
+
+
+def test_job_events_coalesce_tokens_and_stay_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(jobs, "MAX_JOB_EVENTS", 3)
+    job = Job(id="job")
+
+    job.publish({"type": "stage_start", "stage": "html"})
+    for text in ("<ht", "ml>", "</html>"):
+        job.publish({"type": "token", "stage": "html", "text": text})
+    job.publish({"type": "stage_end", "stage": "html"})
+    assert job.events[1] == {"type": "token", "stage": "html", "text": "<html></html>"}
+
+    job.publish({"type": "stage_start", "stage": "checker"})
+    events, complete = job.events_after(0)
+    assert [seq for seq, _ in events] == [1, 2, 3] and not complete
+
+
+def test_subscribers_are_woken_by_new_events() -> None:
+    job = Job(id="job")
+    assert not job.wait_for_events(0, timeout=0.01)
+
+    async def subscribe() -> list:
+        waiting = asyncio.ensure_future(job.await_events(0, timeout=5))
+        await asyncio.sleep(0.01)
+        threading.Thread(target=job.publish, args=({"type": "stage_start", "stage": "html"},)).start()
+        await asyncio.wait_for(waiting, 1)
+        return job.events_after(0)[0]
+
+    assert asyncio.run(subscribe()) == [(0, {"type": "stage_start", "stage": "html"})]
+    assert job.wait_for_events(0, timeout=0)
+
+
+def test_coroutine_jobs_run_on_the_event_loop() -> None:
+    async def work(x: int) -> int:
+        await asyncio.sleep(0.05)
+        if x < 0:
+            raise ValueError("negative")
+        return current_job().id  # type: ignore[union-attr]
+
+    async def main() -> list:
+        queue = JobQueue(work, max_workers=2)
+        submitted = [queue.submit(1, job_id="a"), queue.submit(2, job_id="b"), queue.submit(-1)]
+        while queue.active:
+            await asyncio.sleep(0.01)
+        return submitted
+
+    ok_a, ok_b, bad = asyncio.run(main())
+    assert (ok_a.result, ok_b.result) == ("a", "b")
+    assert ok_a.status == JobStatus.SUCCEEDED and bad.status == JobStatus.FAILED
@@ -0,0 +1,94 @@
+import asyncio
+import importlib
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from react_agent.llm import ainvoke_llm, invoke_llm
+
+ANSWER = "<html> hello </html>"
+TIERED = {"openai/small": "not json", "openai/gpt-4.1": '{"x": 1}'}
+
+
+@pytest.fixture
+def chat_models(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, tuple]]:
+    """Fake every chat model and record the (model, tools) of each call.
+
+    Parametrize indirectly with a ``{model: answer}`` dict; other models
+    answer `ANSWER`, and ``openai/down`` fails to load.
+    """
+    answers = getattr(request, "param", {})
+    calls: list[tuple[str, tuple]] = []
+
+    def get_chat_model(name: str, **kwargs: object) -> GenericFakeChatModel:
+        calls.append((name, tuple(kwargs.get("tools") or ())))
+        if name == "openai/down":
+            raise RuntimeError("OPENAI_API_KEY not set")
+        return GenericFakeChatModel(messages=iter([AIMessage(answers.get(name, ANSWER))]))
+
+    monkeypatch.setattr(importlib.import_module("react_agent.graph"), "get_chat_model", get_chat_model)
+    return calls
+
+
+def test_invoke_llm_streams_tokens(chat_models: list) -> None:
+    tokens: list[str] = []
+
+    text = invoke_llm("sys", "user", stage="html", use_cache=False, on_token=tokens.append)
+
+    assert text == ANSWER
+    assert len(tokens) > 1
+    assert "".join(tokens) == text
+
+
+def test_ainvoke_llm_streams_tokens(chat_models: list) -> None:
+    tokens: list[str] = []
+
+    text = asyncio.run(ainvoke_llm("sys", "user", stage="html", use_cache=False, on_token=tokens.append))
+
+    assert text == ANSWER
+    assert "".join(tokens) == text
+
+
+def _is_json(text: str) -> bool:
+    return text.startswith("{")
+
+
+@pytest.mark.parametrize("chat_models", [TIERED], indirect=True)
+def test_invoke_llm_escalates_on_failed_validation(chat_models: list, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_STAGE_MODELS", '{"sample_input": "openai/small"}')
+
+    text = invoke_llm("sys", "user", stage="sample_input", use_cache=False, validate=_is_json)
+
+    assert text == '{"x": 1}'
+    assert [name for name, _ in chat_models] == ["openai/small", "openai/gpt-4.1"]
+
+
+@pytest.mark.parametrize("chat_models", [TIERED], indirect=True)
+def test_invoke_llm_keeps_stage_model_without_validator(chat_models: list, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_STAGE_MODELS", '{"sample_input": "openai/small"}')
+
+    text = asyncio.run(ainvoke_llm("sys", "user", stage="sample_input", use_cache=False))
+
+    assert text == "not json"
+    assert [name for name, _ in chat_models] == ["openai/small"]
+
+
+@pytest.mark.parametrize("chat_models", [TIERED], indirect=True)
+def test_invoke_llm_escalates_when_stage_model_fails(chat_models: list, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_STAGE_MODELS", '{"sample_input": "openai/down"}')
+
+    text = asyncio.run(ainvoke_llm("sys", "user", stage="sample_input", use_cache=False))
+
+    assert text == '{"x": 1}'
+    assert [name for name, _ in chat_models] == ["openai/down", "openai/gpt-4.1"]
+
+
+def test_invoke_llm_calls_model_without_tools_by_default(chat_models: list) -> None:
+    assert invoke_llm("sys", "user", stage="design", use_cache=False) == ANSWER
+    assert [tools for _, tools in chat_models] == [()]
+
+
+def test_invoke_llm_runs_agent_graph_with_tools(chat_models: list) -> None:
+    assert asyncio.run(ainvoke_llm("sys", "user", stage="design", use_cache=False, tools=True)) == ANSWER
+    assert len(chat_models) == 1 and chat_models[0][1]
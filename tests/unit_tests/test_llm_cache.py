@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+
+from react_agent.llm_cache import ResponseCache
+
+
+def test_response_cache_roundtrip(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path)
+    key = cache.make_key("openai/gpt-4.1", "design", "sys", "user")
+
+    assert cache.get(key) is None
+    cache.set(key, "<html></html>", stage="design")
+    assert cache.get(key) == "<html></html>"
+    assert key != cache.make_key("openai/gpt-4.1", "html", "sys", "user")
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, max_bytes=250)
+    keys = [cache.make_key("m", str(i), "s", "u") for i in range(3)]
+
+    cache.set(keys[0], "a" * 80)
+    cache.set(keys[1], "b" * 80)
+    old = cache._path(keys[1]).stat().st_mtime - 10
+    os.utime(cache._path(keys[1]), (old, old))
+    cache.get(keys[0])
+    cache.set(keys[2], "c" * 80)
+
+    assert cache.get(keys[0]) == "a" * 80
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == "c" * 80
+
+
+def test_overwriting_an_entry_does_not_grow_the_cache(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, max_bytes=1000)
+    keys = [cache.make_key("m", str(i), "s", "u") for i in range(2)]
+
+    cache.set(keys[0], "a" * 80)
+    for _ in range(20):
+        cache.set(keys[1], "b" * 80)
+
+    assert cache._size == sum(p.stat().st_size for p in cache._entries())
+    assert cache.get(keys[0]) == "a" * 80
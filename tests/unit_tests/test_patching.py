@@ -0,0 +1,90 @@
+import pytest
+
+from react_agent import patching
+from react_agent.patching import PatchError, apply_unified_diff, patch_or_regenerate
+
+PAGE = """<html>
+<body>
+  <button id="go">Go</button>
+  <div id="out"></div>
+  <script>
+    document.getElementById('go').onclick = () => {};
+  </script>
+</body>
+</html>"""
+
+
+def test_apply_replaces_lines_by_context() -> None:
+    diff = """```diff
+--- a/index.html
++++ b/index.html
+@@ -2,3 +2,3 @@
+ <body>
+-  <button id="go">Go</button>
++  <button id="go" class="px-4">Go</button>
+   <div id="out"></div>
+```"""
+    patched = apply_unified_diff(PAGE, diff)
+    assert '<button id="go" class="px-4">Go</button>' in patched
+    assert patched.count("\n") == PAGE.count("\n")
+
+
+def test_apply_ignores_wrong_line_numbers_and_whitespace() -> None:
+    diff = """@@ -40,2 +40,3 @@
+ <div id="out"></div>
++  <p>Ready</p>
+   <script>
+"""
+    patched = apply_unified_diff(PAGE, diff)
+    lines = patched.split("\n")
+    assert lines[lines.index('  <div id="out"></div>') + 1] == "  <p>Ready</p>"
+
+
+def test_apply_multiple_hunks_in_order() -> None:
+    diff = """@@ -1,2 +1,2 @@
+-<html>
++<html lang="en">
+ <body>
+
+@@ -9,1 +9,1 @@
+-</html>
++</html>
+"""
+    assert apply_unified_diff(PAGE, diff).startswith('<html lang="en">\n<body>')
+
+
+def test_mismatched_context_raises() -> None:
+    with pytest.raises(PatchError):
+        apply_unified_diff(PAGE, "@@ -1 +1 @@\n-<head>\n+<head lang='en'>\n")
+
+
+def test_diff_without_changes_raises() -> None:
+    with pytest.raises(PatchError):
+        apply_unified_diff(PAGE, "Here is the full page:\n" + PAGE)
+
+
+def test_patch_or_regenerate_falls_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def fake_invoke(system, user, *, stage, use_cache=True, on_token=None):
+        calls.append(stage)
+        return "not a diff" if stage.endswith("_patch") else "<html></html>"
+
+    monkeypatch.setattr(patching, "invoke_llm", fake_invoke)
+    result = patch_or_regenerate(PAGE, ("s", "diff"), ("s", "full"), stage="checker_fix")
+    assert result == "<html></html>"
+    assert calls == ["checker_fix_patch", "checker_fix"]
+
+
+def test_patch_or_regenerate_keeps_valid_patch(monkeypatch: pytest.MonkeyPatch) -> None:
+    diff = '@@ -3 +3 @@\n-  <button id="go">Go</button>\n+  <button id="go">Run</button>\n'
+    calls = []
+
+    def fake_invoke(system, user, *, stage, use_cache=True, on_token=None):
+        calls.append(stage)
+        return diff
+
+    monkeypatch.setattr(patching, "invoke_llm", fake_invoke)
+    result = patch_or_regenerate(PAGE, ("s", "diff"), ("s", "full"), stage="checker_fix")
+    assert ">Run</button>" in result
+    assert calls == ["checker_fix_patch"]
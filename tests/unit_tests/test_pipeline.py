@@ -0,0 +1,123 @@
+import asyncio
+import threading
+
+import pytest
+
+from react_agent.llm_cache import ResponseCache
+from react_agent.pipeline import Stage, arun_stages, run_stages
+
+
+def test_run_stages_passes_dependency_results() -> None:
+    run = run_stages(
+        [
+            Stage("sum", lambda a, b: a + b, ("a", "b")),
+            Stage("a", lambda: 1),
+            Stage("b", lambda a: a + 1, ("a",)),
+        ]
+    )
+
+    assert run.results == {"a": 1, "b": 2, "sum": 3}
+    assert set(run.timings) == {"a", "b", "sum"}
+    assert run.timings["sum"].started >= run.timings["b"].finished
+
+
+def test_run_stages_overlaps_independent_stages() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+
+    run = run_stages(
+        [Stage("left", lambda: barrier.wait()), Stage("right", lambda: barrier.wait())]
+    )
+
+    assert set(run.results) == {"left", "right"}
+
+
+def test_run_stages_propagates_errors_and_rejects_cycles() -> None:
+    def boom() -> None:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_stages([Stage("a", boom), Stage("b", lambda a: a, ("a",))])
+
+    with pytest.raises(ValueError, match="cycle"):
+        run_stages([Stage("a", lambda b: b, ("b",)), Stage("b", lambda a: a, ("a",))])
+
+
+def test_run_stages_reuses_unchanged_stages(tmp_path) -> None:
+    cache = ResponseCache(tmp_path)
+    calls = []
+
+    def stages(a_input: str, b_input: str) -> list:
+        def record(name, value):
+            calls.append(name)
+            return value
+        return [
+            Stage("a", lambda: record("a", [a_input]), inputs=a_input),
+            Stage("b", lambda: record("b", b_input), inputs=b_input),
+            Stage("c", lambda a: record("c", a + ["c"]), ("a",), inputs={}),
+            Stage("d", lambda c, b: record("d", c + [b]), ("c", "b"), inputs={}),
+        ]
+
+    first = run_stages(stages("x", "y"), cache=cache)
+    assert first.results["d"] == ["x", "c", "y"] and not first.reused
+
+    calls.clear()
+    second = run_stages(stages("x", "y"), cache=cache)
+    assert calls == [] and second.reused == {"a", "b", "c", "d"}
+    assert second.results == first.results
+
+    calls.clear()
+    third = run_stages(stages("x", "z"), cache=cache)
+    assert sorted(calls) == ["b", "d"]
+    assert third.results["d"] == ["x", "c", "z"]
+    assert third.fingerprints["c"] == first.fingerprints["c"]
+
+
+def test_uncacheable_results_are_not_reused(tmp_path) -> None:
+    cache = ResponseCache(tmp_path)
+    probes = iter(["error", "ok", "ok"])
+
+    def stages() -> list:
+        return [
+            Stage("probe", lambda: next(probes), inputs={}, cacheable=lambda result: result != "error"),
+            Stage("page", lambda probe: f"page with {probe}", ("probe",), inputs={}),
+        ]
+
+    failed = run_stages(stages(), cache=cache)
+    assert failed.fingerprints == {"probe": None, "page": None}
+
+    recovered = run_stages(stages(), cache=cache)
+    assert recovered.results["page"] == "page with ok" and recovered.reused == set()
+    assert run_stages(stages(), cache=cache).reused == {"probe", "page"}
+
+
+def test_stages_without_inputs_always_run(tmp_path) -> None:
+    cache = ResponseCache(tmp_path)
+    run_stages([Stage("a", lambda: 1), Stage("b", lambda a: a, ("a",), inputs={})], cache=cache)
+    run = run_stages([Stage("a", lambda: 1), Stage("b", lambda a: a, ("a",), inputs={})], cache=cache)
+    assert run.reused == set()
+
+
+def test_arun_stages_overlaps_coroutines_and_threads() -> None:
+    async def slow(value: int) -> int:
+        await asyncio.sleep(0.05)
+        return value
+
+    stages = [
+        Stage("a", lambda: 1, afn=lambda: slow(1)),
+        Stage("b", lambda: 2, afn=lambda: slow(2)),
+        Stage("sync", lambda: 10),
+        Stage("sum", lambda a, b, c: a + b + c, ("a", "b", "sync")),
+    ]
+    run = asyncio.run(arun_stages(stages))
+
+    assert run.results["sum"] == 13
+    assert run.timings["a"].started < run.timings["b"].finished
+    assert run.timings["b"].started < run.timings["a"].finished
+
+
+def test_arun_stages_propagates_errors() -> None:
+    async def boom() -> None:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(arun_stages([Stage("a", lambda: None, afn=boom), Stage("b", lambda a: a, ("a",))]))
@@ -0,0 +1,148 @@
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from react_agent.rate_limit import (
+    Governor,
+    Limits,
+    RateLimiter,
+    configure_rate_limit,
+    get_governor,
+    is_rate_limit_error,
+    is_transient_error,
+    provider_of,
+    rate_limit_metrics,
+)
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_bucket_allows_burst_then_waits() -> None:
+    now = [0.0]
+    limiter = RateLimiter(120, burst=2, clock=lambda: now[0])
+
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    now[0] = 0.5
+    assert limiter.try_acquire() == 0
+
+
+def test_token_bucket_is_corrected_by_actual_usage() -> None:
+    now = [0.0]
+    tokens = RateLimiter(600, burst=600, clock=lambda: now[0])
+    assert tokens.try_acquire(100) == 0
+    tokens.adjust(400)  # the call used 500 tokens, not 100
+    assert tokens.try_acquire(200) == pytest.approx(10.0)
+
+
+def test_governors_resolve_model_then_provider() -> None:
+    assert provider_of("openai/gpt-4.1") == "openai"
+    configure_rate_limit("test-provider", 60)
+    try:
+        assert get_governor("test-provider/a") is get_governor("test-provider/b")
+        assert get_governor("unlimited/model") is None
+        model_governor = get_governor("test-provider/a", Limits(requests_per_minute=30))
+        assert model_governor.key == "test-provider/a"
+        assert "test-provider/a" in rate_limit_metrics()
+    finally:
+        configure_rate_limit("test-provider", None)
+        configure_rate_limit("test-provider/a", None)
+    assert get_governor("test-provider/b") is None
+
+
+def test_concurrency_cap_and_queue_depth() -> None:
+    governor = Governor("test", Limits(max_concurrency=1))
+    release = threading.Event()
+    entered = threading.Event()
+
+    def hold() -> None:
+        with governor.slot():
+            entered.set()
+            release.wait(5)
+
+    first = threading.Thread(target=hold)
+    first.start()
+    entered.wait(5)
+    second = threading.Thread(target=lambda: governor.call(lambda: None))
+    second.start()
+    deadline = time.monotonic() + 5
+    while governor.metrics()["waiting"] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert governor.metrics()["in_flight"] == 1
+    release.set()
+    first.join(5)
+    second.join(5)
+    metrics = governor.metrics()
+    assert metrics["waiting"] == 0 and metrics["max_waiting"] == 1 and metrics["requests"] == 2
+
+
+def test_rate_limit_errors_back_off_and_retry() -> None:
+    governor = Governor("test", Limits(requests_per_minute=6000))
+    attempts = []
+
+    def flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            error = RateLimited("slow down")
+            error.response = type("R", (), {"status_code": 429, "headers": {"retry-after": "0.01"}})()
+            raise error
+        return "ok"
+
+    assert is_rate_limit_error(RateLimited())
+    assert governor.call(flaky) == "ok"
+    metrics = governor.metrics()
+    assert metrics["throttled"] == 2
+    assert metrics["rate_scale"] < 1
+
+    with pytest.raises(ValueError):
+        governor.call(lambda: (_ for _ in ()).throw(ValueError("not a rate limit")))
+
+
+def test_governor_retries_transient_errors() -> None:
+    governor = Governor("test", Limits(requests_per_minute=6000))
+    attempts = []
+
+    class Overloaded(Exception):
+        status_code = 529
+
+    def flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise Overloaded()
+        return "ok"
+
+    assert is_transient_error(Overloaded()) and not is_transient_error(ValueError())
+    assert governor.call(flaky, retries=1) == "ok"
+    assert governor.metrics()["throttled"] == 0
+
+
+def test_pipeline_calls_use_configured_limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    import importlib
+
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    from react_agent.llm import invoke_llm
+
+    retries = []
+
+    def get_chat_model(name: str, **kwargs: Any) -> GenericFakeChatModel:
+        retries.append(kwargs.get("max_retries"))
+        return GenericFakeChatModel(messages=iter([AIMessage("ok")]))
+
+    monkeypatch.setattr(importlib.import_module("react_agent.graph"), "get_chat_model", get_chat_model)
+    run = RunnableLambda(lambda _: invoke_llm("sys", "user", stage="design", model="limited/model", use_cache=False))
+    try:
+        assert run.invoke(None, {"configurable": {"requests_per_minute": 600}}) == "ok"
+        metrics = rate_limit_metrics()["limited/model"]
+        assert metrics["limits"]["requests_per_minute"] == 600 and metrics["requests"] == 1
+        assert retries == [0]
+    finally:
+        configure_rate_limit("limited/model", None)
@@ -0,0 +1,76 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from react_agent.llm_cache import ResponseCache
+from react_agent.search import LocalSearchBackend, SearchClient
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_search_results_are_cached_until_ttl() -> None:
+    backend = LocalSearchBackend(lambda q: {"query": q, "results": [q.upper()]})
+    clock = Clock()
+    client = SearchClient(backend, ttl=60, clock=clock)
+
+    first = asyncio.run(client.search("tailwind  cdn", 5))
+    assert asyncio.run(client.search(" tailwind cdn ", 5)) == first
+    assert backend.calls == 1
+
+    clock.now += 61
+    asyncio.run(client.search("tailwind cdn", 5))
+    assert backend.calls == 2
+
+
+def test_search_cache_evicts_least_recently_used() -> None:
+    backend = LocalSearchBackend({})
+    client = SearchClient(backend, ttl=60, max_entries=2)
+
+    async def run() -> None:
+        for query in ("a", "b", "a", "c", "a", "b"):
+            await client.search(query)
+
+    asyncio.run(run())
+    assert backend.calls == 4  # "b" was evicted by "c"
+
+
+def test_concurrent_identical_searches_are_coalesced() -> None:
+    backend = LocalSearchBackend({"q": {"results": [1]}}, latency=0.05)
+    client = SearchClient(backend, ttl=0)
+
+    async def run() -> list:
+        return await asyncio.gather(*(client.search("q") for _ in range(5)))
+
+    assert asyncio.run(run()) == [{"results": [1]}] * 5
+    assert backend.calls == 1
+    assert client.stats["coalesced"] == 4
+
+
+def test_search_cache_persists_on_disk(tmp_path: Path) -> None:
+    backend = LocalSearchBackend({"q": {"results": [1]}})
+    asyncio.run(SearchClient(backend, disk=ResponseCache(tmp_path)).search("q"))
+
+    fresh = SearchClient(backend, disk=ResponseCache(tmp_path))
+    assert asyncio.run(fresh.search("q")) == {"results": [1]}
+    assert backend.calls == 1 and fresh.stats["disk_hits"] == 1
+
+
+def test_search_errors_are_not_cached() -> None:
+    def flaky(query: str) -> dict:
+        if backend.calls == 1:
+            raise RuntimeError("quota")
+        return {"results": []}
+
+    backend = LocalSearchBackend(flaky)
+    client = SearchClient(backend, ttl=60)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(client.search("q"))
+    assert asyncio.run(client.search("q")) == {"results": []}
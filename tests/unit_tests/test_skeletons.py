@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from react_agent.skeletons import SkeletonStore, schema_features, skeleton_key
+from react_agent.yaml_extracter import Task
+
+
+def make_task(
+    task_type: str = "Text classification",
+    output_type: str = "string",
+    extra: bool = False,
+    description: str = "Classify text",
+    visualize: str = "Show the label",
+) -> Task:
+    output = {"type": "List[dict]", "structure": {"label": {"type": output_type, "description": "Emotion"}}}
+    if extra:
+        output["structure"]["score"] = {"type": "float"}
+    return Task.from_dict({
+        "task_description": {"type": task_type, "description": description, "visualize": {"description": visualize}},
+        "model_information": {
+            "api_url": "http://localhost/api",
+            "input_format": {"type": "json", "structure": {"texts": {"type": "string", "description": "Input"}}},
+            "output_format": output,
+        },
+    })
+
+
+def test_schema_features_ignore_prose() -> None:
+    a = {"type": "json", "structure": {"texts": {"type": "string", "description": "One"}}}
+    b = {"type": "json", "structure": {"texts": {"type": "string", "description": "Two", "example": "hi"}}}
+    assert schema_features(a) == schema_features(b)
+    assert "structure.texts:string" in schema_features(a)
+
+
+def test_key_depends_on_type_and_shape() -> None:
+    assert skeleton_key(make_task()) == skeleton_key(make_task("text  Classification"))
+    assert skeleton_key(make_task()) != skeleton_key(make_task(output_type="int"))
+    assert skeleton_key(make_task()) != skeleton_key(make_task("Image classification"))
+
+
+def test_store_exact_and_near_matches(tmp_path: Path) -> None:
+    store = SkeletonStore(tmp_path)
+    assert store.lookup(make_task()) is None
+    store.put(make_task(), ("html", "css", "js"), "design", "<html></html>")
+
+    skeleton, score = store.lookup(make_task())
+    assert score == 1.0
+    assert skeleton.specs == ("html", "css", "js")
+
+    near = store.lookup(make_task(extra=True), min_similarity=0.5)
+    assert near is not None and 0.5 <= near[1] < 1.0
+    assert store.lookup(make_task(extra=True), min_similarity=0.99) is None
+    assert store.lookup(make_task("Object detection")) is None
+
+
+def test_store_reloads_from_disk(tmp_path: Path) -> None:
+    SkeletonStore(tmp_path).put(make_task(), ("h", "c", "j"), "d", "<html></html>")
+    reloaded = SkeletonStore(tmp_path)
+    assert len(reloaded) == 1
+    skeleton, _ = reloaded.lookup(make_task())
+    assert skeleton.html == "<html></html>"
+    assert skeleton.key == skeleton_key(make_task())
+
+
+def test_description_only_decides_specification_reuse(tmp_path: Path) -> None:
+    store = SkeletonStore(tmp_path)
+    store.put(make_task(), ("html", "css", "js"), "design", "<html></html>")
+
+    for task in (make_task(description="Classify text into seven emotions"), make_task(visualize="Show a chart")):
+        assert skeleton_key(task) == skeleton_key(make_task())
+        skeleton, score = store.lookup(task)
+        assert score == 1.0 and not skeleton.matches_description(task)
+    assert store.lookup(make_task(description="Classify  text"))[0].matches_description(make_task())
@@ -0,0 +1,61 @@
+from react_agent.static_check import static_check
+
+API = "http://localhost:8000/api/emotion"
+
+PAGE = """```html
+<!DOCTYPE html>
+<html>
+<body>
+  <form id="form"><input id="text"><button class="send">Send</button></form>
+  <div id="result"></div>
+  <script>
+    const form = document.getElementById('form');
+    form.addEventListener('submit', async (e) => {
+      e.preventDefault();
+      const res = await fetch('http://localhost:8000/api/emotion', {method: 'POST'});
+      const row = document.createElement('div');
+      row.innerHTML = `<span id="label"></span>`;
+      document.getElementById('result').appendChild(row);
+      document.getElementById('label').textContent = (await res.json())?.label;
+      document.querySelector('.send').disabled = false;
+    });
+  </script>
+</body>
+</html>
+```"""
+
+
+def test_clean_page_has_no_findings() -> None:
+    report = static_check(PAGE, API)
+    assert report.clean, report.format()
+
+
+def test_broken_page_reports_each_problem() -> None:
+    broken = (
+        PAGE.replace('id="result"', 'id="output"')
+        .replace("/api/emotion'", "/api/sentiment'")
+        .replace("e.preventDefault();", "e.preventDefault(;")
+        .replace('<div id="output"></div>', '<div id="output"><section></div>')
+    )
+
+    kinds = sorted(f.kind for f in static_check(broken, API).findings)
+
+    assert kinds == ["api", "api", "html", "js-syntax", "selector"]
+
+
+def test_modern_syntax_is_not_reported() -> None:
+    script = """
+    class Counter {
+      count = 0;
+      #step = 1;
+      static { Counter.ready = true; }
+      inc() { this.count += this.#step; }
+    }
+    async function load(items) {
+      try { JSON.parse('{}'); } catch { return null; }
+      for await (const item of items) { console.log(item?.name ?? 1_000); }
+    }
+    """
+    page = f"<html><body><script>{script}</script></body></html>"
+
+    assert static_check(page).clean, static_check(page).format()
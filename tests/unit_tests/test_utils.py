@@ -0,0 +1,99 @@
+import json
+from typing import Any, Iterator
+
+import pytest
+
+from react_agent import utils
+
+
+class _FakeModel:
+    def __init__(self, name: str, temperature: float) -> None:
+        self.name = name
+        self.temperature = temperature
+        self.tools: Any = None
+
+    def bind_tools(self, tools: Any) -> "_FakeModel":
+        bound = _FakeModel(self.name, self.temperature)
+        bound.tools = tools
+        return bound
+
+
+@pytest.fixture(autouse=True)
+def fake_models(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[str]]:
+    built: list[str] = []
+
+    def _load(model_name: str, temperature: float = 1, max_retries: Any = None) -> _FakeModel:
+        built.append(model_name)
+        return _FakeModel(model_name, temperature)
+
+    monkeypatch.setattr(utils, "load_chat_model", _load)
+    utils.clear_chat_model_cache()
+    yield built
+    utils.clear_chat_model_cache()
+
+
+def test_get_chat_model_reuses_clients(fake_models: list[str]) -> None:
+    def search() -> None: ...
+
+    first = utils.get_chat_model("openai/gpt-4.1", tools=[search])
+    second = utils.get_chat_model("openai/gpt-4.1", tools=[search])
+    untooled = utils.get_chat_model("openai/gpt-4.1")
+
+    assert first is second
+    assert untooled is not first
+    assert first.tools == [search]
+    assert fake_models == ["openai/gpt-4.1", "openai/gpt-4.1"]
+
+
+def test_get_chat_model_evicts_least_recently_used(
+    monkeypatch: pytest.MonkeyPatch, fake_models: list[str]
+) -> None:
+    monkeypatch.setattr(utils, "CHAT_MODEL_CACHE_SIZE", 2)
+
+    a = utils.get_chat_model("openai/a")
+    utils.get_chat_model("openai/b")
+    assert utils.get_chat_model("openai/a") is a
+    utils.get_chat_model("openai/c")  # evicts "b"
+    utils.get_chat_model("openai/b")
+
+    assert fake_models == ["openai/a", "openai/b", "openai/c", "openai/b"]
+
+
+def test_select_representative_prefers_distinct_outputs() -> None:
+    pairs = [
+        ({"t": "a"}, [{"label": "joy", "score": 0.9}]),
+        ({"t": "b"}, [{"label": "joy", "score": 0.8}]),
+        ({"t": "c"}, [{"label": "anger", "score": 0.7}]),
+        ({"t": "d"}, {"error": "bad input"}),
+    ]
+
+    picked = utils.select_representative(pairs, k=3)
+
+    assert [inp["t"] for inp, _ in picked] == ["a", "c", "d"]
+    inputs, outputs = utils.format_examples(picked[:2])
+    assert inputs.splitlines()[1] == 'Example 2: {"t": "c"}'
+    assert "anger" in outputs.splitlines()[1]
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, body: str) -> None:
+        self.status_code = status_code
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+def test_probe_model_api_skips_failed_and_invalid_responses(monkeypatch: pytest.MonkeyPatch) -> None:
+    responses = {"ok": _FakeResponse(200, '{"label": "joy"}'), "html": _FakeResponse(200, "<html>"),
+                 "down": _FakeResponse(503, "")}
+
+    class _Client:
+        def post_json(self, api: str, payload: Any) -> _FakeResponse:
+            return responses[payload["t"]]
+
+    monkeypatch.setattr(utils, "get_http_client", lambda: _Client())
+
+    results = utils.probe_model_api("http://model", [{"t": "ok"}, {"t": "html"}, {"t": "down"}])
+
+    assert results == [{"label": "joy"}, None, None]
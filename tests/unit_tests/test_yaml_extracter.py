@@ -0,0 +1,90 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+import yaml
+
+from react_agent import yaml_extracter
+from react_agent.yaml_extracter import (
+    Task,
+    TaskValidationError,
+    extract_info,
+    load_task,
+    parse_task,
+)
+
+TASK_YAML = """
+task_description:
+  type: Text classification
+  description: Classify the emotion of a text.
+model_information:
+  api_url: "http://localhost:8000/api/emotion"
+  input_format:
+    texts: string
+  output_format:
+    label: string
+"""
+
+
+def test_load_task_parses_once_until_file_changes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    parses = []
+    safe_load = yaml.safe_load
+    monkeypatch.setattr(yaml_extracter, "_by_hash", OrderedDict())
+    monkeypatch.setattr(yaml_extracter.yaml, "safe_load", lambda data: parses.append(data) or safe_load(data))
+    path = tmp_path / "task.yaml"
+    path.write_text(TASK_YAML, encoding="utf-8")
+
+    task = load_task(str(path))
+    assert isinstance(task, Task)
+    assert task.type == "Text classification"
+    assert task.api_url == "http://localhost:8000/api/emotion"
+    assert task.input_format == {"texts": "string"}
+    assert extract_info("model_information.output_format.label", str(path)) == "string"
+    assert load_task(str(path)) == task
+    assert len(parses) == 1
+    assert not hasattr(task, "__dict__")
+
+    path.write_text(TASK_YAML.replace("emotion\"", "sentiment\""), encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    assert load_task(str(path)).api_url.endswith("/sentiment")
+    assert len(parses) == 2
+
+
+def test_identical_content_keeps_each_source(tmp_path: Path) -> None:
+    a, b = tmp_path / "a.yaml", tmp_path / "b.yaml"
+    a.write_text(TASK_YAML, encoding="utf-8")
+    b.write_text(TASK_YAML, encoding="utf-8")
+
+    task_a, task_b = load_task(str(a)), load_task(str(b))
+
+    assert task_a.raw == task_b.raw and task_a.content_hash == task_b.content_hash
+    assert (task_a.source, task_b.source) == (str(a), str(b))
+
+
+def test_tasks_do_not_share_mutable_data(tmp_path: Path) -> None:
+    path = tmp_path / "task.yaml"
+    path.write_text(TASK_YAML, encoding="utf-8")
+
+    load_task(str(path)).model_information["api_url"] = "changed"
+    parse_task(TASK_YAML).raw["task_description"]["description"] = "changed"
+
+    assert load_task(str(path)).api_url == "http://localhost:8000/api/emotion"
+    assert parse_task(TASK_YAML).description == "Classify the emotion of a text."
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["- a list", "task_description: {}", TASK_YAML.replace("api_url", "url"), "a: [b"],
+)
+def test_parse_task_rejects_invalid_tasks(text: str) -> None:
+    with pytest.raises(TaskValidationError):
+        parse_task(text)
+
+
+def test_without_drops_fields_from_a_copy() -> None:
+    task = parse_task(TASK_YAML)
+    data = task.without("model_information.api_url", "missing.field")
+    assert "api_url" not in data["model_information"]
+    assert task.api_url == task.raw["model_information"]["api_url"]
+    assert "api_url" not in task.to_yaml(exclude=("model_information.api_url",))